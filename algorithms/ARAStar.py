@@ -0,0 +1,208 @@
+"""Anytime Repairing A* (ARA*): lời giải nhanh trước, cải thiện dần khi còn thời gian.
+
+Bắt đầu bằng A* với heuristic MST nhân hệ số weight > 1 (f = g + weight·h):
+tìm kiếm lao thẳng về phía đích nên có lời giải rất sớm, chi phí không quá
+weight lần tối ưu. Sau đó giảm weight từng nấc và tìm lại, dùng lại các giá
+trị g đã có: chỉ các trạng thái không nhất quán (g vừa giảm sau khi đã đóng,
+INCONS) được đưa lại vào hàng đợi. Dừng khi hết ngân sách thời gian hoặc khi
+đã chứng minh được lời giải tối ưu (weight = 1, hoặc cận dưới chạm chi phí).
+
+Mỗi lời giải kèm cận tối ưu "bound" = chi phí / cận dưới của chi phí tối ưu
+(min g + h trên OPEN ∪ INCONS), luôn <= weight; bound = 1.0 nghĩa là tối ưu.
+"""
+import time
+from heapq import heappush, heappop
+from typing import Dict, List, Optional, Set, Tuple
+
+from algorithms.connectivity import reject_unsolvable
+from algorithms.level_kernel import (
+    PICKED_STAR,
+    START_MOVE,
+    ProgressCallback,
+    SearchEvents,
+    build_state_space,
+    collect_trace,
+    compile_level,
+    search_outcome,
+)
+from algorithms.poi_heuristics import build_mst_heuristic
+from algorithms.tree_maze import is_tree_maze, tree_search
+
+Position = Tuple[int, int]
+
+INITIAL_WEIGHT = 3.0
+WEIGHT_STEP = 0.5
+
+
+def arastar_collect_all_stars_with_trace(
+    rows: List[str],
+    time_budget: Optional[float] = None,
+    initial_weight: float = INITIAL_WEIGHT,
+    weight_step: float = WEIGHT_STEP,
+    progress: ProgressCallback = None,
+) -> Dict[str, object]:
+    """Tìm đường đi gom hết sao rồi tới G bằng ARA* trong ngân sách thời gian.
+
+    - Input: rows (danh sách chuỗi ký tự của level)
+      time_budget: số giây tìm kiếm tối đa (None = chạy tới khi chứng minh tối ưu).
+      Lời giải đầu tiên luôn được tìm xong dù vượt ngân sách.
+      initial_weight, weight_step: hệ số heuristic ban đầu và mức giảm mỗi vòng
+    - Output: dict như astar_collect_all_stars_with_trace, thêm:
+        {
+          "bound": float,              # chi phí <= bound · tối ưu (1.0 = tối ưu)
+          "weight": float,             # weight của vòng tìm ra lời giải cuối
+          "solutions": List[[cost, bound]]  # lịch sử các lời giải đã cải thiện
+        }
+      "expanded_order" gồm các ô mở rộng của mọi vòng.
+    """
+    return collect_trace(arastar_search(rows, time_budget, initial_weight, weight_step), progress)
+
+
+def arastar_search(
+    rows: List[str],
+    time_budget: Optional[float] = None,
+    initial_weight: float = INITIAL_WEIGHT,
+    weight_step: float = WEIGHT_STEP,
+) -> SearchEvents:
+    """Generator của ARA*: yield từng ô được mở rộng (qua mọi vòng), return lời giải tốt nhất.
+
+    Ngân sách chỉ tính thời gian chạy bên trong generator, nên khi được tiêu thụ
+    dần từng frame (hiển thị quá trình duyệt) vẫn cho cùng lượng tìm kiếm.
+    """
+    level = compile_level(rows)
+    rejected = reject_unsolvable(level)
+    if rejected is not None:
+        rejected.update(bound=float('inf'), weight=initial_weight, solutions=[])
+        return rejected
+    # Mê cung dạng cây: có lời giải tối ưu trực tiếp, không cần tìm kiếm trên mask
+    if is_tree_maze(level):
+        res = yield from tree_search(level)
+        res.update(bound=1.0, weight=1.0, solutions=[[res["cost"], 1.0]] if res["found"] else [])
+        return res
+    get_heuristic = build_mst_heuristic(level)
+
+    space = build_state_space(level)
+    neighbors = space.neighbors
+    positions = space.positions
+    cells = space.cells
+    costs = space.costs
+    bits, mask_all = space.bits, space.mask_all
+    goal_state = space.state(level.goal_cell, level.all_mask)
+    inf = float('inf')
+
+    # moves[state]: nước đi vào state theo g tốt nhất hiện tại (thay cho parents)
+    moves = space.new_moves()
+    g_scores: Dict[int, int] = {}
+    h_scores: Dict[int, float] = {}
+
+    def h(state: int) -> float:
+        value = h_scores.get(state)
+        if value is None:
+            value = get_heuristic(cells[state >> bits], state & mask_all)
+            h_scores[state] = value
+        return value
+
+    start_state = space.state(level.start_cell, 0)
+    moves[start_state] = START_MOVE
+    g_scores[start_state] = 0
+    weight = max(1.0, initial_weight)
+    # OPEN: min-heap (f, state), xóa lười; open_f giữ f hiện tại của state trong OPEN
+    open_heap: List[Tuple[float, int]] = []
+    open_f: Dict[int, float] = {}
+    incons: Set[int] = set()
+    if h(start_state) != inf:
+        open_f[start_state] = weight * h(start_state)
+        heappush(open_heap, (open_f[start_state], start_state))
+
+    best: Optional[Dict[str, object]] = None
+    solutions: List[List[float]] = []
+    spent = 0.0
+    resumed = time.perf_counter()
+
+    def lower_bound() -> float:
+        """Cận dưới chi phí tối ưu: min g + h trên OPEN ∪ INCONS (và chính G)."""
+        bound = g_scores.get(goal_state, inf)
+        for state in list(open_f) + list(incons):
+            value = g_scores[state] + h(state)
+            if value < bound:
+                bound = value
+        return bound
+
+    while True:
+        # ---- ImprovePath: A* với f = g + weight·h, dừng khi không còn f nhỏ hơn g(G) ----
+        closed: Set[int] = set()
+        out_of_time = False
+        while open_heap:
+            f_score, state = open_heap[0]
+            if open_f.get(state) != f_score:
+                heappop(open_heap)  # bản sao cũ
+                continue
+            if g_scores.get(goal_state, inf) <= f_score:
+                break
+            heappop(open_heap)
+            del open_f[state]
+            closed.add(state)
+            idx = state >> bits
+            spent += time.perf_counter() - resumed
+            yield positions[idx]
+            resumed = time.perf_counter()
+            if best is not None and time_budget is not None and spent >= time_budget:
+                out_of_time = True
+                break
+
+            mask = state & mask_all
+            g_score = g_scores[state]
+            for nshift, code, bit in neighbors[idx]:
+                nxt = nshift | mask | bit
+                tentative_g = g_score + costs[nshift >> bits]
+                if tentative_g >= g_scores.get(nxt, inf):
+                    continue
+                h_score = h(nxt)
+                # Không tới được sao/G còn lại từ state này -> bỏ qua
+                if h_score == inf:
+                    continue
+                g_scores[nxt] = tentative_g
+                moves[nxt] = code | PICKED_STAR if bit and not mask & bit else code
+                if nxt in closed:
+                    incons.add(nxt)
+                else:
+                    f_next = tentative_g + weight * h_score
+                    open_f[nxt] = f_next
+                    heappush(open_heap, (f_next, nxt))
+
+        if out_of_time:
+            break
+        goal_g = g_scores.get(goal_state, inf)
+        if goal_g == inf:
+            break  # Không có lời giải
+
+        # Lời giải của vòng này (cha có thể đã được cải thiện sau khi G nhận g,
+        # nên chi phí đường đi có thể nhỏ hơn g(G)); chỉ nhận nếu tốt hơn lời giải trước
+        path, path_moves = space.reconstruct(moves, goal_state)
+        res = search_outcome(level, path, path_moves, True)
+        bound = min(weight, res["cost"] / max(lower_bound(), 1))
+        if best is None or res["cost"] < best["cost"] or bound < best["bound"]:
+            best = res
+            best.update(bound=bound, weight=weight)
+            solutions.append([res["cost"], bound])
+        if bound <= 1.0 or weight <= 1.0:
+            best["bound"] = 1.0
+            break
+        if time_budget is not None and spent >= time_budget:
+            break
+
+        # ---- Giảm weight, đưa INCONS vào OPEN và tính lại f ----
+        weight = max(1.0, weight - weight_step)
+        for state in incons:
+            open_f[state] = 0.0  # giá trị tạm, tính lại ngay dưới đây
+        incons = set()
+        open_f = {state: g_scores[state] + weight * h(state) for state in open_f}
+        open_heap = [(f, state) for state, f in open_f.items()]
+        open_heap.sort()
+
+    if best is None:
+        res = search_outcome(level, [], [], False)
+        res.update(bound=inf, weight=weight, solutions=[])
+        return res
+    best["solutions"] = solutions
+    return best
@@ -1,144 +1,244 @@
 from collections import deque
-from typing import Deque, Dict, Iterable, List, Optional, Set, Tuple
-
-
-Position = Tuple[int, int]
-State = Tuple[int, int, int]  # (x, y, collected_mask)
-
-
-def _parse_level(rows: List[str]) -> Tuple[Position, Position, List[Position], int, int]:
-    """Trích xuất S, G, danh sách sao từ ma trận ký tự.
-
-    Ký hiệu lưới:
-    - "1": tường (không đi xuyên)
-    - "S": vị trí bắt đầu
-    - "G": cửa/đích
-    - "*": ngôi sao
-
-    Trả về: (start, goal, stars, width, height)
-    """
-    height = len(rows)
-    width = len(rows[0]) if height > 0 else 0
-    start: Optional[Position] = None
-    goal: Optional[Position] = None
-    stars: List[Position] = []
-
-    for y in range(height):
-        for x in range(width):
-            ch = rows[y][x]
-            if ch == "S":
-                start = (x, y)
-            elif ch == "G":
-                goal = (x, y)
-            elif ch == "*":
-                stars.append((x, y))
-
-    if start is None or goal is None:
-        raise ValueError("Level không hợp lệ: thiếu S hoặc G")
-
-    return start, goal, stars, width, height
-
-def _is_blocked(rows: List[str], x: int, y: int, width: int, height: int) -> bool:
-    if x < 0 or y < 0 or x >= width or y >= height:
-        return True
-    return rows[y][x] == "1"
-
-def _reconstruct_path(
-    parents: Dict[State, Tuple[Optional[State], str]],
-    end_state: State,
-) -> Tuple[List[Position], List[str]]:
-    """Lần ngược từ end_state để tạo path (danh sách tọa độ) và moves (UDLR)."""
-    path_rev: List[Position] = []
-    moves_rev: List[str] = []
-    cur: Optional[State] = end_state
-    while cur is not None:
-        (x, y, _) = cur
-        path_rev.append((x, y))
-        prev, move = parents[cur]
-        if move:
-            moves_rev.append(move)
-        cur = prev
-
-    path_rev.reverse()
-    moves_rev.reverse()
-    return path_rev, moves_rev
-
-def bfs_collect_all_stars_with_trace(rows: List[str]) -> Dict[str, object]:
+from functools import lru_cache
+from typing import Deque, Dict, List, Optional, Tuple
+
+from algorithms.bidirectional import bidirectional_search
+from algorithms.connectivity import reject_unsolvable
+from algorithms.distance_field import VECTOR_MIN_FRONTIER
+from algorithms.layer_pool import LayerPool, shared_moves
+from algorithms.level_kernel import (
+    PICKED_STAR,
+    PROGRESS_INTERVAL,
+    START_MOVE,
+    ProgressCallback,
+    SearchEvents,
+    StateSpace,
+    build_state_space,
+    collect_trace,
+    compile_level,
+    search_outcome,
+)
+
+try:
+    import numpy as np
+except ImportError:  # NumPy là tùy chọn, thiếu thì dùng BFS từng trạng thái
+    np = None
+
+
+def bfs_collect_all_stars_with_trace(rows: List[str], progress: ProgressCallback = None) -> Dict[str, object]:
     """
     Trả về thêm:
       - "expanded_order": List[(x, y)] theo thứ tự lấy ra từ hàng đợi (đã mở rộng)
     """
-    start, goal, stars, width, height = _parse_level(rows)
-
-    star_index: Dict[Position, int] = {pos: i for i, pos in enumerate(stars)}
-    all_mask = (1 << len(stars)) - 1
-
-    start_mask = 0
-
-    queue: Deque[State] = deque()
-    parents: Dict[State, Tuple[Optional[State], str]] = {}
-    visited: Set[State] = set()
-
-    expanded_order: List[Position] = []
-
-    start_state: State = (start[0], start[1], start_mask)
-    queue.append(start_state)
-    parents[start_state] = (None, "")
-    visited.add(start_state)
-
-    directions: List[Tuple[int, int, str]] = [
-        (0, -1, "U"),
-        (0, 1, "D"),
-        (-1, 0, "L"),
-        (1, 0, "R"),
-    ]
-
-    end_state: Optional[State] = None
+    return collect_trace(bfs_search(rows), progress)
+
+
+def bfs_search(rows: List[str]) -> SearchEvents:
+    """Generator của BFS: yield từng ô được mở rộng, return kết quả khi kết thúc."""
+    level = compile_level(rows)
+    rejected = reject_unsolvable(level)
+    if rejected is not None:
+        return rejected
+    # Không có sao: chỉ còn đường ngắn nhất S -> G, tìm từ hai phía
+    if not level.stars:
+        return (yield from bidirectional_search(level, by_cost=False))
+    space = build_state_space(level)
+    neighbors = space.neighbors
+    positions = space.positions
+    bits, mask_all = space.bits, space.mask_all
+    goal_state = space.state(level.goal_cell, level.all_mask)
+
+    # moves[state] != 0: đã thăm; giá trị là nước đi vào state (thay cho dict parents)
+    moves = space.new_moves()
+    start_state = space.state(level.start_cell, 0)
+    moves[start_state] = START_MOVE
+    queue: Deque[int] = deque([start_state])
+
+    end_state: Optional[int] = None
 
     while queue:
-        x, y, mask = queue.popleft()
-        expanded_order.append((x, y))
+        state = queue.popleft()
+        idx = state >> bits
+        yield positions[idx]
 
-        if (x, y) == goal and mask == all_mask:
-            end_state = (x, y, mask)
+        if state == goal_state:
+            end_state = state
             break
 
-        for dx, dy, move in directions:
-            nx, ny = x + dx, y + dy
-            if _is_blocked(rows, nx, ny, width, height):
+        mask = state & mask_all
+        for nshift, code, bit in neighbors[idx]:
+            nxt = nshift | mask | bit
+            if moves[nxt]:
                 continue
+            moves[nxt] = code | PICKED_STAR if bit and not mask & bit else code
+            queue.append(nxt)
 
-            next_mask = mask
-            pos = (nx, ny)
-            if pos in star_index:
-                next_mask = mask | (1 << star_index[pos])
+    if end_state is None:
+        return search_outcome(level, [], [], False)
 
-            nxt: State = (nx, ny, next_mask)
-            if nxt in visited:
-                continue
-            visited.add(nxt)
-            parents[nxt] = ((x, y, mask), move)
-            queue.append(nxt)
+    path, path_moves = space.reconstruct(moves, end_state)
+    return search_outcome(level, path, path_moves, True)
+
+
+def bfs_collect_all_stars(rows: List[str], progress: ProgressCallback = None, workers: int = 1) -> Dict[str, object]:
+    """BFS không ghi lại quá trình duyệt ("expanded_order" rỗng), dùng khi chỉ cần lời giải.
+
+    Kết quả ("path", "moves", "nodes_expanded") giống hệt bfs_collect_all_stars_with_trace.
+    Có NumPy thì BFS chạy theo lớp độ sâu trên toàn bộ không gian (ô, mask): mỗi
+    lớp được mở rộng bằng vài phép toán mảng thay vì vòng lặp Python cho từng
+    trạng thái. Thứ tự FIFO được giữ nguyên (ứng viên xếp theo (vị trí cha
+    trong lớp, hướng U/D/L/R), trùng lặp giữ lần xuất hiện đầu), nên mỗi trạng
+    thái nhận đúng nước đi vào như BFS bằng hàng đợi.
+    workers > 1: lớp lớn được chia cho nhiều tiến trình (xem
+    algorithms/layer_pool.py); kết quả vẫn giống hệt.
+    """
+    if np is None:
+        return collect_trace(bfs_search(rows), progress, keep_trace=False)
+
+    level = compile_level(rows)
+    rejected = reject_unsolvable(level)
+    if rejected is not None:
+        rejected["expanded_order"] = []
+        return rejected
+    # Không có sao: cùng BFS hai chiều như bfs_search
+    if not level.stars:
+        return collect_trace(bidirectional_search(level, by_cost=False), progress, keep_trace=False)
+    space = build_state_space(level)
+    bits, mask_all = space.bits, space.mask_all
+    goal_state = space.state(level.goal_cell, level.all_mask)
+    next_idx, next_bit = _layer_tables(space)
+    dtype = next_idx.dtype
+
+    # Thêm 2^k byte khác 0 sau các trạng thái thật: hướng không đi được trỏ tới ô
+    # giả (index = số ô) nên rơi vào vùng này và bị loại cùng lúc với "đã thăm".
+    # Chạy song song thì moves nằm trong bộ nhớ dùng chung với các tiến trình con.
+    if workers > 1:
+        moves = shared_moves(space.size + space.num_masks)
+    else:
+        moves = bytearray(space.size + space.num_masks)
+    moves[space.size:] = b"\x01" * space.num_masks
+    # moves_np dùng chung bộ nhớ với moves (không sao chép)
+    moves_np = np.frombuffer(moves, dtype=np.uint8)
+    start_state = space.state(level.start_cell, 0)
+    moves[start_state] = START_MOVE
+
+    def expand(cur: "np.ndarray") -> Tuple["np.ndarray", "np.ndarray"]:
+        return _expand_layer(cur, moves_np, next_idx, next_bit, bits, mask_all)
+
+    with LayerPool(workers, expand, dtype) as pool:
+        end_state, expanded = _layered_bfs(space, moves, moves_np, pool, start_state, goal_state, progress)
 
     if end_state is None:
-        return {
-            "path": [],
-            "moves": [],
-            "steps": 0,
-            "stars_total": len(stars),
-            "found": False,
-            "expanded_order": expanded_order,
-            "nodes_expanded": len(expanded_order),
-        }
-
-    path, moves = _reconstruct_path(parents, end_state)
-
-    return {
-        "path": path,
-        "moves": moves,
-        "steps": len(moves),
-        "stars_total": len(stars),
-        "found": True,
-        "expanded_order": expanded_order,
-        "nodes_expanded": len(expanded_order),
-    }
+        res = search_outcome(level, [], [], False, nodes_expanded=expanded)
+    else:
+        path, path_moves = space.reconstruct(moves, end_state)
+        res = search_outcome(level, path, path_moves, True, nodes_expanded=expanded)
+    res["expanded_order"] = []
+    return res
+
+
+def _layered_bfs(
+    space: StateSpace,
+    moves,
+    moves_np: "np.ndarray",
+    pool: LayerPool,
+    start_state: int,
+    goal_state: int,
+    progress: ProgressCallback,
+) -> Tuple[Optional[int], int]:
+    """Vòng lặp BFS theo lớp của bfs_collect_all_stars: ghi moves, trả về (trạng thái đích hoặc None, số nút mở rộng)."""
+    neighbors = space.neighbors
+    bits, mask_all = space.bits, space.mask_all
+    dtype = pool.dtype
+
+    frontier: List[int] = [start_state]
+    vec = None  # lớp hiện tại dạng mảng NumPy khi đang ở chế độ vector
+    expanded = 0
+    next_report = PROGRESS_INTERVAL
+    end_state: Optional[int] = None
+
+    while frontier or vec is not None:
+        if moves[goal_state]:
+            # G (đủ sao) nằm trong lớp này: BFS dừng khi lấy nó ra khỏi hàng đợi
+            if vec is not None:
+                expanded += int(np.flatnonzero(vec == goal_state)[0]) + 1
+            else:
+                expanded += frontier.index(goal_state) + 1
+            end_state = goal_state
+            break
+        expanded += len(vec) if vec is not None else len(frontier)
+        if progress is not None and expanded >= next_report:
+            progress(expanded)
+            next_report = (expanded // PROGRESS_INTERVAL + 1) * PROGRESS_INTERVAL
+
+        if vec is None and len(frontier) < VECTOR_MIN_FRONTIER:
+            nxt_layer: List[int] = []
+            for state in frontier:
+                mask = state & mask_all
+                for nshift, code, bit in neighbors[state >> bits]:
+                    nxt = nshift | mask | bit
+                    if moves[nxt]:
+                        continue
+                    moves[nxt] = code | PICKED_STAR if bit and not mask & bit else code
+                    nxt_layer.append(nxt)
+            frontier = nxt_layer
+            if len(frontier) >= VECTOR_MIN_FRONTIER:
+                vec, frontier = np.array(frontier, dtype=dtype), []
+            continue
+
+        cur = vec if vec is not None else np.array(frontier, dtype=dtype)
+        # Chỉ đọc moves; các đoạn của lớp (nếu chia cho nhiều tiến trình) được ghép lại theo thứ tự
+        cand, codes = pool.expand_layer(cur)
+        # Trạng thái được nhiều cha chạm tới: giữ lần xuất hiện đầu (cha lấy ra
+        # khỏi hàng đợi sớm nhất) như BFS hàng đợi. Chọn tường minh thay vì dựa
+        # vào thứ tự ghi khi index lặp (NumPy không quy định thứ tự đó).
+        first = np.sort(np.unique(cand, return_index=True)[1])
+        cand = cand[first]
+        moves_np[cand] = codes[first]
+
+        if cand.size >= VECTOR_MIN_FRONTIER:
+            vec, frontier = cand, []
+        else:
+            vec, frontier = None, cand.tolist()
+    return end_state, expanded
+
+
+def _expand_layer(
+    cur: "np.ndarray",
+    moves_np: "np.ndarray",
+    next_idx: "np.ndarray",
+    next_bit: "np.ndarray",
+    bits: int,
+    mask_all: int,
+) -> Tuple["np.ndarray", "np.ndarray"]:
+    """Ứng viên chưa thăm của lớp cur theo thứ tự (cha, hướng) và mã nước đi vào từng ứng viên."""
+    masks = cur & mask_all
+    nidx = next_idx[cur >> bits]  # (n, 4): index ô kề theo U, D, L, R
+    nbit = next_bit[nidx]
+    # Duỗi theo hàng: thứ tự (cha, hướng) đúng như thứ tự BFS đẩy vào hàng đợi
+    cand = ((nidx << bits) | nbit | masks[:, None]).ravel()
+    pos = np.flatnonzero(moves_np[cand] == 0)
+    cand = cand[pos]
+    # Mã nước đi: hướng = pos % 4, cộng PICKED_STAR nếu cha chưa có sao ở ô đến
+    codes = ((pos & 3) + 1).astype(np.uint8)
+    codes[(nbit.ravel()[pos] & ~masks[pos >> 2]) != 0] |= PICKED_STAR
+    return cand, codes
+
+
+@lru_cache(maxsize=8)
+def _layer_tables(space: StateSpace) -> Tuple["np.ndarray", "np.ndarray"]:
+    """Bảng cho BFS theo lớp: index ô kề theo (index, hướng U/D/L/R) và bit sao theo index.
+
+    Hướng không đi được trỏ tới ô giả có index = số ô (bit sao 0).
+    """
+    n = len(space.cells)
+    # int32 đủ chứa mọi trạng thái (kể cả vùng ô giả) thì dùng để giảm băng thông bộ nhớ
+    dtype = np.int32 if space.size + space.num_masks < 2 ** 31 else np.int64
+    next_idx = np.full((n, 4), n, dtype=dtype)
+    bits = space.bits
+    for i, adj in enumerate(space.neighbors):
+        for nshift, code, _ in adj:
+            next_idx[i, code - 1] = nshift >> bits
+    star_bit = space.level.star_bit
+    next_bit = np.array([star_bit[c] for c in space.cells] + [0], dtype=dtype)
+    return next_idx, next_bit
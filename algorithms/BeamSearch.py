@@ -0,0 +1,123 @@
+"""Beam search: chỉ giữ W trạng thái tốt nhất ở mỗi độ sâu.
+
+Tìm theo lớp như BFS, nhưng sau mỗi lớp chỉ giữ lại W trạng thái có điểm nhỏ
+nhất (W = độ rộng beam). Bộ nhớ và thời gian bị chặn bởi W × độ sâu, không
+phụ thuộc số trạng thái (ô, mask) nên dùng được cho map rất lớn / nhiều sao.
+Đổi lại không đảm bảo tối ưu, và có thể không tìm thấy lời giải dù có (W nhỏ).
+
+Điểm của trạng thái:
+- "mst": g + h với heuristic MST của A* (xem poi_heuristics.build_mst_heuristic)
+- "greedy": h của Greedy (sao gần nhất rồi tới G, xem poi_heuristics.build_greedy_heuristic)
+"""
+from heapq import nsmallest
+from typing import Dict, List, Optional, Tuple
+
+from algorithms.connectivity import reject_unsolvable
+from algorithms.level_kernel import (
+    PICKED_STAR,
+    START_MOVE,
+    ProgressCallback,
+    SearchEvents,
+    build_state_space,
+    collect_trace,
+    compile_level,
+    search_outcome,
+)
+from algorithms.poi_heuristics import build_greedy_heuristic, build_mst_heuristic
+
+Position = Tuple[int, int]
+
+DEFAULT_BEAM_WIDTH = 64
+BEAM_HEURISTICS = ("mst", "greedy")
+
+
+def beam_collect_all_stars_with_trace(
+    rows: List[str],
+    width: int = DEFAULT_BEAM_WIDTH,
+    heuristic: str = "mst",
+    progress: ProgressCallback = None,
+) -> Dict[str, object]:
+    """Tìm đường đi gom hết sao rồi tới G bằng beam search.
+
+    - Input: rows (danh sách chuỗi ký tự của level)
+      width: số trạng thái giữ lại ở mỗi độ sâu (W)
+      heuristic: "mst" (g + h MST) hoặc "greedy" (h của Greedy)
+    - Output: dict như astar_collect_all_stars_with_trace ("cost", "nodes_expanded"
+      dùng cho lịch sử chơi); "found" = False nếu beam cạn trước khi tới G.
+    """
+    return collect_trace(beam_search(rows, width, heuristic), progress)
+
+
+def beam_search(rows: List[str], width: int = DEFAULT_BEAM_WIDTH, heuristic: str = "mst") -> SearchEvents:
+    """Generator của beam search: yield từng ô được mở rộng, return kết quả khi kết thúc."""
+    if width < 1:
+        raise ValueError(f"Độ rộng beam phải >= 1: {width}")
+    if heuristic not in BEAM_HEURISTICS:
+        raise ValueError(f"Heuristic không hỗ trợ: {heuristic!r} (chọn trong {BEAM_HEURISTICS})")
+    level = compile_level(rows)
+    rejected = reject_unsolvable(level)
+    if rejected is not None:
+        return rejected
+    if heuristic == "mst":
+        get_heuristic = build_mst_heuristic(level)
+    else:
+        get_heuristic = build_greedy_heuristic(level)
+    use_g = heuristic == "mst"
+
+    space = build_state_space(level)
+    neighbors = space.neighbors
+    positions = space.positions
+    cells = space.cells
+    costs = space.costs
+    bits, mask_all = space.bits, space.mask_all
+    goal_state = space.state(level.goal_cell, level.all_mask)
+    inf = float('inf')
+
+    # moves chỉ chứa các state đã từng vào beam (dict thay cho bytearray theo
+    # toàn bộ không gian trạng thái) nên bộ nhớ tỉ lệ với W × độ sâu
+    start_state = space.state(level.start_cell, 0)
+    moves: Dict[int, int] = {start_state: START_MOVE}
+    beam: List[Tuple[int, int]] = [(start_state, 0)]  # (state, g)
+
+    end_state: Optional[int] = None
+
+    while beam and end_state is None:
+        # Ứng viên của lớp kế tiếp: state -> (điểm, g, mã nước đi), giữ điểm tốt nhất
+        candidates: Dict[int, Tuple[float, int, int]] = {}
+        for state, g_score in beam:
+            idx = state >> bits
+            yield positions[idx]
+
+            # Điều kiện thắng: đứng ở G và đã gom đủ sao
+            if state == goal_state:
+                end_state = state
+                break
+
+            mask = state & mask_all
+            for nshift, code, bit in neighbors[idx]:
+                nxt = nshift | mask | bit
+                # Đã vào beam ở độ sâu trước: bỏ qua để không đi vòng
+                if nxt in moves:
+                    continue
+                h_score = get_heuristic(cells[nshift >> bits], mask | bit)
+                # Không tới được sao/G còn lại từ state này -> bỏ qua
+                if h_score == inf:
+                    continue
+                tentative_g = g_score + costs[nshift >> bits]
+                score = tentative_g + h_score if use_g else h_score
+                old = candidates.get(nxt)
+                if old is None or score < old[0]:
+                    move = code | PICKED_STAR if bit and not mask & bit else code
+                    candidates[nxt] = (score, tentative_g, move)
+
+        # Giữ W ứng viên có điểm nhỏ nhất (cùng điểm: theo thứ tự sinh ra)
+        beam = []
+        for nxt, (_, tentative_g, move) in nsmallest(width, candidates.items(), key=lambda item: item[1][0]):
+            moves[nxt] = move
+            beam.append((nxt, tentative_g))
+
+    if end_state is None:
+        return search_outcome(level, [], [], False)
+
+    path, path_moves = space.reconstruct(moves, end_state)
+    return search_outcome(level, path, path_moves, True)
@@ -0,0 +1,259 @@
+"""Lập kế hoạch tăng dần bằng D* Lite trên trạng thái (ô, mask).
+
+Khác các thuật toán khác (giải lại từ đầu mỗi lần gọi), planner giữ cây tìm
+kiếm giữa các lần gọi:
+- Tìm ngược từ trạng thái đích (G, đủ sao) nên khi người chơi di chuyển chỉ
+  cần cập nhật km (không tìm lại).
+- Khi một ô đổi tường/đường đi/địa hình, chỉ các trạng thái kề ô đó được tính
+  lại rhs; lượng công việc tỉ lệ với phần bị ảnh hưởng chứ không phải kích thước map.
+Chi phí một bước là chi phí của ô đi vào (TERRAIN_COSTS). Heuristic là khoảng
+cách Manhattan giữa ô bắt đầu và ô của trạng thái (luôn admissible dù map bị
+sửa, vì mỗi bước tốn ít nhất 1).
+"""
+from array import array
+from heapq import heappush, heappop
+from typing import Dict, List, Optional, Tuple
+
+from algorithms.connectivity import label_components
+from algorithms.level_kernel import compile_level, make_result
+
+Position = Tuple[int, int]
+State = Tuple[int, int]  # (cell_id, collected_mask)
+Key = Tuple[float, float]
+
+INF = float('inf')
+
+
+class DStarLitePlanner:
+    """Planner D* Lite cho một level: gọi move_start/set_blocked rồi plan()."""
+
+    def __init__(self, rows: List[str]):
+        level = compile_level(rows)
+        self.level = level
+        self.width, self.height = level.width, level.height
+        # Bản sao riêng vì planner cho phép sửa tường/địa hình
+        self.passable = bytearray(level.passable)
+        self.cost = bytearray(level.cost)
+        self.star_bit = list(level.star_bit)
+        self.num_masks = 1 << len(level.stars)
+        self.goal: State = (level.goal_cell, level.all_mask)
+        self.start: State = (level.start_cell, 0)
+        self.last_start: State = self.start
+        self.km = 0
+
+        self.g: Dict[State, float] = {}
+        self.rhs: Dict[State, float] = {self.goal: 0}
+        self.queue: List[Tuple[float, float, State]] = []
+        self.queued: Dict[State, Key] = {}
+        self._push(self.goal, self._key(self.goal))
+        self.expanded: List[int] = []
+        # Nhãn thành phần liên thông theo tường hiện tại (tính lại khi tường đổi)
+        self.components: Optional[array] = None
+
+    # ---------- lưới ----------
+    def _neighbors(self, cell: int) -> List[Tuple[int, str]]:
+        height, passable = self.height, self.passable
+        x, y = divmod(cell, height)
+        out: List[Tuple[int, str]] = []
+        if y > 0 and passable[cell - 1]:
+            out.append((cell - 1, "U"))
+        if y < height - 1 and passable[cell + 1]:
+            out.append((cell + 1, "D"))
+        if x > 0 and passable[cell - height]:
+            out.append((cell - height, "L"))
+        if x < self.width - 1 and passable[cell + height]:
+            out.append((cell + height, "R"))
+        return out
+
+    def _successors(self, state: State) -> List[Tuple[State, str]]:
+        cell, mask = state
+        if not self.passable[cell]:
+            return []
+        return [((n, mask | self.star_bit[n]), move) for n, move in self._neighbors(cell)]
+
+    def _predecessors(self, state: State) -> List[State]:
+        cell, mask = state
+        if not self.passable[cell]:
+            return []
+        bit = self.star_bit[cell]
+        if bit and not (mask & bit):
+            return []  # Không thể đứng trên ô sao mà chưa nhặt sao đó
+        masks = [mask, mask ^ bit] if bit else [mask]
+        preds: List[State] = []
+        for n, _ in self._neighbors(cell):
+            nbit = self.star_bit[n]
+            for m in masks:
+                if nbit and not (m & nbit):
+                    continue
+                preds.append((n, m))
+        return preds
+
+    # ---------- hàng đợi ưu tiên (xóa lười) ----------
+    def _h(self, state: State) -> int:
+        sx, sy = divmod(self.start[0], self.height)
+        x, y = divmod(state[0], self.height)
+        return abs(sx - x) + abs(sy - y)
+
+    def _key(self, state: State) -> Key:
+        m = min(self.g.get(state, INF), self.rhs.get(state, INF))
+        return (m + self._h(state) + self.km, m)
+
+    def _push(self, state: State, key: Key) -> None:
+        self.queued[state] = key
+        heappush(self.queue, (key[0], key[1], state))
+
+    def _top(self) -> Optional[Tuple[Key, State]]:
+        while self.queue:
+            k1, k2, state = self.queue[0]
+            if self.queued.get(state) == (k1, k2):
+                return (k1, k2), state
+            heappop(self.queue)
+        return None
+
+    def _update_vertex(self, state: State) -> None:
+        consistent = self.g.get(state, INF) == self.rhs.get(state, INF)
+        if not consistent:
+            self._push(state, self._key(state))
+        elif state in self.queued:
+            del self.queued[state]
+
+    def _best_rhs(self, state: State) -> float:
+        best = INF
+        g, cost = self.g, self.cost
+        for succ, _ in self._successors(state):
+            value = cost[succ[0]] + g.get(succ, INF)
+            if value < best:
+                best = value
+        return best
+
+    # ---------- D* Lite ----------
+    def _compute_shortest_path(self) -> None:
+        g, rhs = self.g, self.rhs
+        start = self.start
+        while True:
+            top = self._top()
+            if top is None:
+                break
+            k_old, u = top
+            start_key = self._key(start)
+            if not (k_old < start_key or rhs.get(start, INF) > g.get(start, INF)):
+                break
+            k_new = self._key(u)
+            if k_old < k_new:
+                self._push(u, k_new)
+                continue
+            heappop(self.queue)
+            del self.queued[u]
+            self.expanded.append(u[0])
+            g_u = g.get(u, INF)
+            rhs_u = rhs.get(u, INF)
+            # Mọi cạnh đi vào u tốn chi phí của ô u
+            step = self.cost[u[0]]
+            if g_u > rhs_u:
+                g[u] = rhs_u
+                for s in self._predecessors(u):
+                    if s != self.goal and step + rhs_u < rhs.get(s, INF):
+                        rhs[s] = step + rhs_u
+                    self._update_vertex(s)
+            else:
+                g[u] = INF
+                for s in self._predecessors(u) + [u]:
+                    if s != self.goal and rhs.get(s, INF) == (step + g_u if s != u else rhs_u):
+                        rhs[s] = self._best_rhs(s)
+                    self._update_vertex(s)
+
+    # ---------- API ----------
+    def move_start(self, pos: Position, mask: int) -> None:
+        """Cập nhật vị trí người chơi và mask các sao (theo thứ tự sao của level) đã nhặt."""
+        new_start: State = (pos[0] * self.height + pos[1], mask)
+        if new_start == self.start:
+            return
+        self.start = new_start
+        self.km += self._h(self.last_start)
+        self.last_start = new_start
+
+    def set_blocked(self, x: int, y: int, blocked: bool) -> None:
+        """Đổi một ô thành tường/đường đi (chi phí 1) và sửa lại các trạng thái bị ảnh hưởng."""
+        cell = x * self.height + y
+        if bool(self.passable[cell]) != blocked:
+            return
+        self.set_cell_cost(x, y, 0 if blocked else 1)
+
+    def set_cell_cost(self, x: int, y: int, cost: int) -> None:
+        """Đổi chi phí đi vào một ô (0 = tường, xem tile_cost) và sửa các trạng thái bị ảnh hưởng."""
+        cell = x * self.height + y
+        if self.cost[cell] == cost and bool(self.passable[cell]) == bool(cost):
+            return
+        if bool(self.passable[cell]) != bool(cost):
+            self.components = None
+        self.passable[cell] = 1 if cost else 0
+        self.cost[cell] = cost
+
+        affected: List[State] = []
+        # Trạng thái của chính ô bị đổi (mọi mask hợp lệ)
+        bit = self.star_bit[cell]
+        for mask in range(self.num_masks):
+            if not bit or mask & bit:
+                affected.append((cell, mask))
+        # Trạng thái đã chạm tới của các ô kề: cạnh đi vào ô bị đổi thay đổi chi phí
+        for n, _ in self._neighbors(cell):
+            for mask in range(self.num_masks):
+                state = (n, mask)
+                if state in self.rhs or state in self.g:
+                    affected.append(state)
+
+        for state in affected:
+            if state != self.goal:
+                self.rhs[state] = self._best_rhs(state)
+            self._update_vertex(state)
+
+    def unreachable_pois(self) -> List[Position]:
+        """G và các sao chưa nhặt không cùng thành phần liên thông với vị trí hiện tại."""
+        if self.components is None:
+            self.components = label_components(self.width, self.height, self.passable)
+        labels, level = self.components, self.level
+        cell, mask = self.start
+        start_label = labels[cell]
+        pois = [level.goal_cell] + [c for i, c in enumerate(level.star_cells) if not mask & (1 << i)]
+        return [level.position(c) for c in pois if labels[c] != start_label]
+
+    def plan(self) -> Dict[str, object]:
+        """Sửa cây tìm kiếm cho trạng thái hiện tại rồi trích đường đi.
+
+        "expanded_order"/"nodes_expanded" chỉ tính các trạng thái mở rộng trong
+        lần gọi này (công việc tăng dần), không phải cả lịch sử. Nếu sao/G còn
+        lại bị tường ngăn cách thì trả về ngay found = False kèm "unreachable"
+        (cây tìm kiếm giữ nguyên, tường mở lại thì tiếp tục sửa tăng dần).
+        """
+        self.expanded = []
+        unreachable = self.unreachable_pois()
+        if unreachable:
+            res = make_result(self.level, [], [], False, [])
+            res["unreachable"] = unreachable
+            return res
+        self._compute_shortest_path()
+        level = self.level
+        expanded_order = [level.position(c) for c in self.expanded]
+        if self.g.get(self.start, INF) == INF and self.rhs.get(self.start, INF) == INF:
+            return make_result(level, [], [], False, expanded_order)
+
+        path: List[Position] = [level.position(self.start[0])]
+        moves: List[str] = []
+        cur = self.start
+        limit = level.size * self.num_masks
+        while cur != self.goal and len(moves) <= limit:
+            best: Optional[Tuple[State, str]] = None
+            best_cost = INF
+            for succ, move in self._successors(cur):
+                cost = self.cost[succ[0]] + self.g.get(succ, INF)
+                if cost < best_cost:
+                    best, best_cost = (succ, move), cost
+            if best is None:
+                return make_result(level, [], [], False, expanded_order)
+            cur, move = best
+            path.append(level.position(cur[0]))
+            moves.append(move)
+        res = make_result(level, path, moves, True, expanded_order)
+        # Chi phí theo địa hình hiện tại của planner (level gốc có thể đã bị sửa)
+        res["cost"] = sum(self.cost[x * self.height + y] for x, y in path[1:])
+        return res
@@ -1,72 +1,23 @@
-from collections import deque
-from typing import Deque, Dict, Iterable, List, Optional, Set, Tuple
+from typing import Dict, List, Optional, Tuple
 from heapq import heappush, heappop
 
-Position = Tuple[int, int]
-State = Tuple[int, int, int]  # (x, y, collected_mask)
+from algorithms.connectivity import reject_unsolvable
+from algorithms.level_kernel import (
+    PICKED_STAR,
+    START_MOVE,
+    ProgressCallback,
+    SearchEvents,
+    build_state_space,
+    collect_trace,
+    compile_level,
+    search_outcome,
+)
+from algorithms.poi_heuristics import build_greedy_heuristic
 
-def _parse_level(rows: List[str]) -> Tuple[Position, Position, List[Position], int, int]:
-    """Trích xuất S, G, danh sách sao từ ma trận ký tự.
+Position = Tuple[int, int]
 
-    Ký hiệu lưới:
-    - "1": tường (không đi xuyên)
-    - "S": vị trí bắt đầu
-    - "G": cửa/đích
-    - "*": ngôi sao
 
-    Trả về: (start, goal, stars, width, height)
-    """
-    height = len(rows)
-    width = len(rows[0]) if height > 0 else 0
-    start: Optional[Position] = None
-    goal: Optional[Position] = None
-    stars: List[Position] = []
-
-    for y in range(height):
-        for x in range(width):
-            ch = rows[y][x]
-            if ch == "S":
-                start = (x, y)
-            elif ch == "G":
-                goal = (x, y)
-            elif ch == "*":
-                stars.append((x, y))
-
-    if start is None or goal is None:
-        raise ValueError("Level không hợp lệ: thiếu S hoặc G")
-
-    return start, goal, stars, width, height
-
-def _is_blocked(rows: List[str], x: int, y: int, width: int, height: int) -> bool:
-    if x < 0 or y < 0 or x >= width or y >= height:
-        return True
-    return rows[y][x] == "1"
-
-def _reconstruct_path(
-    parents: Dict[State, Tuple[Optional[State], str]],
-    end_state: State,
-) -> Tuple[List[Position], List[str]]:
-    """Lần ngược từ end_state để tạo path (danh sách tọa độ) và moves (UDLR)."""
-    path_rev: List[Position] = []
-    moves_rev: List[str] = []
-    cur: Optional[State] = end_state
-    while cur is not None:
-        (x, y, _) = cur
-        path_rev.append((x, y))
-        prev, move = parents[cur]
-        if move:
-            moves_rev.append(move)
-        cur = prev
-
-    path_rev.reverse()
-    moves_rev.reverse()
-    return path_rev, moves_rev
-
-def _manhattan_distance(p1: Position, p2: Position) -> int:
-    """Tính khoảng cách Manhattan giữa hai điểm."""
-    return abs(p1[0] - p2[0]) + abs(p1[1] - p2[1])
-
-def greedy_collect_all_stars_with_trace(rows: List[str]) -> Dict[str, object]:
+def greedy_collect_all_stars_with_trace(rows: List[str], progress: ProgressCallback = None) -> Dict[str, object]:
     """Tìm đường đi bằng Greedy Best-First Search: thu thập hết sao rồi tới cửa (G).
 
     - Input: rows (danh sách chuỗi ký tự của level)
@@ -80,90 +31,59 @@ def greedy_collect_all_stars_with_trace(rows: List[str]) -> Dict[str, object]:
           "expanded_order": List[(x,y)]  # thứ tự các ô được mở rộng
         }
     """
-    start, goal, stars, width, height = _parse_level(rows)
-
-    # Ánh xạ vị trí sao -> bit index
-    star_index: Dict[Position, int] = {pos: i for i, pos in enumerate(stars)}
-    all_mask = (1 << len(stars)) - 1
-
-    # Nếu không có sao, chỉ cần đi tới G
-    start_mask = 0
+    return collect_trace(greedy_search(rows), progress)
+
+
+def greedy_search(rows: List[str]) -> SearchEvents:
+    """Generator của Greedy Best-First Search: yield từng ô được mở rộng, return kết quả khi kết thúc."""
+    level = compile_level(rows)
+    rejected = reject_unsolvable(level)
+    if rejected is not None:
+        return rejected
+    space = build_state_space(level)
+    neighbors = space.neighbors
+    positions = space.positions
+    cells = space.cells
+    bits, mask_all = space.bits, space.mask_all
+    get_heuristic = build_greedy_heuristic(level)
+    goal_state = space.state(level.goal_cell, level.all_mask)
 
     # Hàng đợi ưu tiên cho Greedy (min-heap): (h_score, state)
-    queue: List[Tuple[int, State]] = []
-    parents: Dict[State, Tuple[Optional[State], str]] = {}
-    visited: Set[State] = set()
-    expanded_order: List[Position] = []
-
-    start_state: State = (start[0], start[1], start_mask)
-    # Heuristic: khoảng cách Manhattan đến G + số sao chưa thu thập
-    h_score = _manhattan_distance(start, goal) + len(stars)
-    heappush(queue, (h_score, start_state))
-    parents[start_state] = (None, "")
-    visited.add(start_state)
+    queue: List[Tuple[int, int]] = []
+    # moves[state] != 0: đã thăm; giá trị là nước đi vào state (thay cho dict parents)
+    moves = space.new_moves()
 
-    directions: List[Tuple[int, int, str]] = [
-        (0, -1, "U"),
-        (0, 1, "D"),
-        (-1, 0, "L"),
-        (1, 0, "R"),
-    ]
+    start_state = space.state(level.start_cell, 0)
+    h_score = get_heuristic(level.start_cell, 0)
+    heappush(queue, (h_score, start_state))
+    moves[start_state] = START_MOVE
 
-    end_state: Optional[State] = None
+    end_state: Optional[int] = None
 
     while queue:
-        _, (x, y, mask) = heappop(queue)
-        expanded_order.append((x, y))
+        _, state = heappop(queue)
+        idx = state >> bits
+        yield positions[idx]
 
         # Điều kiện thắng: đứng ở G và đã gom đủ sao
-        if (x, y) == goal and mask == all_mask:
-            end_state = (x, y, mask)
+        if state == goal_state:
+            end_state = state
             break
 
-        for dx, dy, move in directions:
-            nx, ny = x + dx, y + dy
-            if _is_blocked(rows, nx, ny, width, height):
-                continue
-
-            next_mask = mask
-            pos = (nx, ny)
-            if pos in star_index:
-                next_mask = mask | (1 << star_index[pos])
-
-            nxt: State = (nx, ny, next_mask)
-            if nxt in visited:
+        mask = state & mask_all
+        for nshift, code, bit in neighbors[idx]:
+            next_mask = mask | bit
+            nxt = nshift | next_mask
+            if moves[nxt]:
                 continue
 
             # Heuristic Greedy ưu tiên tiến về ngôi sao gần nhất, rồi tới G
-            remaining_stars = [s for s in stars if not (next_mask & (1 << star_index[s]))]
-            if remaining_stars:
-                nearest_star_dist = min(_manhattan_distance((nx, ny), s) for s in remaining_stars)
-                h_score = nearest_star_dist + _manhattan_distance((nx, ny), goal)
-            else:
-                h_score = _manhattan_distance((nx, ny), goal)
-
+            h_score = get_heuristic(cells[nshift >> bits], next_mask)
             heappush(queue, (h_score, nxt))
-            visited.add(nxt)
-            parents[nxt] = ((x, y, mask), move)
+            moves[nxt] = code | PICKED_STAR if bit and not mask & bit else code
 
     if end_state is None:
-        return {
-            "path": [],
-            "moves": [],
-            "steps": 0,
-            "stars_total": len(stars),
-            "found": False,
-            "expanded_order": expanded_order,
-            "nodes_expanded": len(expanded_order),
-        }
+        return search_outcome(level, [], [], False)
 
-    path, moves = _reconstruct_path(parents, end_state)
-    return {
-        "path": path,
-        "moves": moves,
-        "steps": len(moves),
-        "stars_total": len(stars),
-        "found": True,
-        "expanded_order": expanded_order,
-        "nodes_expanded": len(expanded_order),
-    }
\ No newline at end of file
+    path, path_moves = space.reconstruct(moves, end_state)
+    return search_outcome(level, path, path_moves, True)
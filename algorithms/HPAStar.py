@@ -0,0 +1,665 @@
+"""Tìm đường phân cấp (HPA*) cho map rất lớn.
+
+Trên map hàng nghìn ô mỗi chiều, tìm kiếm theo từng ô (kể cả với heuristic
+tốt) vẫn phải chạm tới hàng triệu ô. HPA* chia lưới thành các cụm vuông
+cluster_size x cluster_size và dựng một đồ thị trừu tượng nhỏ hơn nhiều:
+- cổng (entrance): trên mỗi cạnh chung của hai cụm kề nhau, mỗi đoạn ô liên
+  tiếp đi được ở cả hai phía cho một cặp ô chuyển cụm ở giữa đoạn (đoạn dài
+  từ ENTRANCE_SPLIT ô thì hai cặp ở hai đầu);
+- cạnh ngoài cụm: giữa hai ô của một cặp chuyển cụm (chi phí = cost ô đi vào);
+- cạnh trong cụm: chi phí nhỏ nhất giữa hai cổng của cùng một cụm khi chỉ đi
+  bên trong cụm đó (Dijkstra giới hạn trong cụm).
+Truy vấn chèn hai đầu vào đồ thị (nối với các cổng trong cụm của chúng), tìm
+A* trên đồ thị trừu tượng rồi chỉ làm mịn (tìm lại theo ô, trong từng cụm)
+các chặng mà lời giải thực sự đi qua. Đường đi gần tối ưu: chỉ sai khác do đi
+qua cổng cố định thay vì một ô bất kỳ trên cạnh cụm.
+
+Cạnh trong cụm được tính khi tìm kiếm chạm tới cụm lần đầu rồi giữ lại, nên
+map lớn không phải trả trước chi phí cho các cụm không bao giờ đi qua. Đồ thị
+được cache theo hash của địa hình (tường + chi phí ô, không gồm S/G/sao) trong
+bộ nhớ và trên đĩa; editor sửa một ô chỉ dựng lại các cụm bị ảnh hưởng
+(update_abstraction) thay vì cả map.
+"""
+import hashlib
+import json
+import os
+import sys
+import zlib
+from array import array
+from collections import OrderedDict
+from heapq import heappop, heappush
+from typing import Dict, Generator, Iterable, List, Optional, Sequence, Tuple
+
+from algorithms.HeldKarp import _solve_tour
+from algorithms.connectivity import reject_unsolvable
+from algorithms.level_kernel import (
+    CompiledLevel,
+    ProgressCallback,
+    SearchEvents,
+    collect_trace,
+    compile_level,
+    search_outcome,
+    trace_cells,
+)
+from core.paths import LEVELS_DIR, atomic_write
+
+try:
+    import numpy as np
+except ImportError:  # NumPy là tùy chọn, thiếu thì tính cạnh trong cụm bằng BFS từng cổng
+    np = None
+
+Position = Tuple[int, int]
+
+# Cạnh của một cụm (ô): cụm lớn thì đồ thị trừu tượng nhỏ nhưng tính mỗi cụm lâu hơn
+DEFAULT_CLUSTER_SIZE = 32
+
+# Đoạn cổng dài từ ngần này ô dùng hai cặp chuyển cụm ở hai đầu thay vì một ở giữa
+ENTRANCE_SPLIT = 6
+
+# Thư mục lưu đồ thị trừu tượng (cạnh các file level); None = không ghi đĩa
+HPA_DIR = os.path.join(LEVELS_DIR, ".hpa")
+
+# Tăng khi cách đặt cổng hoặc định dạng file thay đổi để bỏ đồ thị cũ
+HPA_VERSION = 1
+
+# Số đồ thị trừu tượng giữ trong bộ nhớ
+MAX_CACHED_ABSTRACTIONS = 4
+
+# Cạnh chung giữa cụm c và cụm bên phải / bên dưới nó
+RIGHT, DOWN = 0, 1
+
+# Cạnh của đồ thị: (ô đích, chi phí)
+Edge = Tuple[int, int]
+
+
+def hpa_collect_all_stars_with_trace(
+    rows: List[str],
+    cluster_size: int = DEFAULT_CLUSTER_SIZE,
+    progress: ProgressCallback = None,
+) -> Dict[str, object]:
+    """Tìm đường gom hết sao rồi tới G bằng HPA* (gần tối ưu) cho map rất lớn.
+
+    - Input: rows (danh sách chuỗi ký tự của level)
+      cluster_size: cạnh của một cụm (ô)
+    - Output: dict như các thuật toán khác; "expanded_order" là các cổng được
+      mở rộng trên đồ thị trừu tượng (qua mọi cặp POI cần tính khoảng cách).
+    Đồ thị trừu tượng được ghi ra HPA_DIR sau khi giải xong.
+    """
+    res = collect_trace(hpa_search(rows, cluster_size), progress)
+    persist_abstraction(rows, cluster_size)
+    return res
+
+
+def hpa_search(rows: List[str], cluster_size: int = DEFAULT_CLUSTER_SIZE) -> SearchEvents:
+    """Generator của HPA*: yield từng cổng được mở rộng, return kết quả khi kết thúc.
+
+    Khoảng cách giữa các POI (S, G, sao) lấy từ A* trên đồ thị trừu tượng, thứ
+    tự gom sao giải bằng Held-Karp như HeldKarp.py; chỉ các chặng của thứ tự
+    đã chọn được làm mịn thành đường đi theo ô. Generator không ghi đĩa: người
+    gọi ghi đồ thị một lần sau khi giải (persist_abstraction).
+    """
+    level = compile_level(rows)
+    rejected = reject_unsolvable(level)
+    if rejected is not None:
+        return rejected
+    abstraction = get_abstraction(level, cluster_size)
+    poi_cells = [level.start_cell, level.goal_cell] + level.star_cells
+    stars_idx = range(2, len(poi_cells))
+
+    # Các cặp POI cần khoảng cách (chi phí ô S/G/sao như nhau nên j -> i = i -> j đảo ngược)
+    if stars_idx:
+        pairs = [(0, p) for p in stars_idx] + [(p, 1) for p in stars_idx]
+        pairs += [(p, q) for p in stars_idx for q in stars_idx if p < q]
+    else:
+        pairs = [(0, 1)]
+    legs: Dict[Tuple[int, int], Tuple[int, List[int]]] = {}
+    for i, j in pairs:
+        leg = yield from abstraction.find_path(poi_cells[i], poi_cells[j])
+        if leg is None:
+            return search_outcome(level, [], [], False)
+        legs[(i, j)] = leg
+        legs[(j, i)] = (leg[0], leg[1][::-1])
+
+    order: List[int] = []
+    if stars_idx:
+        from_start = [legs[(0, p)][0] for p in stars_idx]
+        between = [[legs[(p, q)][0] if p != q else 0 for q in stars_idx] for p in stars_idx]
+        to_goal = [legs[(p, 1)][0] for p in stars_idx]
+        order, _, _ = _solve_tour(from_start, between, to_goal)
+
+    # Chỉ làm mịn các chặng của thứ tự ghé đã chọn
+    poi_seq = [0] + [2 + i for i in order] + [1]
+    cells = [level.start_cell]
+    for src, dst in zip(poi_seq, poi_seq[1:]):
+        cells.extend(abstraction.refine(legs[(src, dst)][1])[1:])
+    path, moves = trace_cells(level, cells)
+    return search_outcome(level, path, moves, True)
+
+
+class ClusterAbstraction:
+    """Đồ thị trừu tượng HPA* của một địa hình: cổng giữa các cụm và cạnh trong cụm."""
+
+    def __init__(
+        self,
+        level: CompiledLevel,
+        cluster_size: int = DEFAULT_CLUSTER_SIZE,
+        borders: Optional[Dict[Tuple[int, int], Tuple[int, ...]]] = None,
+    ):
+        self.level = level
+        self.cluster_size = cluster_size
+        self.columns = -(-level.width // cluster_size)
+        self.rows = -(-level.height // cluster_size)
+        # borders[(c, RIGHT|DOWN)] = (a0, b0, a1, b1, ...): a trong cụm c, b trong cụm kề
+        self.borders: Dict[Tuple[int, int], Tuple[int, ...]] = {}
+        # intra[c][cổng] = các cạnh tới cổng khác của cụm c (chỉ các cụm đã tính)
+        self.intra: Dict[int, Dict[int, Tuple[Edge, ...]]] = {}
+        self._links: Dict[int, Dict[int, Tuple[Edge, ...]]] = {}
+        self._adjacent: Dict[int, Tuple[Edge, ...]] = {}  # cổng -> mọi cạnh ra (xem gate_edges)
+        self.dirty = False  # có cụm mới tính từ lần ghi đĩa gần nhất
+        if borders is not None:
+            self.borders = borders
+            return
+        for cluster in range(self.columns * self.rows):
+            for side in (RIGHT, DOWN):
+                self._build_border(cluster, side)
+
+    def cluster_of(self, cell: int) -> int:
+        x, y = divmod(cell, self.level.height)
+        return (x // self.cluster_size) * self.rows + y // self.cluster_size
+
+    def bounds(self, cluster: int) -> Tuple[int, int, int, int]:
+        """(x0, x1, y0, y1) của cụm, nửa mở."""
+        cx, cy = divmod(cluster, self.rows)
+        size = self.cluster_size
+        x0, y0 = cx * size, cy * size
+        return x0, min(x0 + size, self.level.width), y0, min(y0 + size, self.level.height)
+
+    def _build_border(self, cluster: int, side: int) -> None:
+        """Đặt cổng trên cạnh chung giữa cụm và cụm kề bên phải/bên dưới (nếu có)."""
+        cx, cy = divmod(cluster, self.rows)
+        key = (cluster, side)
+        self.borders.pop(key, None)
+        if (side == RIGHT and cx + 1 >= self.columns) or (side == DOWN and cy + 1 >= self.rows):
+            return
+        x0, x1, y0, y1 = self.bounds(cluster)
+        height, passable = self.level.height, self.level.passable
+        if side == RIGHT:
+            # Cột cuối của cụm và cột đầu của cụm bên phải
+            pairs = [((x1 - 1) * height + y, x1 * height + y) for y in range(y0, y1)]
+        else:
+            pairs = [(x * height + y1 - 1, x * height + y1) for x in range(x0, x1)]
+
+        entrances: List[int] = []
+        run: List[Tuple[int, int]] = []
+        for a, b in pairs + [(-1, -1)]:
+            if a >= 0 and passable[a] and passable[b]:
+                run.append((a, b))
+                continue
+            if len(run) >= ENTRANCE_SPLIT:
+                entrances.extend(run[0] + run[-1])
+            elif run:
+                entrances.extend(run[len(run) // 2])
+            run = []
+        if entrances:
+            self.borders[key] = tuple(entrances)
+
+    def links(self, cluster: int) -> Dict[int, Tuple[Edge, ...]]:
+        """Các cổng của cụm và cạnh chuyển cụm của từng cổng."""
+        links = self._links.get(cluster)
+        if links is not None:
+            return links
+        cost = self.level.cost
+        found: Dict[int, List[Edge]] = {}
+        # Cạnh phải/dưới của cụm: cổng là a; cạnh trái/trên (của cụm kề): cổng là b
+        for key, own in (
+            ((cluster, RIGHT), 0),
+            ((cluster, DOWN), 0),
+            ((cluster - self.rows, RIGHT), 1),
+            ((cluster - 1, DOWN), 1),
+        ):
+            # Cụm ở mép map không có cạnh chung tương ứng (không có khóa trong borders)
+            flat = self.borders.get(key)
+            if flat is None:
+                continue
+            for i in range(0, len(flat), 2):
+                gate, other = flat[i + own], flat[i + 1 - own]
+                found.setdefault(gate, []).append((other, cost[other]))
+        links = {gate: tuple(edges) for gate, edges in found.items()}
+        self._links[cluster] = links
+        return links
+
+    def edges_within(self, cluster: int) -> Dict[int, Tuple[Edge, ...]]:
+        """Cạnh trong cụm giữa các cổng (tính ở lần gọi đầu rồi giữ lại).
+
+        Chi phí j -> i suy từ đường i -> j đi ngược (đổi ô đầu/cuối được tính
+        chi phí), nên cổng thứ i chỉ cần tìm tới các cổng sau nó.
+        """
+        edges = self.intra.get(cluster)
+        if edges is not None:
+            return edges
+        cost = self.level.cost
+        gates = list(self.links(cluster))
+        found: Dict[int, List[Edge]] = {gate: [] for gate in gates}
+        if np is not None and not self.level.weighted and 1 < len(gates) <= 64:
+            table = self._gate_distances(cluster, gates)
+            for i, gate in enumerate(gates):
+                found[gate] = [(other, int(d)) for other, d in zip(gates, table[i]) if d > 0]
+        else:
+            graph = self.cluster_graph(cluster)
+            for i, gate in enumerate(gates[:-1]):
+                dist, _ = self.search_cluster(gate, graph, set(gates[i + 1:]))
+                for other in gates[i + 1:]:
+                    d = dist.get(other)
+                    if d is not None:
+                        found[gate].append((other, d))
+                        found[other].append((gate, d - cost[other] + cost[gate]))
+        edges = {gate: tuple(sorted(found[gate])) for gate in gates}
+        self.intra[cluster] = edges
+        self.dirty = True
+        return edges
+
+    def _gate_distances(self, cluster: int, gates: List[int]) -> "np.ndarray":
+        """Số bước giữa mọi cặp cổng trong cụm (level không có địa hình), -1 nếu không tới được.
+
+        BFS từ mọi cổng chạy cùng lúc: mỗi ô giữ một mặt nạ bit (bit i = BFS từ
+        cổng i đã tới), mỗi lớp là vài phép dịch và OR trên mảng của cụm thay vì
+        một vòng Python cho từng ô của từng cổng. Cần tối đa 64 cổng.
+        """
+        level = self.level
+        x0, x1, y0, y1 = self.bounds(cluster)
+        grid = np.frombuffer(level.passable, dtype=np.uint8).reshape(level.width, level.height)[x0:x1, y0:y1] != 0
+        count = len(gates)
+        gx = np.array([gate // level.height - x0 for gate in gates])
+        gy = np.array([gate % level.height - y0 for gate in gates])
+        bits = np.left_shift(np.uint64(1), np.arange(count, dtype=np.uint64))
+        open_cells = np.where(grid, ~np.uint64(0), np.uint64(0))
+        frontier = np.zeros(grid.shape, dtype=np.uint64)
+        frontier[gx, gy] = bits
+        visited = frontier.copy()
+        # table[i][j]: khoảng cách từ cổng i tới cổng j
+        table = np.full((count, count), -1, dtype=np.int32)
+        np.fill_diagonal(table, 0)
+        full = (1 << count) - 1
+        steps = 0
+        while frontier.any():
+            steps += 1
+            reached = np.zeros_like(frontier)
+            reached[1:] |= frontier[:-1]
+            reached[:-1] |= frontier[1:]
+            reached[:, 1:] |= frontier[:, :-1]
+            reached[:, :-1] |= frontier[:, 1:]
+            reached &= open_cells
+            reached &= ~visited
+            visited |= reached
+            hits = reached[gx, gy]
+            if hits.any():
+                # Cột j: các cổng i vừa tới cổng j ở lớp này
+                table[(hits[None, :] & bits[:, None]) != 0] = steps
+                if all(int(v) == full for v in visited[gx, gy]):
+                    break
+            frontier = reached
+        return table
+
+    def gate_edges(self, gate: int) -> Tuple[Edge, ...]:
+        """Mọi cạnh ra từ một cổng: trong cụm và chuyển cụm."""
+        edges = self._adjacent.get(gate)
+        if edges is None:
+            cluster = self.cluster_of(gate)
+            within, links = self.edges_within(cluster), self.links(cluster)
+            for other, transitions in links.items():
+                self._adjacent[other] = within.get(other, ()) + transitions
+            edges = self._adjacent.get(gate, ())
+        return edges
+
+    def cluster_graph(self, cluster: int) -> Dict[int, Tuple[int, ...]]:
+        """Bảng kề chỉ gồm các ô đi được trong cụm và ô kề cũng nằm trong cụm."""
+        x0, x1, y0, y1 = self.bounds(cluster)
+        height = self.level.height
+        lo, hi = x0 * height, x1 * height
+        neighbors, passable = self.level.neighbors, self.level.passable
+        graph: Dict[int, Tuple[int, ...]] = {}
+        for x in range(x0, x1):
+            for cell in range(x * height + y0, x * height + y1):
+                if passable[cell]:
+                    graph[cell] = tuple(
+                        ncell for ncell, _ in neighbors[cell] if lo <= ncell < hi and y0 <= ncell % height < y1
+                    )
+        return graph
+
+    def search_cluster(
+        self,
+        source: int,
+        graph: Dict[int, Tuple[int, ...]],
+        targets: Optional[set] = None,
+    ) -> Tuple[Dict[int, int], Dict[int, int]]:
+        """Tìm từ source chỉ đi trong cụm (graph từ cluster_graph): (chi phí tới từng ô, ô cha).
+
+        Dừng sớm khi mọi ô trong targets đã có chi phí cuối cùng (nếu có).
+        Level không có địa hình dùng BFS theo lớp, ngược lại Dijkstra.
+        """
+        dist = {source: 0}
+        parent = {source: -1}
+        remaining = set(targets) if targets else None
+        if remaining is not None:
+            remaining.discard(source)
+            if not remaining:
+                return dist, parent
+        if not self.level.weighted:
+            frontier = [source]
+            d = 0
+            while frontier:
+                d += 1
+                nxt = []
+                for cell in frontier:
+                    for ncell in graph[cell]:
+                        if ncell in dist:
+                            continue
+                        dist[ncell] = d
+                        parent[ncell] = cell
+                        nxt.append(ncell)
+                        if remaining is not None and ncell in remaining:
+                            remaining.discard(ncell)
+                            if not remaining:
+                                return dist, parent
+                frontier = nxt
+            return dist, parent
+
+        cost = self.level.cost
+        heap = [(0, source)]
+        while heap:
+            d, cell = heappop(heap)
+            if d > dist[cell]:
+                continue
+            if remaining is not None and cell in remaining:
+                remaining.discard(cell)
+                if not remaining:
+                    break
+            for ncell in graph[cell]:
+                nd = d + cost[ncell]
+                if nd < dist.get(ncell, nd + 1):
+                    dist[ncell] = nd
+                    parent[ncell] = cell
+                    heappush(heap, (nd, ncell))
+        return dist, parent
+
+    def update_cells(self, level: CompiledLevel, cells: Iterable[int]) -> None:
+        """Chuyển sang level mới chỉ khác địa hình tại các ô cells: dựng lại cục bộ.
+
+        Cổng được đặt lại trên các cạnh cụm chứa ô bị sửa; cạnh trong cụm được
+        tính lại cho cụm chứa ô đó và các cụm có cổng vừa đổi (chỉ những cụm đã
+        được tính trước đó).
+        """
+        self.level = level
+        height = level.height
+        stale = set()
+        for cell in cells:
+            cluster = self.cluster_of(cell)
+            stale.add(cluster)
+            x, y = divmod(cell, height)
+            x0, x1, y0, y1 = self.bounds(cluster)
+            touched = []
+            if x == x1 - 1:
+                touched.append((cluster, RIGHT, cluster + self.rows))
+            if x == x0 and x0 > 0:
+                touched.append((cluster - self.rows, RIGHT, cluster - self.rows))
+            if y == y1 - 1:
+                touched.append((cluster, DOWN, cluster + 1))
+            if y == y0 and y0 > 0:
+                touched.append((cluster - 1, DOWN, cluster - 1))
+            for owner, side, other in touched:
+                self._build_border(owner, side)
+                stale.add(other)
+        recompute = [cluster for cluster in stale if cluster in self.intra]
+        for cluster in stale:
+            for gate in self._links.get(cluster, ()):
+                self._adjacent.pop(gate, None)
+            self._links.pop(cluster, None)
+            self.intra.pop(cluster, None)
+        for cluster in recompute:
+            self.edges_within(cluster)
+        self.dirty = True
+
+    def find_path(self, source: int, target: int) -> Generator[Position, None, Optional[Tuple[int, List[int]]]]:
+        """A* trên đồ thị trừu tượng từ ô source tới ô target.
+
+        yield các nút (cổng) được mở rộng; return (chi phí, dãy nút từ source
+        tới target) hoặc None nếu không có đường.
+        """
+        level = self.level
+        height, cost = level.height, level.cost
+        tx, ty = divmod(target, height)
+        source_cluster, target_cluster = self.cluster_of(source), self.cluster_of(target)
+
+        # Chèn hai đầu: nối source tới các cổng cụm của nó, các cổng cụm của target tới target
+        dist, _ = self.search_cluster(source, self.cluster_graph(source_cluster))
+        start_edges = [(gate, dist[gate]) for gate in self.links(source_cluster) if gate in dist and gate != source]
+        if source_cluster == target_cluster and target in dist:
+            start_edges.append((target, dist[target]))
+        dist, _ = self.search_cluster(target, self.cluster_graph(target_cluster))
+        # Đi ngược một đường trong cụm: đổi ô đầu/cuối được tính chi phí
+        into_target = {
+            gate: dist[gate] - cost[gate] + cost[target]
+            for gate in self.links(target_cluster)
+            if gate in dist
+        }
+
+        g_scores = {source: 0}
+        parents = {source: -1}
+        closed = set()
+        sx, sy = divmod(source, height)
+        heap = [(abs(sx - tx) + abs(sy - ty), 0, source)]
+        while heap:
+            _, _, node = heappop(heap)
+            if node in closed:
+                continue
+            closed.add(node)
+            yield divmod(node, height)
+            g_node = g_scores[node]
+            if node == target:
+                nodes = []
+                while node != -1:
+                    nodes.append(node)
+                    node = parents[node]
+                nodes.reverse()
+                return g_node, nodes
+
+            if node == source:
+                edges = start_edges + list(self.links(source_cluster).get(node, ()))
+            elif node in into_target:
+                edges = self.gate_edges(node) + ((target, into_target[node]),)
+            else:
+                edges = self.gate_edges(node)
+
+            for nxt, step in edges:
+                g_next = g_node + step
+                if nxt in closed or g_next >= g_scores.get(nxt, g_next + 1):
+                    continue
+                g_scores[nxt] = g_next
+                parents[nxt] = node
+                nx, ny = divmod(nxt, height)
+                # Cùng f: ưu tiên g lớn (gần đích hơn)
+                heappush(heap, (g_next + abs(nx - tx) + abs(ny - ty), -g_next, nxt))
+        return None
+
+    def refine(self, nodes: Sequence[int]) -> List[int]:
+        """Làm mịn dãy nút trừu tượng thành dãy cell id liền kề."""
+        cells = [nodes[0]]
+        for a, b in zip(nodes, nodes[1:]):
+            cluster = self.cluster_of(a)
+            if cluster != self.cluster_of(b):
+                # Cạnh chuyển cụm: hai ô kề nhau
+                cells.append(b)
+                continue
+            _, parent = self.search_cluster(a, self.cluster_graph(cluster), {b})
+            leg = []
+            cell = b
+            while cell != a:
+                leg.append(cell)
+                cell = parent[cell]
+            cells.extend(reversed(leg))
+        return cells
+
+
+def abstraction_key(level: CompiledLevel, cluster_size: int) -> str:
+    """Hash của địa hình (kích thước, ô đi được, chi phí ô) và kích thước cụm."""
+    digest = hashlib.sha256(f"{HPA_VERSION}:{level.width}x{level.height}:{cluster_size}:".encode("ascii"))
+    digest.update(level.passable)
+    digest.update(level.cost)
+    return digest.hexdigest()
+
+
+# Đồ thị đã dựng theo abstraction_key (mới dùng nhất ở cuối)
+_ABSTRACTIONS: "OrderedDict[str, ClusterAbstraction]" = OrderedDict()
+
+
+def get_abstraction(
+    level: CompiledLevel,
+    cluster_size: int = DEFAULT_CLUSTER_SIZE,
+    cache_dir: Optional[str] = HPA_DIR,
+) -> ClusterAbstraction:
+    """Đồ thị trừu tượng của level: từ bộ nhớ, từ cache_dir, hoặc dựng mới.
+
+    Level khác nhưng cùng địa hình (chỉ dời S/G/sao) dùng chung một đồ thị.
+    """
+    key = abstraction_key(level, cluster_size)
+    abstraction = _ABSTRACTIONS.get(key)
+    if abstraction is None and cache_dir is not None:
+        abstraction = _load(os.path.join(cache_dir, key + ".hpa"), level, cluster_size)
+    if abstraction is None:
+        abstraction = ClusterAbstraction(level, cluster_size)
+    abstraction.level = level
+    _remember(key, abstraction)
+    return abstraction
+
+
+def save_abstraction(abstraction: ClusterAbstraction, cache_dir: Optional[str] = HPA_DIR) -> None:
+    """Ghi đồ thị ra cache_dir nếu có cụm mới tính từ lần ghi trước."""
+    if cache_dir is None or not abstraction.dirty:
+        return
+    key = abstraction_key(abstraction.level, abstraction.cluster_size)
+    if _save(os.path.join(cache_dir, key + ".hpa"), abstraction):
+        abstraction.dirty = False
+
+
+def persist_abstraction(
+    rows: Sequence[str],
+    cluster_size: int = DEFAULT_CLUSTER_SIZE,
+    cache_dir: Optional[str] = HPA_DIR,
+) -> None:
+    """Ghi đồ thị trừu tượng của rows nếu tiến trình này đã dựng nó (và có cụm mới)."""
+    try:
+        level = compile_level(rows)
+    except ValueError:
+        return
+    abstraction = _ABSTRACTIONS.get(abstraction_key(level, cluster_size))
+    if abstraction is not None:
+        save_abstraction(abstraction, cache_dir)
+
+
+def update_abstraction(
+    old_rows: Sequence[str],
+    rows: Sequence[str],
+    changed: Iterable[Position],
+    cluster_size: int = DEFAULT_CLUSTER_SIZE,
+    cache_dir: Optional[str] = HPA_DIR,
+) -> Optional[ClusterAbstraction]:
+    """Editor vừa sửa các ô changed: suy ra đồ thị của rows từ đồ thị đã có của old_rows.
+
+    Chỉ các cụm chứa ô bị sửa (và cụm kề có cổng đổi) được dựng lại, kết quả
+    lưu theo hash địa hình mới. None nếu chưa có đồ thị nào cho old_rows (lần
+    giải HPA* đầu tiên sẽ dựng) hoặc level không hợp lệ.
+    """
+    try:
+        old_level, level = compile_level(old_rows), compile_level(rows)
+    except ValueError:
+        return None
+    if (old_level.width, old_level.height) != (level.width, level.height):
+        return None
+    old_key = abstraction_key(old_level, cluster_size)
+    abstraction = _ABSTRACTIONS.pop(old_key, None)
+    if abstraction is None and cache_dir is not None:
+        abstraction = _load(os.path.join(cache_dir, old_key + ".hpa"), old_level, cluster_size)
+    if abstraction is None:
+        return None
+    abstraction.update_cells(level, [level.cell_id(x, y) for x, y in changed])
+    _remember(abstraction_key(level, cluster_size), abstraction)
+    save_abstraction(abstraction, cache_dir)
+    return abstraction
+
+
+def _remember(key: str, abstraction: ClusterAbstraction) -> None:
+    _ABSTRACTIONS[key] = abstraction
+    _ABSTRACTIONS.move_to_end(key)
+    while len(_ABSTRACTIONS) > MAX_CACHED_ABSTRACTIONS:
+        _ABSTRACTIONS.popitem(last=False)
+
+
+def _save(path: str, abstraction: ClusterAbstraction) -> bool:
+    """Ghi đồ thị: một dòng header JSON (cụm nào, bao nhiêu số) rồi mọi số int32 nén zlib."""
+    values = array('i')
+    borders = []
+    for (cluster, side), flat in abstraction.borders.items():
+        borders.append([cluster, side, len(flat)])
+        values.extend(flat)
+    intra = []
+    for cluster, gates in abstraction.intra.items():
+        start = len(values)
+        for gate, edges in gates.items():
+            for other, step in edges:
+                values.extend((gate, other, step))
+        intra.append([cluster, len(values) - start])
+    header = {
+        "version": HPA_VERSION,
+        "width": abstraction.level.width,
+        "height": abstraction.level.height,
+        "cluster_size": abstraction.cluster_size,
+        "byteorder": sys.byteorder,
+        "borders": borders,
+        "intra": intra,
+    }
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with atomic_write(path) as f:
+            f.write(json.dumps(header, separators=(",", ":")).encode("ascii") + b"\n")
+            f.write(zlib.compress(values.tobytes(), 6))
+    except OSError:
+        return False
+    return True
+
+
+def _load(path: str, level: CompiledLevel, cluster_size: int) -> Optional[ClusterAbstraction]:
+    """Đọc đồ thị đã ghi bởi _save; None nếu không có file hoặc file không hợp lệ."""
+    if not os.path.isfile(path):
+        return None
+    try:
+        with open(path, "rb") as f:
+            header = json.loads(f.readline())
+            values = array('i')
+            values.frombytes(zlib.decompress(f.read()))
+        if (
+            header["version"] != HPA_VERSION
+            or header["width"] != level.width
+            or header["height"] != level.height
+            or header["cluster_size"] != cluster_size
+        ):
+            return None
+        if header["byteorder"] != sys.byteorder:
+            values.byteswap()
+        values = values.tolist()
+        offset = 0
+        borders: Dict[Tuple[int, int], Tuple[int, ...]] = {}
+        for cluster, side, length in header["borders"]:
+            borders[(cluster, side)] = tuple(values[offset:offset + length])
+            offset += length
+        abstraction = ClusterAbstraction(level, cluster_size, borders)
+        for cluster, length in header["intra"]:
+            found: Dict[int, List[Edge]] = {gate: [] for gate in abstraction.links(cluster)}
+            for i in range(offset, offset + length, 3):
+                found[values[i]].append((values[i + 1], values[i + 2]))
+            abstraction.intra[cluster] = {gate: tuple(edges) for gate, edges in found.items()}
+            offset += length
+        if offset != len(values):
+            return None
+    except (OSError, ValueError, KeyError, TypeError, zlib.error):
+        return None
+    return abstraction
@@ -0,0 +1,164 @@
+from functools import lru_cache
+from typing import Dict, List, Tuple
+
+from algorithms.connectivity import reject_unsolvable
+from algorithms.jump_point import poi_distances, poi_paths
+from algorithms.level_kernel import (
+    CompiledLevel,
+    ProgressCallback,
+    SearchEvents,
+    collect_trace,
+    compile_level,
+    search_outcome,
+    trace_cells,
+)
+from algorithms.poi_heuristics import POI_GOAL, POI_START, compute_poi_fields, poi_distance_matrix, poi_fields_fit
+from algorithms.tree_maze import is_tree_maze, tree_search
+
+Position = Tuple[int, int]
+
+INF = float('inf')
+
+
+@lru_cache(maxsize=1024)
+def _leg_path(level: CompiledLevel, src_cell: int, dst_poi: int) -> Tuple[Tuple[Position, ...], Tuple[str, ...]]:
+    """Đường đi ngắn nhất từ một ô tới POI dst_poi, lần theo trường khoảng cách của đích.
+
+    Từ src, mỗi bước chọn ô kề (theo thứ tự U, D, L, R) có khoảng cách tới đích
+    nhỏ hơn đúng chi phí đi vào ô đó (1 nếu không có địa hình). Kết quả được
+    cache nên mỗi chặng chỉ dựng một lần cho mỗi level.
+    Khi dùng Jump Point Search (xem _use_jump_points), src_cell phải là một POI
+    và chặng lấy từ đường JPS giữa hai POI.
+    """
+    if _use_jump_points(level):
+        poi_cells = [level.start_cell, level.goal_cell] + level.star_cells
+        cells = poi_paths(level)[(poi_cells.index(src_cell), dst_poi)]
+        path, moves = trace_cells(level, list(cells))
+        return tuple(path), tuple(moves)
+    field = compute_poi_fields(level)[dst_poi]
+    neighbors = level.neighbors
+    cost = level.cost
+    position = level.position
+    cur = src_cell
+    dist = field[cur]
+    path: List[Position] = [position(cur)]
+    moves: List[str] = []
+    while dist > 0:
+        for ncell, move in neighbors[cur]:
+            if field[ncell] == dist - cost[ncell]:
+                cur = ncell
+                dist -= cost[ncell]
+                path.append(position(ncell))
+                moves.append(move)
+                break
+    return tuple(path), tuple(moves)
+
+
+def _use_jump_points(level: CompiledLevel) -> bool:
+    """Map quá lớn cho trường khoảng cách của mọi POI và không có địa hình:
+    khoảng cách và chặng giữa các POI tìm bằng Jump Point Search thay vì BFS toàn map."""
+    return not level.weighted and not poi_fields_fit(level)
+
+
+def _solve_tour(
+    from_start: List[int],
+    between: List[List[int]],
+    to_goal: List[int],
+) -> Tuple[List[int], int, int]:
+    """Held-Karp trên ma trận khoảng cách POI.
+
+    dp[mask][i] = chi phí nhỏ nhất đi từ S, thu thập các sao trong mask và
+    đang đứng tại sao i. Yêu cầu có ít nhất một sao.
+    Trả về (thứ tự sao, tổng chi phí, số trạng thái đã xét).
+    """
+    k = len(from_start)
+    full = (1 << k) - 1
+    dp: List[List[float]] = [[INF] * k for _ in range(1 << k)]
+    parent: List[List[int]] = [[-1] * k for _ in range(1 << k)]
+    for i in range(k):
+        dp[1 << i][i] = from_start[i]
+
+    states = 0
+    for mask in range(1, full + 1):
+        row = dp[mask]
+        for i in range(k):
+            cost = row[i]
+            if cost == INF:
+                continue
+            states += 1
+            dist_i = between[i]
+            remaining = full ^ mask
+            while remaining:
+                low = remaining & -remaining
+                remaining ^= low
+                j = low.bit_length() - 1
+                new_cost = cost + dist_i[j]
+                next_mask = mask | low
+                if new_cost < dp[next_mask][j]:
+                    dp[next_mask][j] = new_cost
+                    parent[next_mask][j] = i
+
+    last = min(range(k), key=lambda i: dp[full][i] + to_goal[i])
+    total = dp[full][last] + to_goal[last]
+
+    order: List[int] = []
+    mask, cur = full, last
+    while cur != -1:
+        order.append(cur)
+        prev = parent[mask][cur]
+        mask ^= 1 << cur
+        cur = prev
+    order.reverse()
+    return order, int(total), states
+
+
+def heldkarp_collect_all_stars_with_trace(rows: List[str], progress: ProgressCallback = None) -> Dict[str, object]:
+    """Giải chính xác bài toán gom sao trên đồ thị POI bằng Held-Karp.
+
+    Thay vì tìm kiếm trên trạng thái (ô, mask) như các thuật toán khác, chỉ xét
+    trạng thái (mask, sao cuối) trên ma trận khoảng cách giữa S, G và các sao
+    (2^k·k trạng thái), sau đó mở rộng từng chặng thành các nước đi theo ô.
+
+    - Output: cùng định dạng dict với các thuật toán khác; "expanded_order" là
+      thứ tự ghé các POI, "nodes_expanded" là số trạng thái quy hoạch động đã xét.
+    """
+    return collect_trace(heldkarp_search(rows), progress)
+
+
+def heldkarp_search(rows: List[str]) -> SearchEvents:
+    """Generator của Held-Karp: yield các POI theo thứ tự ghé sau khi giải xong quy hoạch động."""
+    level = compile_level(rows)
+    rejected = reject_unsolvable(level)
+    if rejected is not None:
+        return rejected
+    # Mê cung dạng cây: có lời giải tối ưu trực tiếp, không cần tìm kiếm trên mask
+    if is_tree_maze(level):
+        return (yield from tree_search(level))
+    k = len(level.stars)
+
+    order: List[int] = []
+    states = 0
+    if k:
+        if _use_jump_points(level):
+            distances = poi_distances(level)
+        else:
+            distances = poi_distance_matrix(level, compute_poi_fields(level))
+        stars_idx = range(2, 2 + k)
+        from_start = [distances[POI_START][p] for p in stars_idx]
+        between = [[distances[p][q] for q in stars_idx] for p in stars_idx]
+        to_goal = [distances[p][POI_GOAL] for p in stars_idx]
+        order, _, states = _solve_tour(from_start, between, to_goal)
+
+    # Dãy POI theo thứ tự ghé: S, các sao theo order, G
+    poi_seq = [POI_START] + [2 + i for i in order] + [POI_GOAL]
+    poi_cells = [level.start_cell, level.goal_cell] + level.star_cells
+    path: List[Position] = [level.start]
+    moves: List[str] = []
+    for src, dst in zip(poi_seq, poi_seq[1:]):
+        leg_path, leg_moves = _leg_path(level, poi_cells[src], dst)
+        path.extend(leg_path[1:])
+        moves.extend(leg_moves)
+
+    for p in poi_seq:
+        yield level.position(poi_cells[p])
+    return search_outcome(level, path, moves, True, nodes_expanded=states)
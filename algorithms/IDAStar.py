@@ -0,0 +1,161 @@
+"""IDA* với bảng chuyển vị giới hạn: tìm đường tối ưu với bộ nhớ bị chặn.
+
+A* giữ g_scores/moves cho mọi trạng thái (ô, mask) đã sinh ra, nên với nhiều
+sao (12+) trên map vừa có thể hết bộ nhớ trước khi tìm thấy lời giải. IDA*
+chỉ giữ đường đi hiện tại: DFS lặp lại với ngưỡng f = g + h tăng dần (ngưỡng
+kế tiếp = f nhỏ nhất vượt ngưỡng cũ), dùng heuristic MST của A*
+(algorithms/poi_heuristics.py).
+
+DFS không bao giờ đi vào một trạng thái đang nằm trên đường hiện tại (đi
+vòng không thể tối ưu vì mọi bước tốn > 0). Để không duyệt lại cùng một trạng
+thái theo nhiều đường (lưới có rất nhiều đường tương đương), bảng chuyển vị
+lưu g tốt nhất đã gặp của mỗi trạng thái trong vòng hiện tại; gặp lại với g
+không tốt hơn thì cắt. Bảng có tối đa max_states phần tử: đầy thì trạng thái
+mới thay trạng thái sâu nhất (g lớn nhất) trong bảng nếu nông hơn nó, vì cây
+con của trạng thái nông lớn hơn nên cắt được nhiều hơn. Lời giải vẫn tối ưu;
+bảng càng nhỏ so với số trạng thái thì càng mở rộng lại nhiều.
+"""
+from heapq import heapify, heappop, heappush
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from algorithms.connectivity import reject_unsolvable
+from algorithms.level_kernel import (
+    MOVE_LETTERS,
+    ProgressCallback,
+    SearchEvents,
+    build_state_space,
+    collect_trace,
+    compile_level,
+    search_outcome,
+)
+from algorithms.poi_heuristics import build_mst_heuristic
+from algorithms.tree_maze import is_tree_maze, tree_search
+
+Position = Tuple[int, int]
+
+# Số trạng thái tối đa trong bảng chuyển vị (mỗi phần tử dict ~100 byte)
+DEFAULT_MAX_STATES = 1_000_000
+
+
+def idastar_collect_all_stars_with_trace(
+    rows: List[str],
+    max_states: int = DEFAULT_MAX_STATES,
+    progress: ProgressCallback = None,
+) -> Dict[str, object]:
+    """Tìm đường đi ngắn nhất bằng IDA* (heuristic MST) với bộ nhớ giới hạn.
+
+    - Input: rows (danh sách chuỗi ký tự của level)
+      max_states: số trạng thái tối đa trong bảng chuyển vị (0 = không dùng bảng)
+    - Output: dict như astar_collect_all_stars_with_trace; "expanded_order" gồm
+      cả các lần mở rộng lại qua từng vòng tăng ngưỡng.
+    """
+    return collect_trace(idastar_search(rows, max_states), progress)
+
+
+def idastar_search(rows: List[str], max_states: int = DEFAULT_MAX_STATES) -> SearchEvents:
+    """Generator của IDA*: yield từng ô được mở rộng, return kết quả khi kết thúc."""
+    level = compile_level(rows)
+    # Bắt buộc với IDA*: không có lời giải thì ngưỡng tăng mãi
+    rejected = reject_unsolvable(level)
+    if rejected is not None:
+        return rejected
+    # Mê cung dạng cây: có lời giải tối ưu trực tiếp, không cần tìm kiếm trên mask
+    if is_tree_maze(level):
+        return (yield from tree_search(level))
+    get_heuristic = build_mst_heuristic(level)
+
+    space = build_state_space(level)
+    neighbors = space.neighbors
+    positions = space.positions
+    cells = space.cells
+    costs = space.costs
+    bits, mask_all = space.bits, space.mask_all
+    goal_state = space.state(level.goal_cell, level.all_mask)
+    inf = float('inf')
+
+    def children(state: int, g_score: int) -> List[Tuple[float, int, int, int]]:
+        """Các (f, state kề, g, mã nước đi) theo f tăng dần; bỏ state không tới được G."""
+        idx, mask = state >> bits, state & mask_all
+        result = []
+        for nshift, code, bit in neighbors[idx]:
+            h_score = get_heuristic(cells[nshift >> bits], mask | bit)
+            if h_score == inf:
+                continue
+            g_next = g_score + costs[nshift >> bits]
+            result.append((g_next + h_score, nshift | mask | bit, g_next, code))
+        result.sort()
+        return result
+
+    start_state = space.state(level.start_cell, 0)
+    threshold = get_heuristic(level.start_cell, 0)
+    end_path: Optional[List[int]] = None
+    end_codes: List[int] = []
+
+    while threshold != inf and end_path is None:
+        # Một vòng DFS với ngưỡng f <= threshold, dùng ngăn xếp thay cho đệ quy
+        next_threshold = inf
+        table: Dict[int, int] = {start_state: 0}
+        # Heap (-g, state) của bảng để tìm phần tử sâu nhất khi bảng đầy (có bản sao cũ)
+        deepest: List[Tuple[int, int]] = [(0, start_state)]
+        path_states = [start_state]
+        on_path = {start_state}
+        path_codes: List[int] = []
+        stack: List[Iterator[Tuple[float, int, int, int]]] = []
+        yield positions[start_state >> bits]
+        if start_state == goal_state:
+            end_path, end_codes = path_states, path_codes
+            break
+        stack.append(iter(children(start_state, 0)))
+
+        while stack:
+            child = next(stack[-1], None)
+            if child is None:
+                stack.pop()
+                on_path.discard(path_states.pop())
+                if path_codes:
+                    path_codes.pop()
+                continue
+            f_score, nxt, g_next, code = child
+            # Đi vòng về một state trên đường hiện tại, hoặc đã gặp state này trong
+            # vòng hiện tại với g không tệ hơn (cây con đã duyệt)
+            if nxt in on_path or table.get(nxt, inf) <= g_next:
+                continue
+            if f_score > threshold:
+                # Các con còn lại (đã sắp theo f) đều vượt ngưỡng
+                if f_score < next_threshold:
+                    next_threshold = f_score
+                stack[-1] = iter(())
+                continue
+            if len(table) < max_states or nxt in table:
+                table[nxt] = g_next
+                heappush(deepest, (-g_next, nxt))
+            elif max_states:
+                # Bảng đầy: thay phần tử sâu nhất nếu state mới nông hơn (cây con
+                # của state nông lớn hơn nên đáng giữ hơn)
+                while deepest and table.get(deepest[0][1]) != -deepest[0][0]:
+                    heappop(deepest)
+                if deepest and -deepest[0][0] > g_next:
+                    del table[heappop(deepest)[1]]
+                    table[nxt] = g_next
+                    heappush(deepest, (-g_next, nxt))
+                if len(deepest) > 2 * max_states:
+                    deepest = [(-g, state) for state, g in table.items()]
+                    heapify(deepest)
+
+            path_states.append(nxt)
+            on_path.add(nxt)
+            path_codes.append(code)
+            yield positions[nxt >> bits]
+            # f <= ngưỡng <= chi phí tối ưu nên lần đầu tới G là tối ưu
+            if nxt == goal_state:
+                end_path, end_codes = path_states, path_codes
+                break
+            stack.append(iter(children(nxt, g_next)))
+
+        threshold = next_threshold
+
+    if end_path is None:
+        return search_outcome(level, [], [], False)
+
+    path = [positions[state >> bits] for state in end_path]
+    return search_outcome(level, path, [MOVE_LETTERS[code] for code in end_codes], True)
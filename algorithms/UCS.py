@@ -1,156 +1,133 @@
-from collections import deque
-from typing import Dict, List, Optional, Set, Tuple
-from heapq import heappush, heappop
+from typing import Dict, List, Optional, Tuple
+
+from algorithms.bidirectional import bidirectional_search
+from algorithms.connectivity import reject_unsolvable
+from algorithms.corridor_graph import search_corridor_graph
+from algorithms.hash_distributed import hash_distributed_search, parallel_available
+from algorithms.level_kernel import (
+    CLOSED,
+    PICKED_STAR,
+    START_MOVE,
+    ProgressCallback,
+    SearchEvents,
+    collect_trace,
+    build_state_space,
+    compile_level,
+    search_outcome,
+    trace_cells,
+)
+from algorithms.tree_maze import is_tree_maze, tree_search
 
 Position = Tuple[int, int]
-State = Tuple[int, int, int]  # (x, y, collected_mask)
 
-def _parse_level(rows: List[str]) -> Tuple[Position, Position, List[Position], int, int]:
-    """Trích xuất S, G, danh sách sao từ ma trận ký tự."""
-    height = len(rows)
-    width = len(rows[0]) if height > 0 else 0
-    start: Optional[Position] = None
-    goal: Optional[Position] = None
-    stars: List[Position] = []
-
-    for y in range(height):
-        for x in range(width):
-            ch = rows[y][x]
-            if ch == "S":
-                start = (x, y)
-            elif ch == "G":
-                goal = (x, y)
-            elif ch == "*":
-                stars.append((x, y))
-
-    if start is None or goal is None:
-        raise ValueError("Level không hợp lệ: thiếu S hoặc G")
-
-    return start, goal, stars, width, height
-
-def _is_blocked(rows: List[str], x: int, y: int, width: int, height: int) -> bool:
-    if x < 0 or y < 0 or x >= width or y >= height:
-        return True
-    return rows[y][x] == "1"
-
-def _reconstruct_path(
-    parents: Dict[State, Tuple[Optional[State], str]],
-    end_state: State,
-) -> Tuple[List[Position], List[str]]:
-    """Lần ngược từ end_state để tạo path và moves (UDLR)."""
-    path_rev: List[Position] = []
-    moves_rev: List[str] = []
-    cur: Optional[State] = end_state
-    while cur is not None:
-        (x, y, _) = cur
-        path_rev.append((x, y))
-        prev, move = parents[cur]
-        if move:
-            moves_rev.append(move)
-        cur = prev
-
-    path_rev.reverse()
-    moves_rev.reverse()
-    return path_rev, moves_rev
-
-def ucs_collect_all_stars_with_trace(rows: List[str]) -> Dict[str, object]:
+def ucs_collect_all_stars_with_trace(
+    rows: List[str],
+    contract_corridors: bool = False,
+    workers: int = 1,
+    progress: ProgressCallback = None,
+) -> Dict[str, object]:
     """Tìm đường đi ngắn nhất bằng UCS: thu thập hết sao rồi tới cửa (G).
 
     - Input: rows (danh sách chuỗi ký tự của level)
+      contract_corridors=True: tìm trên đồ thị hành lang đã thu gọn
+      (xem algorithms/corridor_graph.py), "expanded_order" khi đó là các nút giao
+      workers > 1: level có sao thì tìm song song trên (ô, mask) bằng HDA*
+      với heuristic 0 (xem algorithms/hash_distributed.py)
     - Output: dict gồm:
         {
           "path": List[(x,y)],        # dãy ô đi qua từ S tới G
           "moves": List[str],          # 'U','D','L','R'
           "steps": int,                # số bước
+          "cost": int,                 # tổng chi phí (ô địa hình tốn hơn 1)
           "stars_total": int,
           "found": bool,               # có tìm thấy hay không
           "expanded_order": List[(x,y)]  # thứ tự các ô được mở rộng
         }
     """
-    start, goal, stars, width, height = _parse_level(rows)
-
-    # Ánh xạ vị trí sao -> bit index
-    star_index: Dict[Position, int] = {pos: i for i, pos in enumerate(stars)}
-    all_mask = (1 << len(stars)) - 1
-
-    start_mask = 0
-
-    # Hàng đợi ưu tiên cho UCS (min-heap): (g_score, state)
-    queue: List[Tuple[int, State]] = []
-    parents: Dict[State, Tuple[Optional[State], str]] = {}
-    g_scores: Dict[State, int] = {}  # Chi phí từ start đến state
-    closed_set: Set[State] = set()
-    expanded_order: List[Position] = []
-
-    start_state: State = (start[0], start[1], start_mask)
-    heappush(queue, (0, start_state))
-    parents[start_state] = (None, "")
+    return collect_trace(ucs_search(rows, contract_corridors, workers), progress)
+
+
+def ucs_search(rows: List[str], contract_corridors: bool = False, workers: int = 1) -> SearchEvents:
+    """Generator của UCS: yield từng ô (hoặc nút giao) được mở rộng, return kết quả khi kết thúc."""
+    level = compile_level(rows)
+    rejected = reject_unsolvable(level)
+    if rejected is not None:
+        return rejected
+    # Mê cung dạng cây: có lời giải tối ưu trực tiếp, không cần tìm kiếm trên mask
+    if is_tree_maze(level):
+        return (yield from tree_search(level))
+    if contract_corridors:
+        return (yield from search_corridor_graph(level))
+    # Không có sao: chỉ còn đường rẻ nhất S -> G, Dijkstra hai chiều
+    if not level.stars:
+        return (yield from bidirectional_search(level, by_cost=True))
+    space = build_state_space(level)
+    if workers > 1 and parallel_available():
+        cells = yield from hash_distributed_search(level, space, lambda cell, mask: 0, workers)
+        if cells is None:
+            return search_outcome(level, [], [], False)
+        path, path_moves = trace_cells(level, cells)
+        return search_outcome(level, path, path_moves, True)
+    neighbors = space.neighbors
+    positions = space.positions
+    costs = space.costs
+    bits, mask_all = space.bits, space.mask_all
+    goal_state = space.state(level.goal_cell, level.all_mask)
+    weighted = level.weighted
+    inf = float('inf')
+
+    # Hàng đợi ưu tiên cho UCS theo g_score: chi phí là số nguyên nhỏ nên dùng
+    # bucket queue (Dial): buckets[g] chứa các state có chi phí g, push/pop O(1).
+    # Mỗi bước tốn ít nhất 1 nên không bao giờ đẩy vào bucket đang xét hoặc nhỏ
+    # hơn: chỉ cần duyệt lần lượt từng bucket (viết thẳng trong vòng lặp thay vì
+    # gọi BucketQueue.push/pop để tránh chi phí gọi hàm).
+    # Không có địa hình: lần đẩy đầu tiên của một state đã có g nhỏ nhất nên
+    # moves[state] != 0 vừa là "đã thấy" vừa là cha. Có địa hình thì giữ
+    # g_scores như A* và bỏ qua bản sao cũ trong hàng đợi bằng bit CLOSED.
+    moves = space.new_moves()
+    g_scores: Dict[int, int] = {}
+    start_state = space.state(level.start_cell, 0)
+    moves[start_state] = START_MOVE
     g_scores[start_state] = 0
-    # closed_set sẽ chứa các state đã pop ra và xử lý xong
-
-    directions: List[Tuple[int, int, str]] = [
-        (0, -1, "U"),
-        (0, 1, "D"),
-        (-1, 0, "L"),
-        (1, 0, "R"),
-    ]
-
-    end_state: Optional[State] = None
-
-    while queue:
-        g_score, (x, y, mask) = heappop(queue)
-        # Bỏ qua nếu state này đã được đóng trước đó
-        if (x, y, mask) in closed_set:
-            continue
-        closed_set.add((x, y, mask))
-        expanded_order.append((x, y))
-
-        # Điều kiện thắng: đứng ở G và đã gom đủ sao
-        if (x, y) == goal and mask == all_mask:
-            end_state = (x, y, mask)
-            break
+    buckets: List[List[int]] = [[start_state]]
 
-        for dx, dy, move in directions:
-            nx, ny = x + dx, y + dy
-            if _is_blocked(rows, nx, ny, width, height):
-                continue
-
-            next_mask = mask
-            pos = (nx, ny)
-            if pos in star_index:
-                next_mask = mask | (1 << star_index[pos])
+    end_state: Optional[int] = None
 
-            nxt: State = (nx, ny, next_mask)
-            if nxt in closed_set:
+    g_score = 0
+    while g_score < len(buckets) and end_state is None:
+        bucket = buckets[g_score]
+        while bucket:
+            state = bucket.pop()
+            if moves[state] & CLOSED:
                 continue
-
-            # Tính chi phí g (từ start đến nxt)
-            tentative_g = g_scores[(x, y, mask)] + 1
-
-            # Chỉ cập nhật và đẩy vào heap nếu tìm thấy đường tốt hơn
-            if tentative_g < g_scores.get(nxt, float('inf')):
-                g_scores[nxt] = tentative_g
-                parents[nxt] = ((x, y, mask), move)
-                heappush(queue, (tentative_g, nxt))
+            moves[state] |= CLOSED
+            idx = state >> bits
+            yield positions[idx]
+
+            # Điều kiện thắng: đứng ở G và đã gom đủ sao
+            if state == goal_state:
+                end_state = state
+                break
+
+            mask = state & mask_all
+            for nshift, code, bit in neighbors[idx]:
+                nxt = nshift | mask | bit
+                # Tính chi phí g (từ start đến state kề): chi phí của ô đi vào
+                tentative_g = g_score + costs[nshift >> bits]
+                if weighted:
+                    if moves[nxt] & CLOSED or tentative_g >= g_scores.get(nxt, inf):
+                        continue
+                    g_scores[nxt] = tentative_g
+                elif moves[nxt]:
+                    continue
+                moves[nxt] = code | PICKED_STAR if bit and not mask & bit else code
+                while tentative_g >= len(buckets):
+                    buckets.append([])
+                buckets[tentative_g].append(nxt)
+        g_score += 1
 
     if end_state is None:
-        return {
-            "path": [],
-            "moves": [],
-            "steps": 0,
-            "stars_total": len(stars),
-            "found": False,
-            "expanded_order": expanded_order,
-            "nodes_expanded": len(expanded_order),
-        }
+        return search_outcome(level, [], [], False)
 
-    path, moves = _reconstruct_path(parents, end_state)
-    return {
-        "path": path,
-        "moves": moves,
-        "steps": len(moves),
-        "stars_total": len(stars),
-        "found": True,
-        "expanded_order": expanded_order,
-        "nodes_expanded": len(expanded_order),
-    }
\ No newline at end of file
+    path, path_moves = space.reconstruct(moves, end_state)
+    return search_outcome(level, path, path_moves, True)
@@ -0,0 +1,187 @@
+"""Tìm kiếm hai chiều cho chặng S -> G khi không còn sao phải gom.
+
+Level không có sao thì bài toán chỉ còn là đường đi ngắn nhất giữa hai ô, nên
+không cần không gian trạng thái (ô, mask): tìm đồng thời từ S (xuôi) và từ G
+(ngược) rồi nối hai nửa tại ô gặp nhau. Mỗi phía chỉ đi khoảng nửa bán kính,
+nên trên map trống số ô mở rộng (và quá trình duyệt cần hiển thị) giảm mạnh.
+
+- bidirectional_bfs: theo số bước. Mỗi lượt mở rộng trọn một lớp của phía có
+  frontier nhỏ hơn; lớp đầu tiên hai phía chạm nhau cho độ dài ngắn nhất (lấy
+  min trên mọi ô gặp nhau trong lớp đó).
+- bidirectional_astar: theo chi phí (có địa hình). Dùng thế trung bình
+  p(c) = (h_G(c) - h_S(c)) / 2 từ hai cận dưới nhất quán, nên hai phía cùng là
+  Dijkstra trên đồ thị chi phí rút gọn không âm; dừng khi tổng khóa nhỏ nhất
+  hai phía >= chi phí đường tốt nhất đã nối được. Không có cận dưới thì là
+  Dijkstra hai chiều.
+"""
+from heapq import heappop, heappush
+from typing import Callable, Dict, Generator, List, Optional, Tuple
+
+from algorithms.landmarks import LandmarkTable
+from algorithms.level_kernel import CompiledLevel, SearchEvents, search_outcome, trace_cells
+
+Position = Tuple[int, int]
+
+# Cận dưới chi phí theo ô (tới G, hoặc từ S)
+Potential = Callable[[int], int]
+
+# Kết quả một phía: ô -> ô cha về phía nguồn của phía đó (-1 ở nguồn)
+Parents = Dict[int, int]
+
+
+def bidirectional_search(
+    level: CompiledLevel,
+    by_cost: bool,
+    landmarks: Optional[LandmarkTable] = None,
+) -> SearchEvents:
+    """Generator như các thuật toán khác cho level không có sao: yield ô mở rộng, return kết quả.
+
+    by_cost=False: ít bước nhất (BFS hai chiều). by_cost=True: chi phí nhỏ nhất,
+    BFS hai chiều nếu level không có địa hình, ngược lại A* hai chiều với cận
+    dưới ALT từ landmarks (Dijkstra hai chiều nếu landmarks là None).
+    """
+    source, target = level.start_cell, level.goal_cell
+    if not by_cost or (not level.weighted and landmarks is None):
+        cells = yield from bidirectional_bfs(level, source, target)
+    elif landmarks is None:
+        cells = yield from bidirectional_astar(level, source, target)
+    else:
+        to_goal = landmarks.bounds_to([target])
+        from_start = landmarks.bounds_from([source])
+        cells = yield from bidirectional_astar(
+            level, source, target, lambda c: to_goal(c)[0], lambda c: from_start(c)[0]
+        )
+    if cells is None:
+        return search_outcome(level, [], [], False)
+    path, moves = trace_cells(level, cells)
+    return search_outcome(level, path, moves, True)
+
+
+def bidirectional_bfs(level: CompiledLevel, source: int, target: int) -> Generator[Position, None, Optional[List[int]]]:
+    """BFS hai chiều theo số bước: yield ô mở rộng, return dãy cell id từ source tới target (None nếu không có)."""
+    if source == target:
+        yield level.position(source)
+        return [source]
+    neighbors = level.neighbors
+    parents: Tuple[Parents, Parents] = ({source: -1}, {target: -1})
+    depths: Tuple[Dict[int, int], Dict[int, int]] = ({source: 0}, {target: 0})
+    frontiers = [[source], [target]]
+    best: Optional[Tuple[int, int]] = None  # (độ dài, ô gặp nhau)
+
+    while frontiers[0] and frontiers[1] and best is None:
+        # Mở rộng phía có frontier nhỏ hơn (bằng nhau: phía xuôi)
+        side = 0 if len(frontiers[0]) <= len(frontiers[1]) else 1
+        parent, depth, other = parents[side], depths[side], depths[1 - side]
+        nxt: List[int] = []
+        for cell in frontiers[side]:
+            yield level.position(cell)
+            d = depth[cell] + 1
+            for ncell, _ in neighbors[cell]:
+                if ncell in depth:
+                    continue
+                depth[ncell] = d
+                parent[ncell] = cell
+                nxt.append(ncell)
+                if ncell in other:
+                    length = d + other[ncell]
+                    if best is None or length < best[0]:
+                        best = (length, ncell)
+        frontiers[side] = nxt
+
+    if best is None:
+        return None
+    return _stitch(parents, best[1])
+
+
+def bidirectional_astar(
+    level: CompiledLevel,
+    source: int,
+    target: int,
+    to_target: Optional[Potential] = None,
+    from_source: Optional[Potential] = None,
+) -> Generator[Position, None, Optional[List[int]]]:
+    """A* hai chiều theo chi phí (chi phí một bước = cost của ô đi vào).
+
+    to_target(c), from_source(c): cận dưới nhất quán của chi phí c -> target và
+    source -> c (None = 0). Khóa được nhân đôi để thế trung bình vẫn là số nguyên.
+    """
+    if source == target:
+        yield level.position(source)
+        return [source]
+    neighbors, cost = level.neighbors, level.cost
+    inf = float('inf')
+
+    def potential(cell: int) -> int:
+        """2·p(c) = h_target(c) - h_source(c); phía ngược dùng -p."""
+        value = 0
+        if to_target is not None:
+            value += to_target(cell)
+        if from_source is not None:
+            value -= from_source(cell)
+        return value
+
+    g_scores: Tuple[Dict[int, int], Dict[int, int]] = ({source: 0}, {target: 0})
+    parents: Tuple[Parents, Parents] = ({source: -1}, {target: -1})
+    # Khóa phía xuôi 2g + 2p, phía ngược 2g - 2p: đều không âm và không giảm
+    heaps: Tuple[List[Tuple[int, int]], List[Tuple[int, int]]] = (
+        [(potential(source), source)],
+        [(-potential(target), target)],
+    )
+    closed: Tuple[set, set] = (set(), set())
+    best_cost = inf
+    meet: Optional[int] = None
+
+    while True:
+        # Bỏ bản sao cũ ở đỉnh heap (thế nhất quán: ô đã đóng thì g đã tối ưu)
+        for side in (0, 1):
+            heap = heaps[side]
+            while heap and heap[0][1] in closed[side]:
+                heappop(heap)
+        if not heaps[0] or not heaps[1]:
+            break
+        # Không đường nào qua các ô còn mở tốt hơn đường đã nối được
+        if heaps[0][0][0] + heaps[1][0][0] >= 2 * best_cost:
+            break
+
+        side = 0 if len(heaps[0]) <= len(heaps[1]) else 1
+        _, cell = heappop(heaps[side])
+        closed[side].add(cell)
+        yield level.position(cell)
+
+        g_side, g_other = g_scores[side], g_scores[1 - side]
+        parent, heap = parents[side], heaps[side]
+        sign = 1 if side == 0 else -1
+        g_cell = g_side[cell]
+        for ncell, _ in neighbors[cell]:
+            # Phía xuôi đi vào ncell; phía ngược đi từ ncell vào cell
+            g_next = g_cell + (cost[ncell] if side == 0 else cost[cell])
+            if g_next >= g_side.get(ncell, inf):
+                continue
+            g_side[ncell] = g_next
+            parent[ncell] = cell
+            heappush(heap, (2 * g_next + sign * potential(ncell), ncell))
+            g_meet = g_other.get(ncell)
+            if g_meet is not None and g_next + g_meet < best_cost:
+                best_cost = g_next + g_meet
+                meet = ncell
+
+    if meet is None:
+        return None
+    return _stitch(parents, meet)
+
+
+def _stitch(parents: Tuple[Parents, Parents], meet: int) -> List[int]:
+    """Nối nửa xuôi (source -> meet) với nửa ngược (meet -> target)."""
+    forward, backward = parents
+    cells: List[int] = []
+    cell = meet
+    while cell != -1:
+        cells.append(cell)
+        cell = forward[cell]
+    cells.reverse()
+    cell = backward[meet]
+    while cell != -1:
+        cells.append(cell)
+        cell = backward[cell]
+    return cells
+
@@ -0,0 +1,90 @@
+"""Gán nhãn thành phần liên thông của các ô đi được để loại nhanh level không có lời giải.
+
+Khi một sao hoặc G bị tường bao kín, mọi thuật toán phải duyệt hết không gian
+(ô, mask) mới trả về found = False. Các ô đi được chia thành thành phần liên
+thông bằng flood fill một lần (O(số ô), cache theo level); level có lời giải
+khi và chỉ khi G và mọi sao cùng thành phần với S (mỗi bước đi được cả hai
+chiều nên không cần xét thứ tự gom sao).
+"""
+from array import array
+from functools import lru_cache
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from algorithms.level_kernel import CompiledLevel, compile_level, search_outcome
+
+Position = Tuple[int, int]
+
+# Nhãn của ô tường
+NO_COMPONENT = -1
+
+
+def label_components(width: int, height: int, passable: Sequence[int]) -> array:
+    """Nhãn thành phần liên thông (0, 1, ...) cho mỗi ô theo cell id (x * height + y).
+
+    passable[cell] khác 0 nếu ô đi được; ô tường mang nhãn NO_COMPONENT.
+    """
+    size = width * height
+    labels = array('i', [NO_COMPONENT]) * size
+    label = 0
+    for seed in range(size):
+        if not passable[seed] or labels[seed] != NO_COMPONENT:
+            continue
+        labels[seed] = label
+        stack = [seed]
+        while stack:
+            cell = stack.pop()
+            x, y = divmod(cell, height)
+            if y > 0 and passable[cell - 1] and labels[cell - 1] == NO_COMPONENT:
+                labels[cell - 1] = label
+                stack.append(cell - 1)
+            if y < height - 1 and passable[cell + 1] and labels[cell + 1] == NO_COMPONENT:
+                labels[cell + 1] = label
+                stack.append(cell + 1)
+            if x > 0 and passable[cell - height] and labels[cell - height] == NO_COMPONENT:
+                labels[cell - height] = label
+                stack.append(cell - height)
+            if x < width - 1 and passable[cell + height] and labels[cell + height] == NO_COMPONENT:
+                labels[cell + height] = label
+                stack.append(cell + height)
+        label += 1
+    return labels
+
+
+@lru_cache(maxsize=8)
+def level_components(level: CompiledLevel) -> array:
+    """Nhãn thành phần liên thông của level (cache theo level, không sửa đổi)."""
+    return label_components(level.width, level.height, level.passable)
+
+
+def unreachable_pois(level: CompiledLevel) -> List[Position]:
+    """Các POI (G rồi các sao) không cùng thành phần liên thông với S."""
+    labels = level_components(level)
+    start_label = labels[level.start_cell]
+    return [
+        level.position(cell)
+        for cell in [level.goal_cell] + level.star_cells
+        if labels[cell] != start_label
+    ]
+
+
+def find_unreachable(rows: List[str]) -> List[Position]:
+    """Như unreachable_pois nhưng nhận rows; ValueError nếu level thiếu S hoặc G."""
+    return unreachable_pois(compile_level(rows))
+
+
+def reject_unsolvable(level: CompiledLevel) -> Optional[Dict[str, object]]:
+    """Kết quả found = False (kèm "unreachable") nếu level không có lời giải, ngược lại None.
+
+    G hoặc một sao không cùng thành phần liên thông với S thì không có lời giải:
+    trả về ngay (nodes_expanded = 0) thay vì để thuật toán duyệt hết không gian
+    (ô, mask) mới kết luận. Gọi ở đầu mỗi thuật toán, trước khi tìm kiếm:
+        rejected = reject_unsolvable(level)
+        if rejected is not None:
+            return rejected
+    """
+    unreachable = unreachable_pois(level)
+    if not unreachable:
+        return None
+    res = search_outcome(level, [], [], False, nodes_expanded=0)
+    res["unreachable"] = unreachable
+    return res
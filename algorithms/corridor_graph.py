@@ -0,0 +1,184 @@
+"""Thu gọn hành lang: tìm kiếm trên đồ thị nút giao thay vì từng ô.
+
+Các map trong data/levels là mê cung hành lang, phần lớn ô chỉ có đúng hai ô
+kề đi được. Bước tiền xử lý:
+1. Cắt bỏ dần các ngõ cụt không chứa S/G/sao (lời giải tối ưu không bao giờ
+   đi vào đó).
+2. Nút = POI hoặc ô có số ô kề khác 2; mỗi hành lang nối hai nút trở thành một
+   cạnh có trọng số bằng tổng chi phí các ô đi vào (bằng độ dài nếu không có
+   địa hình), kèm dãy ô và nước đi để mở rộng lại.
+Vì sao chỉ nằm trên nút nên mask chỉ đổi tại nút, và đường đi tối ưu không bao
+giờ quay đầu giữa hành lang, nên tìm kiếm trên đồ thị này vẫn cho lời giải tối ưu.
+"""
+from collections import deque
+from functools import lru_cache
+from typing import Callable, Deque, Dict, List, Optional, Set, Tuple
+
+from algorithms.level_kernel import BucketQueue, CompiledLevel, SearchEvents, search_outcome
+
+Position = Tuple[int, int]
+State = Tuple[int, int]  # (node_index, collected_mask)
+Edge = Tuple[int, int, int]  # (nút đích, trọng số, chỉ số hành lang)
+
+
+def prune_dead_ends(level: CompiledLevel) -> Set[int]:
+    """Cắt dần ngõ cụt không chứa POI, trả về tập ô đi được còn lại."""
+    neighbors = level.neighbors
+    poi_cells = {level.start_cell, level.goal_cell, *level.star_cells}
+    alive = {cell for cell in range(level.size) if level.passable[cell]}
+    degree = {cell: len(neighbors[cell]) for cell in alive}
+    queue: Deque[int] = deque(
+        cell for cell in alive if degree[cell] <= 1 and cell not in poi_cells
+    )
+    while queue:
+        cell = queue.popleft()
+        if cell not in alive:
+            continue
+        alive.discard(cell)
+        for ncell, _ in neighbors[cell]:
+            if ncell in alive:
+                degree[ncell] -= 1
+                if degree[ncell] <= 1 and ncell not in poi_cells:
+                    queue.append(ncell)
+    return alive
+
+
+class CorridorGraph:
+    """Đồ thị có trọng số giữa các nút giao/POI của level."""
+
+    def __init__(self, level: CompiledLevel):
+        self.level = level
+        alive = prune_dead_ends(level)
+
+        neighbors = level.neighbors
+        poi_cells = {level.start_cell, level.goal_cell, *level.star_cells}
+        degree = {cell: sum(1 for n, _ in neighbors[cell] if n in alive) for cell in alive}
+        self.node_cells: List[int] = sorted(
+            cell for cell in alive if cell in poi_cells or degree[cell] != 2
+        )
+        self.node_index: Dict[int, int] = {cell: i for i, cell in enumerate(self.node_cells)}
+        self.star_bit: List[int] = [level.star_bit[cell] for cell in self.node_cells]
+
+        # corridors[i] = (dãy ô sau nút xuất phát, dãy nước đi) của hành lang thứ i
+        self.corridors: List[Tuple[Tuple[int, ...], Tuple[str, ...]]] = []
+        self.edges: List[List[Edge]] = [[] for _ in self.node_cells]
+        cost = level.cost
+        for u, cell in enumerate(self.node_cells):
+            best: Dict[int, Tuple[int, Tuple[int, ...], Tuple[str, ...]]] = {}
+            for ncell, move in neighbors[cell]:
+                if ncell not in alive:
+                    continue
+                end, cells, moves = self._walk_corridor(cell, ncell, move, alive)
+                v = self.node_index[end]
+                # Chi phí đi hết hành lang theo chiều u -> v (tính cả ô nút v)
+                weight = sum(cost[c] for c in cells)
+                # Bỏ vòng tự thân, giữ hành lang rẻ nhất giữa hai nút
+                if v == u or (v in best and best[v][0] <= weight):
+                    continue
+                best[v] = (weight, cells, moves)
+            for v, (weight, cells, moves) in best.items():
+                self.edges[u].append((v, weight, len(self.corridors)))
+                self.corridors.append((cells, moves))
+
+    def _walk_corridor(
+        self, start: int, first: int, move: str, alive: Set[int]
+    ) -> Tuple[int, Tuple[int, ...], Tuple[str, ...]]:
+        """Đi dọc hành lang từ nút start qua ô first cho tới nút kế tiếp."""
+        neighbors = self.level.neighbors
+        cells = [first]
+        moves = [move]
+        prev, cur = start, first
+        while cur not in self.node_index:
+            for ncell, nmove in neighbors[cur]:
+                if ncell != prev and ncell in alive:
+                    prev, cur = cur, ncell
+                    cells.append(ncell)
+                    moves.append(nmove)
+                    break
+        return cur, tuple(cells), tuple(moves)
+
+
+@lru_cache(maxsize=8)
+def build_corridor_graph(level: CompiledLevel) -> CorridorGraph:
+    """Dựng đồ thị hành lang (cache theo level)."""
+    return CorridorGraph(level)
+
+
+def search_corridor_graph(
+    level: CompiledLevel,
+    heuristic: Optional[Callable[[int, int], float]] = None,
+) -> SearchEvents:
+    """Generator UCS (heuristic=None) hoặc A* trên đồ thị hành lang, trạng thái (nút, mask).
+
+    heuristic nhận (cell, mask) như heuristic MST của A*; yield tọa độ các nút
+    đã mở rộng, kết quả được mở rộng lại thành "path"/"moves" theo từng ô.
+    """
+    graph = build_corridor_graph(level)
+    node_cells = graph.node_cells
+    star_bit = graph.star_bit
+    edges = graph.edges
+    all_mask = level.all_mask
+    goal_node = graph.node_index[level.goal_cell]
+    inf = float('inf')
+
+    def h(node: int, mask: int) -> float:
+        return heuristic(node_cells[node], mask) if heuristic is not None else 0
+
+    start_state: State = (graph.node_index[level.start_cell], 0)
+    # Bucket queue theo f; trạng thái (nút, mask) được đánh số node * 2^k + mask
+    bits = len(level.stars)
+    queue = BucketQueue()
+    start_h = h(*start_state)
+    if start_h != inf:
+        queue.push(start_h, start_state[0] << bits)
+    parents: Dict[State, Tuple[Optional[State], int]] = {start_state: (None, -1)}
+    g_scores: Dict[State, int] = {start_state: 0}
+    closed_set: Set[State] = set()
+    end_state: Optional[State] = None
+
+    while queue:
+        _, key = queue.pop()
+        state = (key >> bits, key & all_mask)
+        if state in closed_set:
+            continue
+        closed_set.add(state)
+        node, mask = state
+        yield level.position(node_cells[node])
+
+        if node == goal_node and mask == all_mask:
+            end_state = state
+            break
+
+        g = g_scores[state]
+        for v, weight, corridor in edges[node]:
+            nxt: State = (v, mask | star_bit[v])
+            if nxt in closed_set:
+                continue
+            tentative_g = g + weight
+            if tentative_g < g_scores.get(nxt, inf):
+                h_score = h(*nxt)
+                if h_score == inf:
+                    continue
+                g_scores[nxt] = tentative_g
+                parents[nxt] = (state, corridor)
+                queue.push(tentative_g + h_score, (v << bits) | nxt[1])
+
+    if end_state is None:
+        return search_outcome(level, [], [], False)
+
+    corridor_ids: List[int] = []
+    cur: Optional[State] = end_state
+    while cur is not None:
+        prev, corridor = parents[cur]
+        if corridor >= 0:
+            corridor_ids.append(corridor)
+        cur = prev
+    corridor_ids.reverse()
+
+    path: List[Position] = [level.start]
+    moves: List[str] = []
+    for corridor in corridor_ids:
+        cells, corridor_moves = graph.corridors[corridor]
+        path.extend(level.position(c) for c in cells)
+        moves.extend(corridor_moves)
+    return search_outcome(level, path, moves, True)
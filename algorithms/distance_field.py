@@ -0,0 +1,142 @@
+"""Trường khoảng cách (BFS, hoặc Dijkstra khi có địa hình) trên level đã biên dịch.
+
+Mỗi trường là một array('i') phẳng đánh chỉ số theo cell id của
+`CompiledLevel` (4 byte mỗi ô), nên tra khoảng cách từ một ô bất kỳ chỉ là
+một phép đọc mảng. Ô không tới được mang giá trị UNREACHABLE.
+
+Nếu có NumPy, BFS chạy theo từng lớp (wavefront): cả frontier được mở rộng
+cùng lúc bằng phép dịch chỉ số ô (±1 theo hàng, ±height theo cột) và lọc bằng
+mặt nạ đi được/chưa thăm. Lớp nhỏ (hành lang hẹp) vẫn xử lý bằng vòng lặp
+Python vì chi phí gọi NumPy cho vài ô lớn hơn lợi ích.
+
+Level có ô địa hình (bùn/nước) dùng `cost_distance_field`: chi phí nhỏ nhất để
+đi từ mỗi ô tới nguồn, chạy Dijkstra với BucketQueue vì chi phí là số nguyên nhỏ.
+"""
+from array import array
+from collections import deque
+from typing import Deque, Iterable, List
+
+from algorithms.level_kernel import BucketQueue, CompiledLevel
+
+try:
+    import numpy as np
+except ImportError:  # NumPy là tùy chọn, thiếu thì dùng BFS thuần Python
+    np = None
+
+# Giá trị lớn nhất của kiểu 'i': ô không tới được luôn thua khi lấy min()
+UNREACHABLE = 2 ** 31 - 1
+
+# Frontier từ kích thước này trở lên mới mở rộng bằng NumPy
+VECTOR_MIN_FRONTIER = 256
+
+
+def bfs_distance_field(level: CompiledLevel, sources: Iterable[int]) -> array:
+    """Khoảng cách BFS từ tập ô nguồn (đa nguồn) tới mọi ô của level."""
+    if np is not None:
+        return _bfs_wavefront(level, sources)
+    return _bfs_queue(level, sources)
+
+
+def distance_field(level: CompiledLevel, sources: Iterable[int]) -> array:
+    """Chi phí nhỏ nhất từ mọi ô tới tập ô nguồn: BFS nếu mọi ô tốn 1, ngược lại Dijkstra."""
+    if level.weighted:
+        return cost_distance_field(level, sources)
+    return bfs_distance_field(level, sources)
+
+
+def cost_distance_field(level: CompiledLevel, sources: Iterable[int]) -> array:
+    """Dijkstra ngược: dist[c] = chi phí đi từ c tới nguồn gần nhất (tính cả ô nguồn).
+
+    Chi phí một bước là cost của ô đi vào, nên từ ô kề c của v tới v tốn cost[v].
+    """
+    dist = array('i', [UNREACHABLE]) * level.size
+    queue = BucketQueue()
+    for cell in sources:
+        if dist[cell] != 0:
+            dist[cell] = 0
+            queue.push(0, cell)
+
+    neighbors, cost = level.neighbors, level.cost
+    while queue:
+        d, cell = queue.pop()
+        if d > dist[cell]:
+            continue
+        nd = d + cost[cell]
+        for ncell, _ in neighbors[cell]:
+            if nd < dist[ncell]:
+                dist[ncell] = nd
+                queue.push(nd, ncell)
+    return dist
+
+
+def _bfs_queue(level: CompiledLevel, sources: Iterable[int]) -> array:
+    """BFS thuần Python bằng hàng đợi."""
+    dist = array('i', [UNREACHABLE]) * level.size
+    queue: Deque[int] = deque()
+    for cell in sources:
+        if dist[cell] != 0:
+            dist[cell] = 0
+            queue.append(cell)
+
+    neighbors = level.neighbors
+    while queue:
+        cell = queue.popleft()
+        d = dist[cell] + 1
+        for ncell, _ in neighbors[cell]:
+            if dist[ncell] == UNREACHABLE:
+                dist[ncell] = d
+                queue.append(ncell)
+    return dist
+
+
+def _bfs_wavefront(level: CompiledLevel, sources: Iterable[int]) -> array:
+    """BFS theo lớp: mở rộng cả frontier một lần bằng NumPy khi frontier đủ lớn."""
+    size, height = level.size, level.height
+    neighbors = level.neighbors
+    dist = array('i', [UNREACHABLE]) * size
+    # dist_np và passable_np dùng chung bộ nhớ với dist/level.passable (không sao chép)
+    dist_np = np.frombuffer(dist, dtype=np.int32)
+    passable_np = np.frombuffer(level.passable, dtype=np.uint8).view(np.bool_)
+
+    frontier: List[int] = []
+    for cell in sources:
+        if dist[cell] != 0:
+            dist[cell] = 0
+            frontier.append(cell)
+
+    depth = 0
+    vec = None  # frontier dạng mảng NumPy khi đang ở chế độ vector
+    while frontier or vec is not None:
+        depth += 1
+        if vec is None and len(frontier) < VECTOR_MIN_FRONTIER:
+            nxt: List[int] = []
+            for cell in frontier:
+                for ncell, _ in neighbors[cell]:
+                    if dist[ncell] == UNREACHABLE:
+                        dist[ncell] = depth
+                        nxt.append(ncell)
+            frontier = nxt
+            continue
+
+        cur = vec if vec is not None else np.array(frontier, dtype=np.int64)
+        rows_y = cur % height
+        cand = np.concatenate((
+            cur[rows_y > 0] - 1,             # U
+            cur[rows_y < height - 1] + 1,    # D
+            cur[cur >= height] - height,     # L
+            cur[cur < size - height] + height,  # R
+        ))
+        cand = cand[passable_np[cand]]
+        cand = cand[dist_np[cand] == UNREACHABLE]
+        # Khử trùng lặp không cần sắp xếp: ghi chỉ số vị trí vào ô; với mỗi ô
+        # chỉ đúng một lần xuất hiện đọc lại được chỉ số của chính nó
+        order = np.arange(cand.size, dtype=np.int32)
+        dist_np[cand] = -1 - order
+        cand = cand[dist_np[cand] == -1 - order]
+        dist_np[cand] = depth
+
+        if cand.size >= VECTOR_MIN_FRONTIER:
+            vec, frontier = cand, []
+        else:
+            vec, frontier = None, cand.tolist()
+    return dist
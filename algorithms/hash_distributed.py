@@ -0,0 +1,301 @@
+"""A*/UCS song song phân phối theo hash (HDA*) trên không gian trạng thái (ô, mask).
+
+A* tuần tự chỉ dùng một nhân; với 10+ sao trên map lớn số trạng thái lên tới
+hàng chục triệu. HDA* chia không gian trạng thái cho N tiến trình: mỗi trạng
+thái có đúng một tiến trình sở hữu (theo hash), tiến trình đó giữ g, cha và
+OPEN của nó. Mở rộng một trạng thái sinh ra các trạng thái kề; trạng thái của
+tiến trình khác được gom theo lô rồi gửi qua hàng đợi của tiến trình đó. Không
+có khóa hay bảng dùng chung, nên thông lượng mở rộng tăng gần tuyến tính theo
+số nhân.
+
+Hash theo khối ô (BLOCK x BLOCK) trộn với mask: các trạng thái kề nhau phần lớn
+cùng khối và cùng mask nên ở lại tiến trình hiện tại (ít thông điệp), còn các
+khối/mask khác nhau rải đều cho mọi tiến trình (cân bằng tải).
+
+Mỗi tiến trình tự mở rộng theo f của OPEN riêng nên lời giải đầu tiên chưa
+chắc tối ưu: nó chỉ là cận trên (incumbent) được phát cho mọi tiến trình để
+cắt các trạng thái f >= incumbent. Tìm kiếm kết thúc khi mọi tiến trình không
+còn trạng thái f < incumbent và không còn lô nào đang trên đường đi; điều
+này được kiểm tra bằng các đợt thăm dò (probe) theo phương pháp bốn bộ đếm:
+hai đợt liên tiếp mọi tiến trình đều rảnh và tổng số lô đã gửi = đã nhận, không
+đổi giữa hai đợt. Heuristic admissible (kể cả không nhất quán, trạng thái được
+mở lại khi có g tốt hơn) cho lời giải tối ưu như A* tuần tự.
+"""
+import multiprocessing as mp
+import os
+import queue
+import random
+import time
+from array import array
+from heapq import heappop, heappush
+from typing import Callable, Generator, List, Optional, Tuple
+
+from algorithms.level_kernel import CompiledLevel, StateSpace
+
+Position = Tuple[int, int]
+
+# Heuristic theo (cell id, mask); UCS dùng heuristic 0
+Heuristic = Callable[[int, int], float]
+
+# Cạnh khối ô dùng để hash: trạng thái trong cùng khối (cùng mask) cùng một tiến trình
+BLOCK = 8
+
+# Số trạng thái mở rộng giữa hai lần gửi lô / đọc hộp thư
+EXPAND_CHUNK = 256
+
+# Thời gian chờ hộp thư khi tiến trình rảnh, và khoảng cách giữa hai đợt thăm dò (giây)
+IDLE_WAIT = 0.05
+PROBE_INTERVAL = 0.01
+
+
+def parallel_available() -> bool:
+    """HDA* cần start method "fork": tiến trình con dùng chung heuristic đã dựng sẵn."""
+    return "fork" in mp.get_all_start_methods()
+
+
+def hash_distributed_search(
+    level: CompiledLevel,
+    space: StateSpace,
+    heuristic: Heuristic,
+    workers: int,
+) -> Generator[Position, None, Optional[List[int]]]:
+    """HDA* với workers tiến trình: yield các ô được mở rộng (theo thứ tự báo về),
+    return dãy cell id của đường đi tối ưu từ S tới G (None nếu không có).
+
+    heuristic phải admissible; tiến trình con được fork nên heuristic (và các
+    trường khoảng cách nó dùng) không phải tính lại hay tuần tự hóa.
+    """
+    ctx = mp.get_context("fork")
+    owner = _owner_function(level, space, workers)
+    start_state = space.state(level.start_cell, 0)
+    goal_state = space.state(level.goal_cell, level.all_mask)
+    inboxes = [ctx.Queue() for _ in range(workers)]
+    results = ctx.Queue()
+    processes = [
+        ctx.Process(
+            target=_worker_main,
+            args=(me, space, heuristic, owner, goal_state, inboxes, results, os.getpid()),
+            daemon=True,
+        )
+        for me in range(workers)
+    ]
+    try:
+        for process in processes:
+            process.start()
+        # Trạng thái bắt đầu là lô đầu tiên (do tiến trình điều phối gửi)
+        inboxes[owner(start_state)].put(("nodes", array('q', (start_state, 0, -1)).tobytes()))
+        seeded = 1
+
+        incumbent = float('inf')
+        wave = 0
+        replies: dict = {}
+        previous: Optional[Tuple[int, int]] = None  # (đã gửi, đã nhận) của đợt trước nếu mọi tiến trình rảnh
+        probing = False
+        last_probe = time.monotonic()
+        while True:
+            if not probing and time.monotonic() - last_probe >= PROBE_INTERVAL:
+                wave += 1
+                replies = {}
+                probing = True
+                for inbox in inboxes:
+                    inbox.put(("probe", wave))
+            try:
+                msg = results.get(timeout=PROBE_INTERVAL)
+            except queue.Empty:
+                continue
+            kind = msg[0]
+            if kind == "expanded":
+                cells = array('i')
+                cells.frombytes(msg[1])
+                for cell in cells:
+                    yield level.position(cell)
+            elif kind == "goal":
+                if msg[1] < incumbent:
+                    incumbent = msg[1]
+                    for inbox in inboxes:
+                        inbox.put(("bound", incumbent))
+            elif kind == "status" and msg[1] == wave:
+                replies[msg[2]] = msg[3:]
+                if len(replies) < workers:
+                    continue
+                sent = seeded + sum(r[0] for r in replies.values())
+                received = sum(r[1] for r in replies.values())
+                counts = (sent, received) if all(r[2] for r in replies.values()) else None
+                if counts is not None and sent == received and counts == previous:
+                    break
+                previous = counts
+                probing = False
+                last_probe = time.monotonic()
+
+        if incumbent == float('inf'):
+            return None
+        # Lần ngược cha: mỗi tiến trình trả về đoạn đường thuộc nó, tới khi gặp trạng thái của tiến trình khác
+        states: List[int] = []
+        state = goal_state
+        while state != -1:
+            inboxes[owner(state)].put(("trace", state))
+            while True:
+                msg = results.get()
+                if msg[0] == "segment":
+                    break
+            states.extend(msg[1])
+            state = msg[2]
+        states.reverse()
+        return [space.cells[s >> space.bits] for s in states]
+    finally:
+        for inbox, process in zip(inboxes, processes):
+            if process.is_alive():
+                inbox.put(("stop",))
+        for process in processes:
+            if process.pid is not None:
+                process.join(timeout=1)
+                if process.is_alive():
+                    process.kill()
+                    process.join()
+
+
+def _owner_function(level: CompiledLevel, space: StateSpace, workers: int) -> Callable[[int], int]:
+    """Hàm state -> tiến trình sở hữu: hash ngẫu nhiên (cố định) của khối ô, trộn với mask."""
+    rng = random.Random(0)
+    blocks_y = -(-level.height // BLOCK)
+    block_keys: dict = {}
+    keys = array('q', [0]) * len(space.cells)
+    for idx, cell in enumerate(space.cells):
+        x, y = divmod(cell, level.height)
+        block = (x // BLOCK) * blocks_y + y // BLOCK
+        key = block_keys.get(block)
+        if key is None:
+            key = block_keys[block] = rng.getrandbits(31)
+        keys[idx] = key
+    bits, mask_all = space.bits, space.mask_all
+
+    def owner(state: int) -> int:
+        return (keys[state >> bits] + (state & mask_all) * 0x9E3779B1) % workers
+
+    return owner
+
+
+def _worker_main(
+    me: int,
+    space: StateSpace,
+    heuristic: Heuristic,
+    owner: Callable[[int], int],
+    goal_state: int,
+    inboxes: list,
+    results,
+    parent_pid: int,
+) -> None:
+    """Vòng lặp của một tiến trình: đọc hộp thư, mở rộng OPEN riêng theo f, gửi lô sang tiến trình khác.
+
+    Thông điệp nhận: ("nodes", lô (state, g, cha)...), ("bound", incumbent),
+    ("probe", đợt), ("trace", state), ("stop",).
+    Thông điệp gửi về điều phối: ("expanded", cell ids), ("goal", g),
+    ("status", đợt, me, số lô đã gửi, số lô đã nhận, rảnh), ("segment", states, state tiếp theo).
+    """
+    inbox = inboxes[me]
+    workers = len(inboxes)
+    neighbors, cells, costs = space.neighbors, space.cells, space.costs
+    bits, mask_all = space.bits, space.mask_all
+    inf = float('inf')
+    g_scores: dict = {}
+    parents: dict = {}
+    heap: List[Tuple[float, int, int]] = []
+    bound = inf
+    sent = received = 0
+    outgoing: List[array] = [array('q') for _ in range(workers)]
+
+    def relax(state: int, g_score: int, parent: int) -> None:
+        if g_score >= g_scores.get(state, inf):
+            return
+        h_score = heuristic(cells[state >> bits], state & mask_all)
+        # Không tới được sao/G còn lại, hoặc không thể tốt hơn lời giải đã có
+        if g_score + h_score >= bound:
+            return
+        g_scores[state] = g_score
+        parents[state] = parent
+        # Cùng f: ưu tiên g lớn (gần đích hơn)
+        heappush(heap, (g_score + h_score, -g_score, state))
+
+    def has_work() -> bool:
+        """Bỏ bản sao cũ ở đỉnh heap; còn trạng thái f < bound hay không."""
+        while heap and -heap[0][1] != g_scores[heap[0][2]]:
+            heappop(heap)
+        if heap and heap[0][0] >= bound:
+            heap.clear()
+        return bool(heap)
+
+    def flush() -> int:
+        count = 0
+        for dest, batch in enumerate(outgoing):
+            if batch:
+                inboxes[dest].put(("nodes", batch.tobytes()))
+                outgoing[dest] = array('q')
+                count += 1
+        return count
+
+    while True:
+        # Tiến trình điều phối đã chết (vd. lượt tìm bị hủy): không còn ai nhận kết quả
+        if os.getppid() != parent_pid:
+            return
+        # Đọc hết hộp thư; rảnh thì chờ có giới hạn
+        while True:
+            busy = has_work()
+            try:
+                msg = inbox.get(block=not busy, timeout=None if busy else IDLE_WAIT)
+            except queue.Empty:
+                if busy:
+                    break
+                if os.getppid() != parent_pid:
+                    return
+                continue
+            kind = msg[0]
+            if kind == "nodes":
+                received += 1
+                batch = array('q')
+                batch.frombytes(msg[1])
+                for i in range(0, len(batch), 3):
+                    relax(batch[i], batch[i + 1], batch[i + 2])
+            elif kind == "bound":
+                bound = min(bound, msg[1])
+            elif kind == "probe":
+                results.put(("status", msg[1], me, sent, received, not has_work()))
+            elif kind == "trace":
+                segment = []
+                state = msg[1]
+                while True:
+                    segment.append(state)
+                    state = parents[state]
+                    if state == -1 or owner(state) != me:
+                        break
+                results.put(("segment", segment, state))
+            elif kind == "stop":
+                results.cancel_join_thread()
+                for other in inboxes:
+                    other.cancel_join_thread()
+                return
+
+        expanded = array('i')
+        for _ in range(EXPAND_CHUNK):
+            if not has_work():
+                break
+            f_score, neg_g, state = heappop(heap)
+            g_score = -neg_g
+            idx = state >> bits
+            expanded.append(cells[idx])
+            if state == goal_state:
+                # Cận trên mới: phát cho mọi tiến trình qua điều phối
+                bound = g_score
+                results.put(("goal", g_score))
+                continue
+            mask = state & mask_all
+            for nshift, _, bit in neighbors[idx]:
+                nxt = nshift | mask | bit
+                g_next = g_score + costs[nshift >> bits]
+                dest = owner(nxt)
+                if dest == me:
+                    relax(nxt, g_next, state)
+                else:
+                    outgoing[dest].extend((nxt, g_next, state))
+        sent += flush()
+        if expanded:
+            results.put(("expanded", expanded.tobytes()))
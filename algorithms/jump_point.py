@@ -0,0 +1,239 @@
+"""Jump Point Search (JPS) cho lưới 4 hướng, mọi ô cùng chi phí.
+
+Trên sàn trống có rất nhiều đường ngắn nhất tương đương (đổi thứ tự các bước
+ngang/dọc), A* thường mở rộng gần hết các ô giữa hai điểm. JPS chỉ giữ một
+thứ tự chuẩn: từ mỗi nút nhảy thẳng theo một hướng, bỏ qua các ô trung gian,
+và chỉ dừng (thêm vào OPEN) tại "điểm nhảy":
+- đích;
+- đi ngang: ô có ô kề trên/dưới mở ra mà ô trước đó bị tường chặn (forced neighbor);
+- đi dọc: tương tự với ô kề trái/phải, hoặc khi một tia ngang từ ô đó gặp điểm nhảy.
+Nút đến theo hướng ngang chỉ mở rộng tiếp thẳng và hai hướng dọc (và ngược
+lại), nên số nút trong OPEN tỉ lệ với số góc tường thay vì số ô.
+
+Tia ngang được quét rất nhiều lần (mỗi ô trên tia dọc bắn hai tia ngang), nên
+với mỗi ô và mỗi hướng ngang, điểm dừng kế tiếp (ô có forced neighbor hoặc
+tường) được tính sẵn một lần cho cả level (_row_stops): mỗi tia ngang chỉ còn
+một phép tra bảng cộng kiểm tra đích nằm trên đoạn đó.
+
+Chỉ đúng khi mọi bước tốn như nhau (level không có bùn/nước).
+"""
+from functools import lru_cache
+from heapq import heappop, heappush
+from typing import Dict, Generator, List, Optional, Tuple
+
+from array import array
+
+from algorithms.level_kernel import CompiledLevel
+
+try:
+    import numpy as np
+except ImportError:  # NumPy là tùy chọn, thiếu thì tính bảng điểm dừng bằng vòng lặp
+    np = None
+
+Position = Tuple[int, int]
+
+
+def jump_point_search(level: CompiledLevel, source: int, target: int) -> Generator[Position, None, Optional[List[int]]]:
+    """A* với JPS: yield các điểm nhảy được mở rộng, return dãy cell id từ source tới target (None nếu không có).
+
+    ValueError nếu level có ô địa hình (JPS cần chi phí đồng nhất).
+    """
+    if level.weighted:
+        raise ValueError("Jump Point Search cần mọi ô cùng chi phí")
+    width, height, passable = level.width, level.height, level.passable
+    tx, ty = divmod(target, height)
+    inf = float('inf')
+    stops_right, stops_left = _row_stops(level)
+
+    def walkable(x: int, y: int) -> bool:
+        return 0 <= x < width and 0 <= y < height and passable[x * height + y] != 0
+
+    def jump_horizontal(x: int, y: int, dx: int) -> Optional[Tuple[int, int]]:
+        """Đi ngang từ (x, y) theo dx tới điểm nhảy đầu tiên (tra bảng _row_stops)."""
+        if not walkable(x, y):
+            return None
+        stop = (stops_right if dx > 0 else stops_left)[x * height + y]
+        stop_x = stop >> 1
+        # Đích nằm trên đoạn từ x tới điểm dừng
+        if y == ty and (tx - x) * dx >= 0 and (stop_x - tx) * dx >= 0:
+            return tx, ty
+        if stop & 1:
+            return stop_x, y
+        return None
+
+    def jump_vertical(x: int, y: int, dy: int) -> Optional[Tuple[int, int]]:
+        """Đi dọc từ (x, y) theo dy; dừng cả khi tia ngang từ ô hiện tại gặp điểm nhảy."""
+        while walkable(x, y):
+            if x == tx and y == ty:
+                return x, y
+            if (walkable(x - 1, y) and not walkable(x - 1, y - dy)) or (
+                walkable(x + 1, y) and not walkable(x + 1, y - dy)
+            ):
+                return x, y
+            if jump_horizontal(x + 1, y, 1) is not None or jump_horizontal(x - 1, y, -1) is not None:
+                return x, y
+            y += dy
+        return None
+
+    sx, sy = divmod(source, height)
+    # parents[điểm nhảy] = điểm nhảy trước đó (None ở nguồn)
+    parents: Dict[Tuple[int, int], Optional[Tuple[int, int]]] = {(sx, sy): None}
+    g_scores: Dict[Tuple[int, int], int] = {(sx, sy): 0}
+    closed = set()
+    open_heap: List[Tuple[int, int, Tuple[int, int]]] = [(abs(sx - tx) + abs(sy - ty), 0, (sx, sy))]
+
+    while open_heap:
+        _, _, node = heappop(open_heap)
+        if node in closed:
+            continue
+        closed.add(node)
+        yield node
+        x, y = node
+        if x == tx and y == ty:
+            return _expand(parents, node, height)
+
+        parent = parents[node]
+        if parent is None:
+            directions = [(0, -1), (0, 1), (-1, 0), (1, 0)]
+        elif parent[1] == y:
+            # Đến theo hướng ngang: thẳng tiếp và hai hướng dọc
+            dx = 1 if x > parent[0] else -1
+            directions = [(0, -1), (0, 1), (dx, 0)]
+        else:
+            # Đến theo hướng dọc: thẳng tiếp và hai hướng ngang
+            dy = 1 if y > parent[1] else -1
+            directions = [(-1, 0), (1, 0), (0, dy)]
+
+        g_node = g_scores[node]
+        for dx, dy in directions:
+            if dx:
+                point = jump_horizontal(x + dx, y, dx)
+            else:
+                point = jump_vertical(x, y + dy, dy)
+            if point is None or point in closed:
+                continue
+            g_next = g_node + abs(point[0] - x) + abs(point[1] - y)
+            if g_next >= g_scores.get(point, inf):
+                continue
+            g_scores[point] = g_next
+            parents[point] = node
+            # Cùng f: ưu tiên g lớn (gần đích hơn)
+            heappush(open_heap, (g_next + abs(point[0] - tx) + abs(point[1] - ty), -g_next, point))
+    return None
+
+
+def jps_path(level: CompiledLevel, source: int, target: int) -> Optional[List[int]]:
+    """Như jump_point_search nhưng chỉ trả về dãy cell id (không ghi lại quá trình duyệt)."""
+    search = jump_point_search(level, source, target)
+    while True:
+        try:
+            next(search)
+        except StopIteration as stop:
+            return stop.value
+
+
+@lru_cache(maxsize=8)
+def poi_paths(level: CompiledLevel) -> Dict[Tuple[int, int], Tuple[int, ...]]:
+    """Đường đi ngắn nhất giữa mọi cặp POI (chỉ số theo thứ tự [S, G, stars...]).
+
+    paths[(i, j)] là dãy cell id từ POI i tới POI j; cặp không tới được không
+    có trong dict. Lưới không có địa hình nên đường j -> i là đường i -> j đảo
+    ngược: chỉ chạy JPS cho i < j. Cache theo level, không sửa đổi.
+    """
+    poi_cells = [level.start_cell, level.goal_cell] + level.star_cells
+    paths: Dict[Tuple[int, int], Tuple[int, ...]] = {}
+    for i, a in enumerate(poi_cells):
+        paths[(i, i)] = (a,)
+        for j in range(i + 1, len(poi_cells)):
+            cells = jps_path(level, a, poi_cells[j])
+            if cells is not None:
+                paths[(i, j)] = tuple(cells)
+                paths[(j, i)] = tuple(reversed(cells))
+    return paths
+
+
+def poi_distances(level: CompiledLevel) -> List[List[float]]:
+    """Ma trận khoảng cách chính xác giữa các POI từ poi_paths (inf nếu không tới được)."""
+    paths = poi_paths(level)
+    count = 2 + len(level.stars)
+    inf = float('inf')
+    return [
+        [len(paths[(i, j)]) - 1 if (i, j) in paths else inf for j in range(count)]
+        for i in range(count)
+    ]
+
+
+@lru_cache(maxsize=8)
+def _row_stops(level: CompiledLevel) -> Tuple[array, array]:
+    """Điểm dừng kế tiếp của tia ngang từ mỗi ô, sang phải và sang trái (theo cell id).
+
+    Giá trị 2·x' + 1 nếu dừng tại ô x' có forced neighbor (theo hướng đó), hoặc
+    2·x' nếu gặp tường tại x' trước (x' = -1 hoặc width ở mép map).
+    """
+    width, height, passable = level.width, level.height, level.passable
+    if np is not None:
+        grid = np.frombuffer(passable, dtype=np.uint8).reshape(width, height).astype(bool)
+        # Đệm một lớp tường quanh map để các phép dịch không cần xét mép
+        pad = np.zeros((width + 2, height + 2), dtype=bool)
+        pad[1:-1, 1:-1] = grid
+        up, down = pad[1:-1, :-2], pad[1:-1, 2:]
+        xs = 2 * np.arange(width)[:, None]
+        stops = []
+        for dx in (1, -1):
+            # Ô phía sau (x - dx) ở hàng trên/dưới
+            behind_up, behind_down = pad[1 - dx:width + 1 - dx, :-2], pad[1 - dx:width + 1 - dx, 2:]
+            forced = grid & ((up & ~behind_up) | (down & ~behind_down))
+            if dx > 0:
+                value = np.where(forced, xs + 1, np.where(grid, 2 * width, xs)).astype(np.int32)
+                # Điểm dừng gần nhất về bên phải: min tích lũy từ phải sang
+                value = np.minimum.accumulate(value[::-1], axis=0)[::-1]
+            else:
+                value = np.where(forced, xs + 1, np.where(grid, -2, xs)).astype(np.int32)
+                value = np.maximum.accumulate(value, axis=0)
+            stops.append(array('i', np.ascontiguousarray(value).tobytes()))
+        return stops[0], stops[1]
+
+    def walkable(x: int, y: int) -> bool:
+        return 0 <= x < width and 0 <= y < height and passable[x * height + y] != 0
+
+    stops = []
+    for dx in (1, -1):
+        table = array('i', [0]) * level.size
+        xs = range(width - 1, -1, -1) if dx > 0 else range(width)
+        for y in range(height):
+            stop = 2 * (width if dx > 0 else -1)
+            for x in xs:
+                if not passable[x * height + y]:
+                    stop = 2 * x
+                elif (walkable(x, y - 1) and not walkable(x - dx, y - 1)) or (
+                    walkable(x, y + 1) and not walkable(x - dx, y + 1)
+                ):
+                    stop = 2 * x + 1
+                table[x * height + y] = stop
+        stops.append(table)
+    return stops[0], stops[1]
+
+
+def _expand(
+    parents: Dict[Tuple[int, int], Optional[Tuple[int, int]]],
+    end: Tuple[int, int],
+    height: int,
+) -> List[int]:
+    """Dãy cell id đầy đủ: nối các điểm nhảy bằng các đoạn thẳng."""
+    points: List[Tuple[int, int]] = []
+    node: Optional[Tuple[int, int]] = end
+    while node is not None:
+        points.append(node)
+        node = parents[node]
+    points.reverse()
+
+    cells = [points[0][0] * height + points[0][1]]
+    for (x0, y0), (x1, y1) in zip(points, points[1:]):
+        dx = (x1 > x0) - (x1 < x0)
+        dy = (y1 > y0) - (y1 < y0)
+        x, y = x0, y0
+        while (x, y) != (x1, y1):
+            x += dx
+            y += dy
+            cells.append(x * height + y)
+    return cells
@@ -0,0 +1,237 @@
+"""Heuristic ALT (A*, Landmarks, Triangle inequality) cho map lớn.
+
+Heuristic MST/Greedy cần một trường khoảng cách đầy đủ cho mỗi POI (S, G và
+từng sao): 4 byte × số ô × số POI, tức hàng GB với map 4000x4000 nhiều sao.
+ALT chỉ giữ trường khoảng cách của vài ô mốc (landmark) cố định, không phụ
+thuộc số sao, và suy ra cận dưới d(c, t) cho mọi cặp ô bằng bất đẳng thức tam
+giác với D_L[c] = chi phí đi từ c tới mốc L:
+    d(c, t) >= D_L[c] - D_L[t]
+    d(c, t) >= D_L[t] - D_L[c] + cost[t] - cost[c]
+(vế thứ hai là d(L, t) - d(L, c): đi ngược một đường chỉ đổi ô đầu/cuối được
+tính chi phí, nên không cần trường chiều ngược khi có địa hình). Lấy max theo
+mọi mốc và với khoảng cách Manhattan (mỗi bước tốn ít nhất 1).
+
+Mốc được chọn theo farthest-point: mốc đầu là ô xa S nhất, mỗi mốc sau là ô
+xa tập mốc đã chọn nhất. Trường được lưu gọn (uint16 khi khoảng cách đủ nhỏ)
+và ghi ra đĩa theo hash của địa hình (tường + chi phí ô), nên chỉ phải tính
+một lần cho mỗi map; di chuyển S/G/sao không làm mất bảng.
+"""
+import hashlib
+import json
+import os
+import sys
+import zlib
+from array import array
+from functools import lru_cache
+from operator import sub
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+from algorithms.connectivity import level_components
+from algorithms.distance_field import UNREACHABLE, distance_field
+from algorithms.level_kernel import CompiledLevel
+from core.paths import LEVELS_DIR, atomic_write
+
+try:
+    import numpy as np
+except ImportError:  # NumPy là tùy chọn, thiếu thì chọn mốc bằng vòng lặp Python
+    np = None
+
+# Số mốc mặc định: nhiều mốc cho cận chặt hơn nhưng mỗi lần tính h chậm hơn
+DEFAULT_LANDMARKS = 8
+
+# Thư mục lưu bảng mốc (cạnh các file level); None = không ghi đĩa
+LANDMARK_DIR = os.path.join(LEVELS_DIR, ".landmarks")
+
+# Tăng khi cách chọn mốc hoặc định dạng file thay đổi để bỏ bảng cũ
+LANDMARK_VERSION = 1
+
+# Số ô tối đa giữ vector cận dưới trong bounds_to (đầy thì xóa hết, tính lại)
+BOUND_CACHE_CELLS = 1 << 18
+
+# Giá trị ô không tới được trong trường uint16
+_UNREACHABLE_U16 = 0xFFFF
+
+
+class LandmarkTable:
+    """Trường khoảng cách tới các mốc và các cận dưới ALT suy ra từ chúng."""
+
+    def __init__(self, level: CompiledLevel, cells: List[int], fields: List[array]):
+        self.level = level
+        self.cells = cells    # cell id của các mốc
+        self.fields = fields  # fields[i][c] = chi phí đi từ c tới mốc i
+
+    def lower_bound(self, cell: int, target: int) -> int:
+        """Cận dưới chi phí đi từ cell tới target."""
+        return self.bounds_to([target])(cell)[0]
+
+    def bounds_to(self, targets: Sequence[int]) -> Callable[[int], Tuple[int, ...]]:
+        """Hàm cell -> (cận dưới chi phí từ cell tới từng target).
+
+        Vector khoảng cách tới các mốc của targets được đọc sẵn; kết quả của mỗi
+        ô được giữ lại (tối đa BOUND_CACHE_CELLS ô) vì A* mở rộng cùng một ô
+        với nhiều mask khác nhau.
+        """
+        return self._bounds(targets, reverse=False)
+
+    def bounds_from(self, sources: Sequence[int]) -> Callable[[int], Tuple[int, ...]]:
+        """Hàm cell -> (cận dưới chi phí từ từng source tới cell), như bounds_to."""
+        return self._bounds(sources, reverse=True)
+
+    def _bounds(self, points: Sequence[int], reverse: bool) -> Callable[[int], Tuple[int, ...]]:
+        fields, height, cost = self.fields, self.level.height, self.level.cost
+        anchors = [(p // height, p % height, cost[p], [f[p] for f in fields]) for p in points]
+        cache: Dict[int, Tuple[int, ...]] = {}
+
+        def bounds(cell: int) -> Tuple[int, ...]:
+            result = cache.get(cell)
+            if result is not None:
+                return result
+            x, y = divmod(cell, height)
+            here = [f[cell] for f in fields]
+            ccost = cost[cell]
+            values = []
+            for px, py, pcost, there in anchors:
+                # max/min chạy trong C qua map(); không có mốc thì chỉ còn Manhattan
+                ahead = max(map(sub, here, there), default=0)   # D[cell] - D[p]
+                behind = max(map(sub, there, here), default=0)  # D[p] - D[cell]
+                if reverse:
+                    # Từ p tới cell: vai trò hai đầu đổi chỗ
+                    ahead, behind = behind, ahead + ccost - pcost
+                else:
+                    behind += pcost - ccost
+                values.append(max(abs(x - px) + abs(y - py), ahead, behind))
+            result = tuple(values)
+            if len(cache) >= BOUND_CACHE_CELLS:
+                cache.clear()
+            cache[cell] = result
+            return result
+
+        return bounds
+
+
+def terrain_key(level: CompiledLevel, count: int) -> str:
+    """Hash của địa hình (kích thước, ô đi được, chi phí ô) và số mốc."""
+    digest = hashlib.sha256(f"{LANDMARK_VERSION}:{level.width}x{level.height}:{count}:".encode("ascii"))
+    digest.update(level.passable)
+    digest.update(level.cost)
+    return digest.hexdigest()
+
+
+def select_landmarks(level: CompiledLevel, count: int = DEFAULT_LANDMARKS) -> LandmarkTable:
+    """Chọn tối đa count mốc theo farthest-point trong thành phần liên thông của S."""
+    cells: List[int] = []
+    fields: List[array] = []
+    # nearest[c]: khoảng cách từ c tới mốc gần nhất (ban đầu: tới S); -1 ngoài thành phần của S
+    nearest = distance_field(level, [level.start_cell])
+    if np is not None:
+        nearest_np = np.frombuffer(nearest, dtype=np.int32).copy()
+        nearest_np[nearest_np == UNREACHABLE] = -1
+    else:
+        nearest = array('i', [-1 if d == UNREACHABLE else d for d in nearest])
+
+    while len(cells) < count:
+        if np is not None:
+            cell = int(nearest_np.argmax())
+            farthest = int(nearest_np[cell])
+        else:
+            cell = max(range(level.size), key=nearest.__getitem__)
+            farthest = nearest[cell]
+        # Mọi ô đã trùng một mốc (map quá nhỏ)
+        if farthest <= 0 and cells:
+            break
+        field = distance_field(level, [cell])
+        cells.append(cell)
+        fields.append(_compact(field))
+        if np is not None:
+            np.minimum(nearest_np, np.frombuffer(field, dtype=np.int32), out=nearest_np)
+        else:
+            nearest = array('i', [min(a, b) for a, b in zip(nearest, field)])
+    return LandmarkTable(level, cells, fields)
+
+
+@lru_cache(maxsize=4)
+def landmark_table(
+    level: CompiledLevel,
+    count: int = DEFAULT_LANDMARKS,
+    cache_dir: Optional[str] = LANDMARK_DIR,
+) -> LandmarkTable:
+    """Bảng mốc của level: đọc từ cache_dir nếu có, ngược lại chọn mốc rồi ghi lại.
+
+    Bảng đọc từ đĩa chỉ được dùng khi các mốc cùng thành phần liên thông với S
+    (cùng địa hình nhưng S nằm ở vùng khác thì chọn lại).
+    """
+    path = None
+    if cache_dir is not None:
+        path = os.path.join(cache_dir, terrain_key(level, count) + ".alt")
+        table = _load(path, level)
+        if table is not None:
+            labels = level_components(level)
+            start_label = labels[level.start_cell]
+            if all(labels[cell] == start_label for cell in table.cells):
+                return table
+
+    table = select_landmarks(level, count)
+    if path is not None:
+        _save(path, table)
+    return table
+
+
+def _compact(field: array) -> array:
+    """Đổi trường sang uint16 nếu mọi khoảng cách tới được đều vừa (giảm nửa bộ nhớ)."""
+    if np is not None:
+        values = np.frombuffer(field, dtype=np.int32)
+        if int(values[values != UNREACHABLE].max(initial=0)) >= _UNREACHABLE_U16:
+            return field
+        return array('H', np.minimum(values, _UNREACHABLE_U16).astype(np.uint16).tobytes())
+    if max((d for d in field if d != UNREACHABLE), default=0) >= _UNREACHABLE_U16:
+        return field
+    return array('H', [min(d, _UNREACHABLE_U16) for d in field])
+
+
+def _save(path: str, table: LandmarkTable) -> None:
+    """Ghi bảng: một dòng header JSON rồi các trường nối nhau, nén zlib."""
+    header = {
+        "version": LANDMARK_VERSION,
+        "size": table.level.size,
+        "byteorder": sys.byteorder,
+        "cells": table.cells,
+        "typecodes": [f.typecode for f in table.fields],
+    }
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with atomic_write(path) as f:
+            f.write(json.dumps(header).encode("ascii") + b"\n")
+            # Nén từng trường một để không phải nối tất cả trong bộ nhớ
+            compressor = zlib.compressobj(6)
+            for field in table.fields:
+                f.write(compressor.compress(field.tobytes()))
+            f.write(compressor.flush())
+    except OSError:
+        pass
+
+
+def _load(path: str, level: CompiledLevel) -> Optional[LandmarkTable]:
+    """Đọc bảng đã ghi bởi _save; None nếu không có file hoặc file không hợp lệ."""
+    if not os.path.isfile(path):
+        return None
+    try:
+        with open(path, "rb") as f:
+            header = json.loads(f.readline())
+            raw = memoryview(zlib.decompress(f.read()))
+        if header["version"] != LANDMARK_VERSION or header["size"] != level.size:
+            return None
+        fields: List[array] = []
+        offset = 0
+        for typecode in header["typecodes"]:
+            field = array(typecode)
+            nbytes = field.itemsize * level.size
+            field.frombytes(raw[offset:offset + nbytes])
+            if header["byteorder"] != sys.byteorder:
+                field.byteswap()
+            fields.append(field)
+            offset += nbytes
+        if offset != len(raw) or len(fields) != len(header["cells"]):
+            return None
+    except (OSError, ValueError, KeyError, TypeError, zlib.error):
+        return None
+    return LandmarkTable(level, list(header["cells"]), fields)
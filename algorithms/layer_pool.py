@@ -0,0 +1,123 @@
+"""Nhóm tiến trình mở rộng song song một lớp của BFS đồng bộ theo lớp.
+
+BFS theo lớp (xem bfs_collect_all_stars) mở rộng cả lớp độ sâu hiện tại bằng
+vài phép toán mảng; phần tốn nhất là các phép đọc ngẫu nhiên vào bảng ô kề và
+bytearray `moves`. Lớp lớn được chia thành các đoạn liên tiếp, mỗi tiến trình
+mở rộng một đoạn (tiến trình gọi tự làm đoạn đầu). `moves` nằm trong bộ nhớ
+dùng chung (mmap ẩn danh, kế thừa qua fork) nên tiến trình con đọc trực tiếp
+trạng thái đã thăm của các lớp trước mà không phải sao chép.
+
+Trong lúc mở rộng chỉ có đọc; ghi `moves` (chọn cha) do tiến trình gọi làm
+sau khi ghép kết quả các đoạn theo đúng thứ tự, nên kết quả không phụ thuộc
+số tiến trình hay thứ tự chúng chạy xong.
+"""
+import mmap
+import multiprocessing as mp
+import os
+from typing import Callable, List, Tuple
+
+from algorithms.hash_distributed import IDLE_WAIT, parallel_available
+
+try:
+    import numpy as np
+except ImportError:  # Chỉ dùng cùng BFS theo lớp, vốn cần NumPy
+    np = None
+
+# Mở rộng một lớp: frontier (mảng state) -> (ứng viên chưa thăm theo thứ tự, mã nước đi)
+LayerExpand = Callable[["np.ndarray"], Tuple["np.ndarray", "np.ndarray"]]
+
+# Lớp nhỏ hơn thì tự mở rộng: chi phí gửi/nhận qua pipe lớn hơn phần chia được
+PARALLEL_MIN_FRONTIER = 1 << 16
+
+
+def shared_moves(size: int) -> mmap.mmap:
+    """Bytearray `moves` (toàn 0) trong bộ nhớ dùng chung với các tiến trình fork sau đó."""
+    return mmap.mmap(-1, size)
+
+
+class LayerPool:
+    """workers - 1 tiến trình con (fork khi lớp lớn đầu tiên xuất hiện) cùng tiến trình gọi.
+
+    expand được kế thừa qua fork cùng mọi bảng nó dùng; dùng với `with` để dừng
+    các tiến trình con khi tìm xong.
+    """
+
+    def __init__(self, workers: int, expand: LayerExpand, dtype):
+        self.workers = workers if parallel_available() else 1
+        self.expand = expand
+        self.dtype = np.dtype(dtype)
+        self.processes: List[mp.Process] = []
+        self.conns: list = []
+
+    def __enter__(self) -> "LayerPool":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def expand_layer(self, cur: "np.ndarray") -> Tuple["np.ndarray", "np.ndarray"]:
+        """Như expand(cur), chia cur cho các tiến trình nếu lớp đủ lớn."""
+        if self.workers < 2 or len(cur) < PARALLEL_MIN_FRONTIER:
+            return self.expand(cur)
+        if not self.processes:
+            self._start()
+        chunks = np.array_split(cur, self.workers)
+        # b"" là lệnh dừng tiến trình con: đoạn rỗng thì không gửi
+        busy = []
+        for conn, chunk in zip(self.conns, chunks[1:]):
+            if chunk.size:
+                conn.send_bytes(chunk.tobytes())
+                busy.append(conn)
+        parts = [self.expand(chunks[0])]
+        for conn in busy:
+            cand = np.frombuffer(conn.recv_bytes(), dtype=self.dtype)
+            codes = np.frombuffer(conn.recv_bytes(), dtype=np.uint8)
+            parts.append((cand, codes))
+        return np.concatenate([p[0] for p in parts]), np.concatenate([p[1] for p in parts])
+
+    def close(self) -> None:
+        for conn in self.conns:
+            try:
+                conn.send_bytes(b"")
+            except OSError:
+                pass
+        for process in self.processes:
+            process.join(timeout=1)
+            if process.is_alive():
+                process.kill()
+                process.join()
+        for conn in self.conns:
+            conn.close()
+        self.processes, self.conns = [], []
+
+    def _start(self) -> None:
+        ctx = mp.get_context("fork")
+        for _ in range(self.workers - 1):
+            parent_conn, child_conn = ctx.Pipe()
+            process = ctx.Process(
+                target=_pool_main,
+                args=(child_conn, self.expand, self.dtype, os.getpid()),
+                daemon=True,
+            )
+            process.start()
+            child_conn.close()
+            self.processes.append(process)
+            self.conns.append(parent_conn)
+
+
+def _pool_main(conn, expand: LayerExpand, dtype, parent_pid: int) -> None:
+    """Vòng lặp tiến trình con: nhận một đoạn frontier, gửi lại ứng viên và mã nước đi; b"" = dừng."""
+    while True:
+        # Tiến trình gọi đã chết (vd. lượt tìm bị hủy): không còn ai gửi việc
+        while not conn.poll(IDLE_WAIT):
+            if os.getppid() != parent_pid:
+                return
+        try:
+            data = conn.recv_bytes()
+        except EOFError:
+            return
+        if not data:
+            return
+        cand, codes = expand(np.frombuffer(data, dtype=dtype))
+        conn.send_bytes(cand.tobytes())
+        conn.send_bytes(codes.tobytes())
@@ -0,0 +1,373 @@
+"""Biểu diễn level đã "biên dịch" dùng chung cho mọi thuật toán tìm kiếm.
+
+Thay vì mỗi thuật toán tự phân tích `rows` và tra `rows[y][x]` cho từng ô kề,
+level được biên dịch một lần thành:
+- `passable`: bytearray phẳng (1 = đi được, 0 = tường), chỉ số ô = x * height + y
+  (theo cột, để thứ tự (cell, mask) trùng thứ tự (x, y, mask) cũ trong heap)
+- `neighbors`: bảng kề tính sẵn, mỗi ô là tuple các cặp (ô kề, nước đi)
+- `star_bit`: bảng tra bit sao theo chỉ số ô (0 nếu ô không có sao)
+- `cost`: chi phí đi vào từng ô (1 cho ô thường, TERRAIN_COSTS cho bùn/nước,
+  0 cho tường)
+
+Thuật toán tìm kiếm trên (ô, mask) dùng `StateSpace`: mỗi trạng thái là một số
+nguyên, "đã thăm" và "cha" gộp chung thành một byte nước đi vào trạng thái.
+"""
+from array import array
+from functools import lru_cache
+from typing import Callable, Dict, Generator, List, Optional, Sequence, Tuple
+
+Position = Tuple[int, int]
+Neighbor = Tuple[int, str]  # (chỉ số ô kề, nước đi 'U'/'D'/'L'/'R')
+
+# Giữ đúng thứ tự hướng của các thuật toán để kết quả duyệt không thay đổi
+DIRECTIONS: List[Tuple[int, int, str]] = [
+    (0, -1, "U"),
+    (0, 1, "D"),
+    (-1, 0, "L"),
+    (1, 0, "R"),
+]
+
+WALL = "1"
+
+# Ô địa hình: chi phí đi vào ô (ô thường, S, G, sao đều tốn 1)
+TERRAIN_COSTS: Dict[str, int] = {
+    "m": 3,  # bùn
+    "~": 5,  # nước
+}
+# Mọi ký tự hợp lệ trong file level
+TILE_CHARS = frozenset("01SG*") | frozenset(TERRAIN_COSTS)
+
+
+def tile_cost(ch: str) -> int:
+    """Chi phí đi vào một ô theo ký tự của nó (0 = tường, không đi vào được)."""
+    if ch == WALL:
+        return 0
+    return TERRAIN_COSTS.get(ch, 1)
+
+# Hàm báo tiến độ nhận số nút đã mở rộng; được gọi mỗi PROGRESS_INTERVAL nút
+ProgressCallback = Optional[Callable[[int], None]]
+PROGRESS_INTERVAL = 4096
+
+# Generator tìm kiếm: yield (x, y) mỗi lần mở rộng một trạng thái, return kết quả
+# của search_outcome(). Người dùng có thể tiêu thụ dần (hiển thị quá trình duyệt)
+# hoặc chạy hết bằng collect_trace().
+SearchEvents = Generator[Position, None, Dict[str, object]]
+
+
+class CompiledLevel:
+    """Level đã biên dịch: lưới phẳng, bảng kề và bảng bit sao."""
+
+    def __init__(self, rows: Sequence[str]):
+        height = len(rows)
+        width = len(rows[0]) if height > 0 else 0
+        self.width = width
+        self.height = height
+        self.size = width * height
+
+        start: Optional[Position] = None
+        goal: Optional[Position] = None
+        stars: List[Position] = []
+
+        passable = bytearray(self.size)
+        cost = bytearray(self.size)
+        for y, row in enumerate(rows):
+            for x in range(min(width, len(row))):
+                ch = row[x]
+                if ch == WALL:
+                    continue
+                passable[x * height + y] = 1
+                cost[x * height + y] = TERRAIN_COSTS.get(ch, 1)
+                if ch == "S":
+                    start = (x, y)
+                elif ch == "G":
+                    goal = (x, y)
+                elif ch == "*":
+                    stars.append((x, y))
+
+        if start is None or goal is None:
+            raise ValueError("Level không hợp lệ: thiếu S hoặc G")
+
+        self.passable = passable
+        self.cost = cost
+        # Có ô tốn hơn 1 bước: thuật toán theo chi phí phải dùng cost thay vì đếm bước
+        self.max_cost = max(cost) if self.size else 1
+        self.weighted = self.max_cost > 1
+        self.start = start
+        self.goal = goal
+        self.stars = stars
+        self.start_cell = start[0] * height + start[1]
+        self.goal_cell = goal[0] * height + goal[1]
+        self.star_cells = [x * height + y for (x, y) in stars]
+        self.all_mask = (1 << len(stars)) - 1
+
+        # Bảng tra bit sao theo chỉ số ô
+        star_bit = [0] * self.size
+        for i, cell in enumerate(self.star_cells):
+            star_bit[cell] = 1 << i
+        self.star_bit = star_bit
+
+        self.neighbors = self._build_neighbors()
+
+    def _build_neighbors(self) -> List[Tuple[Neighbor, ...]]:
+        """Tính sẵn danh sách ô kề đi được của mọi ô (theo thứ tự U, D, L, R)."""
+        width, height, passable = self.width, self.height, self.passable
+        empty: Tuple[Neighbor, ...] = ()
+        neighbors: List[Tuple[Neighbor, ...]] = [empty] * self.size
+        for cell in range(self.size):
+            if not passable[cell]:
+                continue
+            x, y = divmod(cell, height)
+            adj: List[Neighbor] = []
+            if y > 0 and passable[cell - 1]:
+                adj.append((cell - 1, "U"))
+            if y < height - 1 and passable[cell + 1]:
+                adj.append((cell + 1, "D"))
+            if x > 0 and passable[cell - height]:
+                adj.append((cell - height, "L"))
+            if x < width - 1 and passable[cell + height]:
+                adj.append((cell + height, "R"))
+            neighbors[cell] = tuple(adj)
+        return neighbors
+
+    def cell_id(self, x: int, y: int) -> int:
+        return x * self.height + y
+
+    def position(self, cell: int) -> Position:
+        return divmod(cell, self.height)
+
+    def is_blocked(self, x: int, y: int) -> bool:
+        if x < 0 or y < 0 or x >= self.width or y >= self.height:
+            return True
+        return not self.passable[x * self.height + y]
+
+
+@lru_cache(maxsize=8)
+def _compile_cached(rows: Tuple[str, ...]) -> CompiledLevel:
+    return CompiledLevel(rows)
+
+
+def compile_level(rows: Sequence[str]) -> CompiledLevel:
+    """Biên dịch level (có cache theo nội dung nên mỗi level chỉ biên dịch một lần)."""
+    return _compile_cached(tuple(rows))
+
+
+# Mã nước đi lưu trong bytearray moves của StateSpace (0 = chưa thăm)
+MOVE_CODES: Dict[str, int] = {"U": 1, "D": 2, "L": 3, "R": 4}
+MOVE_LETTERS = ("", "U", "D", "L", "R")
+PICKED_STAR = 8   # bit: nước đi này nhặt sao tại ô đến
+START_MOVE = 16   # đánh dấu trạng thái bắt đầu (không có cha)
+CLOSED = 32       # bit: trạng thái đã đóng (dùng cho A*)
+
+
+class StateSpace:
+    """Đánh số trạng thái (ô, mask) thành số nguyên liên tục.
+
+    state = index * 2^k + mask, với index là thứ tự của ô trong các ô đi được
+    (tăng theo cell id, nên thứ tự số nguyên trùng thứ tự (cell, mask) cũ trong
+    heap). Thuật toán giữ một bytearray `moves` kích thước `size`: byte khác 0
+    nghĩa là đã thăm, và cho biết nước đi vào trạng thái (MOVE_CODES, cộng
+    PICKED_STAR nếu nhặt sao) - đủ để lần ngược ra cha mà không cần lưu cha.
+    """
+
+    def __init__(self, level: CompiledLevel):
+        self.level = level
+        self.bits = len(level.stars)
+        self.num_masks = 1 << self.bits
+        self.mask_all = self.num_masks - 1
+
+        height = level.height
+        self.cells: List[int] = [c for c in range(level.size) if level.passable[c]]
+        index = array('i', [-1]) * level.size
+        for i, cell in enumerate(self.cells):
+            index[cell] = i
+        self.index = index
+        self.size = len(self.cells) * self.num_masks
+        self.positions: List[Position] = [divmod(c, height) for c in self.cells]
+
+        # Ô kề theo index: (index kề << bits, mã nước đi, bit sao của ô kề)
+        bits, star_bit = self.bits, level.star_bit
+        self.neighbors: List[Tuple[Tuple[int, int, int], ...]] = [
+            tuple((index[n] << bits, MOVE_CODES[m], star_bit[n]) for n, m in level.neighbors[cell])
+            for cell in self.cells
+        ]
+        # Chi phí đi vào ô theo index (UCS/A*)
+        self.costs = bytes(level.cost[c] for c in self.cells)
+        # Độ dời index khi đi ngược một nước, theo mã nước đi
+        self.delta_cell = (0, -1, 1, -height, height)
+
+    def state(self, cell: int, mask: int) -> int:
+        return (self.index[cell] << self.bits) | mask
+
+    def new_moves(self) -> bytearray:
+        return bytearray(self.size)
+
+    def reconstruct(self, moves: bytearray, end_state: int) -> Tuple[List[Position], List[str]]:
+        """Lần ngược từ end_state theo byte nước đi để tạo path (tọa độ) và moves (UDLR)."""
+        level, index, cells, bits = self.level, self.index, self.cells, self.bits
+        path_rev: List[Position] = []
+        moves_rev: List[str] = []
+        state = end_state
+        while True:
+            idx, mask = state >> bits, state & self.mask_all
+            cell = cells[idx]
+            path_rev.append(self.positions[idx])
+            code = moves[state]
+            if code & START_MOVE:
+                break
+            if code & PICKED_STAR:
+                mask ^= level.star_bit[cell]
+            moves_rev.append(MOVE_LETTERS[code & 7])
+            state = (index[cell - self.delta_cell[code & 7]] << bits) | mask
+
+        path_rev.reverse()
+        moves_rev.reverse()
+        return path_rev, moves_rev
+
+
+@lru_cache(maxsize=8)
+def build_state_space(level: CompiledLevel) -> StateSpace:
+    """Dựng StateSpace (cache theo level)."""
+    return StateSpace(level)
+
+
+class BucketQueue:
+    """Hàng đợi ưu tiên cho khóa nguyên nhỏ (Dial): push/pop O(1) thay vì O(log n).
+
+    buckets[k] là danh sách phần tử có khóa k; con trỏ `cur` chỉ tới khóa nhỏ
+    nhất có thể còn phần tử. Khóa của UCS/A* chỉ tăng dần theo chi phí bước
+    (1..max_cost) nên pop chỉ quét qua vài ô rỗng. Push khóa nhỏ hơn `cur`
+    (heuristic không nhất quán) vẫn đúng: con trỏ lùi về. Cùng khóa thì phần
+    tử đẩy sau lấy ra trước (LIFO), ưu tiên trạng thái vừa sinh ra.
+    """
+
+    __slots__ = ("buckets", "cur", "count")
+
+    def __init__(self):
+        self.buckets: List[List[int]] = []
+        self.cur = 0
+        self.count = 0
+
+    def __len__(self) -> int:
+        return self.count
+
+    def push(self, key: int, item: int) -> None:
+        buckets = self.buckets
+        if key >= len(buckets):
+            buckets.extend([] for _ in range(key + 1 - len(buckets)))
+        buckets[key].append(item)
+        if key < self.cur:
+            self.cur = key
+        self.count += 1
+
+    def pop(self) -> Tuple[int, int]:
+        """Lấy (khóa, phần tử) có khóa nhỏ nhất; hàng đợi phải khác rỗng."""
+        buckets = self.buckets
+        cur = self.cur
+        while not buckets[cur]:
+            cur += 1
+        self.cur = cur
+        self.count -= 1
+        return cur, buckets[cur].pop()
+
+
+def path_cost(level: CompiledLevel, path: List[Position]) -> int:
+    """Tổng chi phí đi theo path (không tính ô xuất phát)."""
+    cost, height = level.cost, level.height
+    return sum(cost[x * height + y] for x, y in path[1:])
+
+
+def trace_cells(level: CompiledLevel, cells: List[int]) -> Tuple[List[Position], List[str]]:
+    """Đổi dãy cell id liền kề thành (dãy ô (x, y), các nước đi 'U','D','L','R')."""
+    moves: List[str] = []
+    for cell, nxt in zip(cells, cells[1:]):
+        for ncell, move in level.neighbors[cell]:
+            if ncell == nxt:
+                moves.append(move)
+                break
+    return [level.position(cell) for cell in cells], moves
+
+
+def search_outcome(
+    level: CompiledLevel,
+    path: List[Position],
+    moves: List[str],
+    found: bool,
+    nodes_expanded: Optional[int] = None,
+) -> Dict[str, object]:
+    """Kết quả trả về từ generator tìm kiếm: như make_result nhưng chưa có "expanded_order".
+
+    nodes_expanded=None nghĩa là bằng số ô đã yield; collect_trace (hoặc người
+    tiêu thụ generator) điền vào.
+    """
+    return {
+        "path": path,
+        "moves": moves,
+        "steps": len(moves),
+        "cost": path_cost(level, path),
+        "stars_total": len(level.stars),
+        "found": found,
+        "nodes_expanded": nodes_expanded,
+    }
+
+
+def collect_trace(
+    search: SearchEvents,
+    progress: ProgressCallback = None,
+    keep_trace: bool = True,
+) -> Dict[str, object]:
+    """Chạy hết generator tìm kiếm và trả về dict kết quả đầy đủ.
+
+    keep_trace=False bỏ qua các ô đã mở rộng ("expanded_order" rỗng) để không
+    phải giữ danh sách có thể lên tới hàng triệu phần tử.
+    """
+    holder: Dict[str, Dict[str, object]] = {}
+
+    def run() -> Generator[Position, None, None]:
+        holder["result"] = yield from search
+
+    expanded_order: List[Position] = []
+    if keep_trace and progress is None:
+        expanded_order = list(run())
+        count = len(expanded_order)
+    else:
+        count = 0
+        append = expanded_order.append
+        for pos in run():
+            count += 1
+            if keep_trace:
+                append(pos)
+            if progress is not None and not count % PROGRESS_INTERVAL:
+                progress(count)
+
+    result = holder["result"]
+    result["expanded_order"] = expanded_order
+    if result["nodes_expanded"] is None:
+        result["nodes_expanded"] = count
+    return result
+
+
+def make_result(
+    level: CompiledLevel,
+    path: List[Position],
+    moves: List[str],
+    found: bool,
+    expanded_order: List[Position],
+    nodes_expanded: Optional[int] = None,
+) -> Dict[str, object]:
+    """Đóng gói kết quả theo định dạng dict mà AIController sử dụng.
+
+    nodes_expanded mặc định bằng số phần tử của expanded_order; các thuật toán
+    không duyệt theo ô (vd. quy hoạch động trên POI) có thể truyền số riêng.
+    """
+    if nodes_expanded is None:
+        nodes_expanded = len(expanded_order)
+    return {
+        "path": path,
+        "moves": moves,
+        "steps": len(moves),
+        "cost": path_cost(level, path),
+        "stars_total": len(level.stars),
+        "found": found,
+        "expanded_order": expanded_order,
+        "nodes_expanded": nodes_expanded,
+    }
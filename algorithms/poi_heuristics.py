@@ -0,0 +1,266 @@
+"""Heuristic dựa trên các POI (S, G, sao) dùng chung cho các thuật toán có heuristic.
+
+Trường khoảng cách tới từng POI (algorithms/distance_field.py) được tính một lần
+và cache theo level; từ đó dựng ma trận khoảng cách giữa các POI, heuristic MST
+admissible (A*, ARA*, IDA*, beam search) và heuristic sao gần nhất của Greedy.
+Map quá lớn cho trường của từng POI thì mọi khoảng cách được thay bằng cận dưới
+ALT (algorithms/landmarks.py).
+"""
+from array import array
+from functools import lru_cache
+from typing import Callable, Dict, List, Optional, Tuple
+
+from algorithms.distance_field import UNREACHABLE, distance_field
+from algorithms.jump_point import poi_distances
+from algorithms.landmarks import LandmarkTable, landmark_table
+from algorithms.level_kernel import CompiledLevel
+
+Position = Tuple[int, int]
+
+# Chỉ số POI trong ma trận khoảng cách: 0 = S, 1 = G, 2 + i = sao thứ i
+POI_START = 0
+POI_GOAL = 1
+
+# Tổng số ô của các trường khoảng cách tới POI (4 byte mỗi ô); vượt quá thì
+# heuristic dùng cận dưới ALT từ vài ô mốc thay cho trường của từng POI
+POI_FIELD_BUDGET_CELLS = 64 * 1024 * 1024
+
+def _distance_to(level: CompiledLevel, target: Position) -> array:
+    """Chi phí đi từ mọi ô tới target (mảng phẳng theo cell id; bằng khoảng cách BFS nếu không có địa hình)."""
+    return distance_field(level, [level.cell_id(*target)])
+
+@lru_cache(maxsize=8)
+def compute_poi_fields(level: CompiledLevel) -> List[array]:
+    """Tính trường khoảng cách tới mỗi POI theo thứ tự [S, G, stars...].
+
+    Kết quả được cache theo level và dùng chung giữa các thuật toán, không sửa đổi.
+    """
+    fields_by_cell: Dict[int, array] = {}
+    fields: List[array] = []
+    for cell in [level.start_cell, level.goal_cell] + level.star_cells:
+        if cell not in fields_by_cell:
+            fields_by_cell[cell] = _distance_to(level, level.position(cell))
+        fields.append(fields_by_cell[cell])
+    return fields
+
+def poi_distance_matrix(
+    level: CompiledLevel,
+    poi_fields: Optional[List[array]] = None,
+) -> List[List[float]]:
+    """Tiền xử lý ma trận khoảng cách giữa tất cả POI (S, G, stars).
+
+    distances[i][j] là chi phí đi từ POI i tới POI j. Có địa hình thì ma trận
+    không đối xứng (chi phí tính theo ô đi vào), nên đọc trường của POI đích j.
+    Cặp không tới được mang giá trị inf (MST/heuristic qua cặp đó cũng là inf).
+    """
+    poi_cells = [level.start_cell, level.goal_cell] + level.star_cells
+    
+    # Tính khoảng cách từ mỗi POI đến tất cả các ô
+    if poi_fields is None:
+        poi_fields = compute_poi_fields(level)
+    inf = float('inf')
+    
+    # Lưu khoảng cách giữa các POI
+    distances: List[List[float]] = []
+    for cell in poi_cells:
+        row: List[float] = []
+        for field in poi_fields:
+            dist = field[cell]
+            row.append(inf if dist == UNREACHABLE else dist)
+        distances.append(row)
+    
+    return distances
+
+def compute_mst_weight(remaining: List[int], distances: List[List[float]]) -> float:
+    """Tính trọng số MST của các POI còn lại (theo chỉ số POI) bằng thuật toán Prim."""
+    if len(remaining) <= 1:
+        return 0
+    
+    # Sử dụng Prim's algorithm: best[j] = cạnh nhẹ nhất nối j vào cây hiện tại
+    mst_weight = 0
+    first = remaining[0]
+    best = {j: distances[first][j] for j in remaining[1:]}
+    
+    while best:
+        min_poi = min(best, key=best.__getitem__)
+        mst_weight += best.pop(min_poi)
+        row = distances[min_poi]
+        for j in best:
+            if row[j] < best[j]:
+                best[j] = row[j]
+    
+    return mst_weight
+
+def poi_fields_fit(level: CompiledLevel) -> bool:
+    """Trường khoảng cách của mọi POI có vừa POI_FIELD_BUDGET_CELLS không."""
+    num_pois = len({level.start_cell, level.goal_cell, *level.star_cells})
+    return num_pois * level.size <= POI_FIELD_BUDGET_CELLS
+
+def poi_landmarks(level: CompiledLevel, use_landmarks: Optional[bool] = None) -> Optional[LandmarkTable]:
+    """Bảng mốc ALT nếu heuristic nên dùng cận dưới ALT, ngược lại None.
+
+    use_landmarks=None: tự chọn ALT khi trường của mọi POI vượt POI_FIELD_BUDGET_CELLS.
+    """
+    if use_landmarks is None:
+        use_landmarks = not poi_fields_fit(level)
+    return landmark_table(level) if use_landmarks else None
+
+def build_mst_heuristic(
+    level: CompiledLevel,
+    use_landmarks: Optional[bool] = None,
+) -> Callable[[int, int], float]:
+    """Tạo hàm heuristic MST admissible h(cell, mask) = d(cur, R) + MST(R) + d(R, G).
+
+    Phần chỉ phụ thuộc mask (MST(R) + d(R, G) và danh sách trường khoảng cách
+    của các sao còn lại R) được tính một lần cho mỗi mask và lưu trong bảng
+    đánh chỉ số theo mask. d(cur, R) đọc trực tiếp từ trường khoảng cách
+    (mảng theo cell id) của từng sao, nên mỗi lần tính h chỉ tốn vài phép tra mảng.
+    Trả về inf nếu từ ô hiện tại không tới được sao/G còn lại.
+
+    Map quá lớn cho trường của từng POI (xem poi_landmarks): mọi khoảng cách
+    được thay bằng cận dưới ALT (algorithms/landmarks.py), h vẫn admissible.
+    """
+    landmarks = poi_landmarks(level, use_landmarks)
+    if landmarks is not None:
+        return build_alt_mst_heuristic(level, landmarks)
+    k = len(level.stars)
+    poi_fields = compute_poi_fields(level)
+    distances = poi_distance_matrix(level, poi_fields)
+    # MST dùng min hai chiều: vẫn là cận dưới khi có địa hình (ma trận không đối xứng)
+    undirected = [[min(a, b) for a, b in zip(row, col)] for row, col in zip(distances, zip(*distances))]
+    goal_field = poi_fields[POI_GOAL]
+    inf = float('inf')
+
+    # Bảng theo mask: (MST(R) + d(R, G), các trường khoảng cách của R)
+    mask_table: List[Optional[Tuple[int, List[array]]]] = [None] * (1 << k)
+
+    def mask_entry(mask: int) -> Tuple[int, List[array]]:
+        remaining = [2 + i for i in range(k) if not (mask & (1 << i))]
+        if not remaining:
+            entry = (0, [goal_field])
+        else:
+            # MST(R): trọng số cây khung nhỏ nhất của các sao còn lại
+            mst_weight = compute_mst_weight(remaining, undirected)
+            # d(R, G): khoảng cách ngắn nhất từ một sao trong R đến goal
+            min_dist_stars_to_goal = min(distances[p][POI_GOAL] for p in remaining)
+            entry = (mst_weight + min_dist_stars_to_goal, [poi_fields[p] for p in remaining])
+        mask_table[mask] = entry
+        return entry
+
+    def heuristic(cell: int, mask: int) -> float:
+        entry = mask_table[mask] or mask_entry(mask)
+        base, fields = entry
+        # d(cur, R): khoảng cách ngắn nhất từ ô hiện tại đến một sao trong R
+        nearest = min(field[cell] for field in fields)
+        if nearest == UNREACHABLE:
+            return inf
+        return base + nearest
+
+    return heuristic
+
+def build_alt_mst_heuristic(level: CompiledLevel, landmarks: LandmarkTable) -> Callable[[int, int], float]:
+    """Heuristic MST như build_mst_heuristic nhưng mọi khoảng cách là cận dưới ALT.
+
+    Cận dưới của cạnh cho MST(R) nhỏ hơn cây khung thật, nên h vẫn admissible.
+    Không cần trường khoảng cách nào ngoài các mốc, bộ nhớ không phụ thuộc số sao.
+    Không có địa hình thì khoảng cách giữa các POI là khoảng cách thật, tìm bằng
+    Jump Point Search (nhanh trên sàn trống), cho MST(R) chặt hơn.
+    """
+    k = len(level.stars)
+    poi_cells = [level.start_cell, level.goal_cell] + level.star_cells
+    if level.weighted:
+        distances = [[landmarks.lower_bound(a, b) for b in poi_cells] for a in poi_cells]
+    else:
+        distances = poi_distances(level)
+    undirected = [[min(a, b) for a, b in zip(row, col)] for row, col in zip(distances, zip(*distances))]
+
+    # bounds(cell)[p]: cận dưới khoảng cách từ cell tới POI p
+    bounds = landmarks.bounds_to(poi_cells)
+
+    # Bảng theo mask: (MST(R) + d(R, G), chỉ số POI của R hoặc [G] nếu hết sao)
+    mask_table: List[Optional[Tuple[int, List[int]]]] = [None] * (1 << k)
+
+    def mask_entry(mask: int) -> Tuple[int, List[int]]:
+        remaining = [2 + i for i in range(k) if not (mask & (1 << i))]
+        if not remaining:
+            entry = (0, [POI_GOAL])
+        else:
+            mst_weight = compute_mst_weight(remaining, undirected)
+            min_dist_stars_to_goal = min(distances[p][POI_GOAL] for p in remaining)
+            entry = (mst_weight + min_dist_stars_to_goal, remaining)
+        mask_table[mask] = entry
+        return entry
+
+    def heuristic(cell: int, mask: int) -> float:
+        base, remaining = mask_table[mask] or mask_entry(mask)
+        return base + min(map(bounds(cell).__getitem__, remaining))
+
+    return heuristic
+
+# Tổng số ô của các trường "sao gần nhất theo mask" được giữ (4 byte mỗi ô)
+MASK_FIELD_BUDGET_CELLS = 16 * 1024 * 1024
+
+def build_greedy_heuristic(level: CompiledLevel, use_landmarks: Optional[bool] = None) -> Callable[[int, int], int]:
+    """Tạo heuristic Greedy h(cell, mask) = r·STAR + d(cell, sao còn lại gần nhất) + d(cell, G).
+
+    Khoảng cách là khoảng cách thật trong mê cung (BFS, hoặc chi phí khi có địa
+    hình), không phải Manhattan. r là số sao còn lại và STAR lớn hơn mọi tổng
+    hai khoảng cách, nên nhặt một sao luôn làm h giảm: Greedy đi thẳng tới sao
+    gần nhất thay vì loanh quanh cạnh sao (khoảng cách tới sao kế tiếp thường
+    lớn hơn). Với mỗi mask, trường "sao còn lại gần nhất" được tính một lần bằng
+    BFS đa nguồn từ các sao còn lại, nên mỗi lần tính h chỉ là hai phép tra
+    mảng. Khi số trường vượt MASK_FIELD_BUDGET_CELLS, các mask mới lấy min trên
+    trường của từng sao (k phép tra) thay vì tạo thêm trường.
+
+    Map quá lớn cho trường của từng POI (xem poi_landmarks): khoảng cách
+    tới sao/G là cận dưới ALT từ các ô mốc, không tạo trường nào theo mask.
+    """
+    star_weight = 2 * level.size * level.max_cost + 1
+    landmarks = poi_landmarks(level, use_landmarks)
+    if landmarks is not None:
+        # bounds(cell): cận dưới khoảng cách từ cell tới G rồi tới từng sao
+        bounds = landmarks.bounds_to([level.goal_cell] + level.star_cells)
+
+        # Chỉ số (trong bounds) của các sao còn lại theo mask
+        mask_stars: Dict[int, List[int]] = {}
+
+        def alt_heuristic(cell: int, mask: int) -> int:
+            to_poi = bounds(cell)
+            remaining = mask_stars.get(mask)
+            if remaining is None:
+                remaining = mask_stars[mask] = [1 + i for i in range(len(level.stars)) if not (mask & (1 << i))]
+            if not remaining:
+                return to_poi[0]
+            return len(remaining) * star_weight + min(map(to_poi.__getitem__, remaining)) + to_poi[0]
+
+        return alt_heuristic
+
+    poi_fields = compute_poi_fields(level)
+    goal_field = poi_fields[POI_GOAL]
+    star_fields = poi_fields[2:]
+    max_fields = max(1, MASK_FIELD_BUDGET_CELLS // level.size)
+    all_mask = level.all_mask
+    # Bảng theo mask: (r·STAR, trường khoảng cách tới sao còn lại gần nhất)
+    mask_fields: Dict[int, Tuple[int, array]] = {}
+
+    def mask_entry(mask: int) -> Optional[Tuple[int, array]]:
+        """Tạo trường cho mask bằng BFS đa nguồn; None nếu đã hết ngân sách bộ nhớ."""
+        if len(mask_fields) >= max_fields:
+            return None
+        sources = [cell for i, cell in enumerate(level.star_cells) if not (mask & (1 << i))]
+        entry = mask_fields[mask] = (len(sources) * star_weight, distance_field(level, sources))
+        return entry
+
+    def heuristic(cell: int, mask: int) -> int:
+        entry = mask_fields.get(mask)
+        if entry is None:
+            if mask == all_mask:
+                return goal_field[cell]
+            entry = mask_entry(mask)
+            if entry is None:
+                remaining = [f[cell] for i, f in enumerate(star_fields) if not (mask & (1 << i))]
+                return len(remaining) * star_weight + min(remaining) + goal_field[cell]
+        base, field = entry
+        return base + field[cell] + goal_field[cell]
+
+    return heuristic
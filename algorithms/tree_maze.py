@@ -0,0 +1,97 @@
+"""Lời giải chính xác O(V) cho mê cung dạng cây (perfect maze, không có chu trình).
+
+Trên cây, đường đi ngắn nhất "gom hết sao rồi tới G" là: lấy cây con Steiner
+nối S, G và các sao (cắt dần lá không phải POI), đi vòng quanh cây này (mỗi
+cạnh hai lần) nhưng không quay về từ nhánh chứa G. Độ dài tối ưu bằng
+2·(|T| - 1) - d(S, G), không cần tìm kiếm trên mask.
+Có ô địa hình thì lời giải vẫn tối ưu: mọi cách đi đều phải qua mỗi cạnh của T
+theo cùng các chiều, nên thứ tự ghé các nhánh không làm đổi tổng chi phí.
+"""
+from collections import deque
+from functools import lru_cache
+from typing import Deque, Dict, List, Optional, Set, Tuple
+
+from algorithms.corridor_graph import prune_dead_ends
+from algorithms.level_kernel import CompiledLevel, SearchEvents, search_outcome
+
+Position = Tuple[int, int]
+
+REVERSE_MOVE = {"U": "D", "D": "U", "L": "R", "R": "L"}
+
+
+@lru_cache(maxsize=8)
+def is_tree_maze(level: CompiledLevel) -> bool:
+    """Kiểm tra thành phần liên thông chứa S có phải là cây (số cạnh = số ô - 1)."""
+    neighbors = level.neighbors
+    seen = {level.start_cell}
+    queue: Deque[int] = deque([level.start_cell])
+    degree_sum = 0
+    while queue:
+        cell = queue.popleft()
+        degree_sum += len(neighbors[cell])
+        for ncell, _ in neighbors[cell]:
+            if ncell not in seen:
+                seen.add(ncell)
+                queue.append(ncell)
+    return degree_sum // 2 == len(seen) - 1
+
+
+def tree_search(level: CompiledLevel) -> SearchEvents:
+    """Giải level dạng cây bằng cách đi vòng cây con Steiner (yêu cầu is_tree_maze).
+
+    Generator: yield các ô của cây Steiner theo thứ tự duyệt từ S, return lời giải.
+    """
+    neighbors = level.neighbors
+    alive = prune_dead_ends(level)
+
+    # Cây Steiner = phần còn lại thuộc thành phần chứa S; dựng cha theo BFS từ S
+    parent: Dict[int, Optional[int]] = {level.start_cell: None}
+    queue: Deque[int] = deque([level.start_cell])
+    while queue:
+        cell = queue.popleft()
+        yield level.position(cell)
+        for ncell, _ in neighbors[cell]:
+            if ncell in alive and ncell not in parent:
+                parent[ncell] = cell
+                queue.append(ncell)
+
+    if any(c not in parent for c in [level.goal_cell] + level.star_cells):
+        return search_outcome(level, [], [], False)
+
+    # Các ô trên đường S -> G: nhánh chứa G được đi sau cùng và không quay lại
+    on_goal_path: Set[int] = set()
+    cur: Optional[int] = level.goal_cell
+    while cur is not None:
+        on_goal_path.add(cur)
+        cur = parent[cur]
+
+    def children(cell: int) -> List[Tuple[int, str]]:
+        kids = [(n, m) for n, m in neighbors[cell] if n in alive and n != parent[cell]]
+        kids.sort(key=lambda nm: nm[0] in on_goal_path)
+        return kids
+
+    path: List[Position] = [level.start]
+    moves: List[str] = []
+    # Mỗi khung: [ô, danh sách con, vị trí con kế tiếp, nước đi quay về cha (None nếu không quay về)]
+    stack: List[list] = [[level.start_cell, children(level.start_cell), 0, None]]
+    while stack:
+        frame = stack[-1]
+        cell, kids, i, back = frame
+        if i < len(kids):
+            frame[2] += 1
+            child, move = kids[i]
+            moves.append(move)
+            path.append(level.position(child))
+            if child in on_goal_path:
+                # Con cuối cùng trên đường tới G: không bao giờ quay lại ô này
+                stack.pop()
+                stack.append([child, children(child), 0, None])
+            else:
+                stack.append([child, children(child), 0, REVERSE_MOVE[move]])
+        else:
+            stack.pop()
+            if back is not None:
+                moves.append(back)
+                path.append(level.position(parent[cell]))
+
+    return search_outcome(level, path, moves, True)
@@ -1,6 +1,9 @@
 import os
 from typing import List
 import pygame
+from algorithms.connectivity import find_unreachable
+from algorithms.level_kernel import TILE_CHARS
+from core.paths import LEVELS_DIR
 
 # ================== LEVEL LOADER ==================
 def read_level_txt(path: str) -> List[str]:
@@ -10,17 +13,36 @@ def read_level_txt(path: str) -> List[str]:
     # Tính toán lại chiều rộng dựa trên các hàng đã xóa khoảng trắng.
     w = max(len(r) for r in rows) if rows else 0
     rows = [r.ljust(w, "1") for r in rows]
+    # Giữ các ô địa hình (TERRAIN_COSTS); ký tự lạ coi như sàn trống
+    rows = ["".join(ch if ch in TILE_CHARS else "0" for ch in r) for r in rows]
     return rows
 
-def scan_levels(directory: str):
+def scan_levels(directory: str = LEVELS_DIR):
     if not os.path.isdir(directory): 
         return []
     out = []
     for name in sorted(os.listdir(directory)):
         if name.endswith(".txt"):
-            out.append((name, read_level_txt(os.path.join(directory, name))))
+            rows = read_level_txt(os.path.join(directory, name))
+            _warn_if_unsolvable(name, rows)
+            out.append((name, rows))
     return out
 
+def _warn_if_unsolvable(name: str, rows: List[str]):
+    """Báo level không có lời giải (thiếu S/G, hoặc sao/G bị tường ngăn cách với S).
+
+    Level vẫn được giữ trong danh sách (thứ tự file là số level), nhưng thuật
+    toán sẽ trả về found = False ngay thay vì duyệt hết không gian trạng thái.
+    """
+    try:
+        unreachable = find_unreachable(rows)
+    except ValueError as e:
+        print(f"Warning: {name}: {e}")
+        return
+    if unreachable:
+        cells = ", ".join(f"({x},{y})" for x, y in unreachable)
+        print(f"Warning: {name} không có lời giải, không tới được từ S: {cells}")
+
 # ================== IMAGE LOADER ==================
 _image_cache = {}
 
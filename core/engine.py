@@ -4,6 +4,8 @@ from typing import List
 from dataclasses import dataclass, asdict
 import json
 import os
+from core.paths import BASE_DIR, LEVELS_DIR
+from core.solver_cache import SolverCache
 
 # ================== CONFIG ==================
 WIDTH, HEIGHT = 920, 600
@@ -22,10 +24,18 @@ COLOR_GOAL_UNLOCK = (0, 170, 220)
 COLOR_GOAL_LOCK = (90, 100, 120)
 COLOR_STAR = (255, 200, 40)
 COLOR_HILIGHT = (80, 200, 255)
+# Ô địa hình (xem TERRAIN_COSTS trong algorithms/level_kernel.py)
+COLOR_TERRAIN = {
+    "m": (110, 80, 45),   # bùn
+    "~": (40, 90, 170),   # nước
+}
 
-LEVELS_DIR = "data/levels"
 STATS_FILE = "stats.json"
 MAX_KEEP = 500
+# Cache kết quả thuật toán (bộ nhớ + thư mục trên đĩa)
+SOLVER_CACHE_DIR = os.path.join(BASE_DIR, ".solver_cache")
+SOLVER_CACHE_MAX_BYTES = 64 * 1024 * 1024
+SOLVER_CACHE_MAX_DISK_BYTES = 512 * 1024 * 1024
 
 # ================== DATA STRUCTURES ==================
 @dataclass
@@ -40,6 +50,7 @@ class PlayRecord:
     steps: int
     solver: str = "HUMAN"  # HUMAN | BFS | ...
     nodes_expanded: int = 0  # Số nút đã duyệt bởi thuật toán
+    cost: int = 0  # Tổng chi phí đường đi (ô bùn/nước tốn hơn 1)
 
 class StatsStore:
     def __init__(self, path: str):
@@ -88,6 +99,9 @@ class GameApp:
         self.clock = pygame.time.Clock()
         self.running = True
         self.stats = StatsStore(STATS_FILE)
+        self.solver_cache = SolverCache(
+            SOLVER_CACHE_MAX_BYTES, SOLVER_CACHE_DIR, SOLVER_CACHE_MAX_DISK_BYTES
+        )
         # Scene manager sẽ được truyền vào từ main
         self.scenes = None
 
@@ -0,0 +1,33 @@
+"""Đường dẫn dữ liệu của game, tính từ thư mục chứa repo thay vì thư mục đang chạy.
+
+Module không import pygame để thuật toán (chạy trong worker) dùng được.
+"""
+import os
+import tempfile
+from contextlib import contextmanager
+from typing import IO, Iterator
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DATA_DIR = os.path.join(BASE_DIR, "data")
+LEVELS_DIR = os.path.join(DATA_DIR, "levels")
+
+
+@contextmanager
+def atomic_write(path: str, mode: str = "wb") -> Iterator[IO]:
+    """Mở một file tạm riêng (tên duy nhất, cùng thư mục với path) để ghi, xong thì đổi tên thành path.
+
+    Nhiều tiến trình cùng ghi một path không ghi đè file tạm của nhau; người đọc
+    chỉ thấy file cũ hoặc một file mới hoàn chỉnh. Lỗi giữa chừng thì xóa file tạm.
+    """
+    directory, name = os.path.split(path)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=name + ".", suffix=".tmp")
+    try:
+        with os.fdopen(fd, mode, encoding=None if "b" in mode else "utf-8") as f:
+            yield f
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.unlink(tmp_path)
+        except OSError:
+            pass
+        raise
@@ -0,0 +1,163 @@
+"""Cache kết quả thuật toán theo nội dung level.
+
+Khóa là SHA-256 của (rows, tên thuật toán, tùy chọn), nên chỉ cần nội dung
+level thay đổi (sửa file, sửa trong editor) là khóa đổi theo - không cần
+theo dõi file để xóa cache. Kết quả được giữ trong bộ nhớ theo LRU với giới
+hạn số byte, và (tùy chọn) ghi ra thư mục cache dưới dạng JSON để lần mở
+game sau vẫn dùng lại được. Danh sách tọa độ (có thể hàng trăm nghìn ô với
+"expanded_order") được nén thành mảng int32 mã hóa base64 để đọc lại nhanh.
+"""
+import base64
+import hashlib
+import json
+import os
+from array import array
+from collections import OrderedDict
+from itertools import chain
+from typing import Dict, Optional, Sequence
+
+from core.paths import atomic_write
+
+# Tăng khi định dạng kết quả hoặc thuật toán thay đổi để bỏ cache cũ
+CACHE_VERSION = 4
+
+# Các trường là danh sách tọa độ (x, y), lưu dạng mảng phẳng x0, y0, x1, y1, ...
+_POSITION_FIELDS = ("path", "expanded_order")
+
+
+def make_key(rows: Sequence[str], solver: str, options: Optional[Dict[str, object]] = None) -> str:
+    """Khóa nội dung cho một lần giải: hash của level, thuật toán và tùy chọn."""
+    payload = json.dumps(
+        {
+            "version": CACHE_VERSION,
+            "rows": list(rows),
+            "solver": solver,
+            "options": options or {},
+        },
+        sort_keys=True,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def _encode(result: Dict[str, object]) -> str:
+    data = dict(result)
+    for field in _POSITION_FIELDS:
+        if field in data:
+            flat = array("i", chain.from_iterable(data[field]))
+            data[field] = base64.b64encode(flat.tobytes()).decode("ascii")
+    if "moves" in data:
+        data["moves"] = "".join(data["moves"])
+    return json.dumps(data, separators=(",", ":"))
+
+
+def _decode(raw: str) -> Dict[str, object]:
+    result = json.loads(raw)
+    for field in _POSITION_FIELDS:
+        if field in result:
+            flat = array("i")
+            flat.frombytes(base64.b64decode(result[field]))
+            it = iter(flat)
+            result[field] = list(zip(it, it))
+    if "moves" in result:
+        result["moves"] = list(result["moves"])
+    return result
+
+
+class SolverCache:
+    """LRU trong bộ nhớ (giới hạn theo byte) + kho trên đĩa tùy chọn."""
+
+    def __init__(
+        self,
+        max_bytes: int,
+        cache_dir: Optional[str] = None,
+        max_disk_bytes: Optional[int] = None,
+    ):
+        self.max_bytes = max_bytes
+        self.cache_dir = cache_dir
+        self.max_disk_bytes = max_disk_bytes
+        # key -> (kết quả, kích thước JSON tính bằng byte)
+        self.entries = OrderedDict()
+        self.total_bytes = 0
+
+    def get(self, key: str) -> Optional[Dict[str, object]]:
+        entry = self.entries.get(key)
+        if entry is not None:
+            self.entries.move_to_end(key)
+            return entry[0]
+
+        path = self._disk_path(key)
+        if path is None or not os.path.isfile(path):
+            return None
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                raw = f.read()
+            result = _decode(raw)
+        except (OSError, ValueError):
+            return None
+        # Đánh dấu vừa dùng để không bị dọn trước
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        self._remember(key, result, len(raw))
+        return result
+
+    def put(self, key: str, result: Dict[str, object]) -> None:
+        raw = _encode(result)
+        self._remember(key, result, len(raw))
+
+        path = self._disk_path(key)
+        if path is None:
+            return
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            with atomic_write(path, "w") as f:
+                f.write(raw)
+        except OSError:
+            return
+        self._prune_disk()
+
+    def clear(self) -> None:
+        self.entries.clear()
+        self.total_bytes = 0
+
+    def _remember(self, key: str, result: Dict[str, object], nbytes: int) -> None:
+        old = self.entries.pop(key, None)
+        if old is not None:
+            self.total_bytes -= old[1]
+        # Kết quả lớn hơn cả ngân sách thì chỉ giữ trên đĩa
+        if nbytes > self.max_bytes:
+            return
+        self.entries[key] = (result, nbytes)
+        self.total_bytes += nbytes
+        while self.total_bytes > self.max_bytes:
+            _, (_, evicted) = self.entries.popitem(last=False)
+            self.total_bytes -= evicted
+
+    def _disk_path(self, key: str) -> Optional[str]:
+        if self.cache_dir is None:
+            return None
+        return os.path.join(self.cache_dir, key + ".json")
+
+    def _prune_disk(self) -> None:
+        """Xóa các file ít dùng nhất (theo mtime) khi thư mục vượt giới hạn."""
+        if self.max_disk_bytes is None:
+            return
+        try:
+            files = []
+            total = 0
+            for name in os.listdir(self.cache_dir):
+                if not name.endswith(".json"):
+                    continue
+                path = os.path.join(self.cache_dir, name)
+                st = os.stat(path)
+                files.append((st.st_mtime, st.st_size, path))
+                total += st.st_size
+            files.sort()
+            for _, size, path in files:
+                if total <= self.max_disk_bytes:
+                    break
+                os.remove(path)
+                total -= size
+        except OSError:
+            pass
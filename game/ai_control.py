@@ -1,47 +1,97 @@
+import os
 import pygame
-from typing import List, Optional, Tuple
-from algorithms.BFS import bfs_collect_all_stars_with_trace
-from algorithms.AStar import astar_collect_all_stars_with_trace
-from algorithms.Greedy import greedy_collect_all_stars_with_trace
-from algorithms.DFS import dfs_collect_all_stars_with_trace
-from algorithms.UCS import ucs_collect_all_stars_with_trace
+import time
+from array import array
+from collections import deque
+from typing import Deque, Dict, List, Optional, Set, Tuple
+from algorithms.BeamSearch import DEFAULT_BEAM_WIDTH
+from algorithms.DStarLite import DStarLitePlanner
+from algorithms.level_kernel import TERRAIN_COSTS
+from core.solver_cache import make_key
+from game.solver_worker import SolverWorker
+
+# Map lớn hơn kích thước tối đa của editor (50x50): UCS/A* tìm trên đồ thị hành lang
+CORRIDOR_GRAPH_MIN_CELLS = 50 * 50
+
+# Nhấn phím liên tục trong khoảng này chỉ khởi động một lượt tìm kiếm (lượt cuối)
+SOLVE_COALESCE_SEC = 0.15
+
+# ARA*: thời gian tìm kiếm tối đa, ưu tiên có đường đi chơi được ngay trên map lớn
+ARASTAR_TIME_BUDGET_SEC = 0.1
+
+# A*/UCS trên level từ ngần này sao: tìm song song (HDA*) với mọi nhân của máy
+PARALLEL_MIN_STARS = 10
+PARALLEL_WORKERS = os.cpu_count() or 1
+
+# Beam search: độ rộng W chỉnh bằng phím [ ] (nhân/chia 2) trong khoảng này
+BEAM_WIDTH_MIN = 1
+BEAM_WIDTH_MAX = 4096
 
 class AIController:
     def __init__(self):
-        self.active: Optional[str] = None  # "BFS" | "AStar" | "Greedy" | "DFS" | "UCS" | others in tương lai
+        self.active: Optional[str] = None  # "BFS" | "AStar" | "Greedy" | "DFS" | "UCS" | "HeldKarp" | "ARAStar" | "IDAStar" | "Beam" | "HPAStar" | others in tương lai
         self.display_active: Optional[str] = None  # luôn giữ tên thuật toán để hiển thị
         self.moves: List[str] = []
         self.move_index: int = 0
-        # Tracing
-        self.trace_positions: List[Tuple[int, int]] = []
-        self.trace_index: int = 0
+        # Tracing: các lô ô mở rộng do worker gửi về, mỗi frame hiển thị một ô
+        self.trace_batches: Deque[array] = deque()  # x, y liên tiếp
+        self.trace_offset: int = 0  # vị trí đang đọc trong lô đầu
+        self.trace_finished: bool = False  # worker đã gửi hết quá trình duyệt
+        self.trace_positions: List[Tuple[int, int]] = []  # các ô đã duyệt (không trùng)
+        self.trace_seen: Set[Tuple[int, int]] = set()
+        self.trace_current: Optional[Tuple[int, int]] = None
+        self.trace_count: int = 0  # số sự kiện mở rộng đã hiển thị
         self.showing_trace: bool = False
+        self.has_result: bool = False  # đã có moves (từ cache/worker)
         # Solution execution visualization
         self.solution_path: List[Tuple[int, int]] = []  # gồm cả điểm bắt đầu
         # Thống kê thuật toán
         self.nodes_expanded: int = 0  # Số nút đã duyệt
+        self.solution_bound: Optional[float] = None  # ARA*: chi phí <= bound · tối ưu
+        self.beam_width: int = DEFAULT_BEAM_WIDTH
+        # Giải trong tiến trình riêng: yêu cầu đang chờ (gộp phím nhấn liên tục) và worker
+        self.worker = SolverWorker()
+        # (thuật toán, rows, options, tùy chọn quá trình duyệt, khóa cache hoặc None nếu chỉ cần quá trình duyệt)
+        self.pending: Optional[Tuple[str, List[str], Dict[str, object], Dict[str, object], Optional[str]]] = None
+        self.pending_since: float = 0.0
+        self.running_key: Optional[str] = None  # khóa cache của lượt worker đang chạy
+        # Xem trước đường đi (phím P): D* Lite cập nhật tăng dần theo từng bước người chơi
+        self.preview_planner: Optional[DStarLitePlanner] = None
+        self.preview_path: List[Tuple[int, int]] = []
 
     def reset(self):
         # Không xóa display_active để vẫn hiển thị tên thuật toán đã chọn
+        self.cancel_solve()
         self.active = None
         self.moves = []
         self.move_index = 0
-        self.trace_positions = []
-        self.trace_index = 0
+        self._reset_trace()
         self.showing_trace = False
+        self.has_result = False
         self.solution_path = []
         self.nodes_expanded = 0
+        self.solution_bound = None
+
+    def _reset_trace(self):
+        self.trace_batches = deque()
+        self.trace_offset = 0
+        self.trace_finished = False
+        self.trace_positions = []
+        self.trace_seen = set()
+        self.trace_current = None
+        self.trace_count = 0
 
     def _build_rows_from_scene(self, level_scene) -> List[str]:
         # Tạo lưới ký tự từ scene hiện tại: sử dụng tường từ grid, sao theo remaining, S/G theo vị trí hiện tại
         W, H = level_scene.grid.W, level_scene.grid.H
         chars = [["0" for _ in range(W)] for _ in range(H)]
 
-        # Walls
+        # Walls và ô địa hình (bùn/nước)
         for y in range(H):
             for x in range(W):
-                if level_scene.grid.get_cell(x, y) == "1":
-                    chars[y][x] = "1"
+                ch = level_scene.grid.get_cell(x, y)
+                if ch == "1" or ch in TERRAIN_COSTS:
+                    chars[y][x] = ch
 
         # Stars còn lại
         for (sx, sy) in level_scene.star_collector.get_remaining_stars():
@@ -57,80 +107,184 @@ class AIController:
 
         return ["".join(row) for row in chars]
 
-    def _compute_bfs(self, level_scene):
+    def _use_corridor_graph(self, level_scene) -> bool:
+        return level_scene.grid.W * level_scene.grid.H > CORRIDOR_GRAPH_MIN_CELLS
+
+    def _use_parallel(self, level_scene) -> bool:
+        return PARALLEL_WORKERS >= 2 and level_scene.star_collector.stars_total >= PARALLEL_MIN_STARS
+
+    def _parallel_options(self, level_scene) -> Dict[str, object]:
+        """Tùy chọn chỉ dùng trong worker: nhiều sao và máy nhiều nhân thì A*/UCS chạy HDA*.
+
+        Khi đó tìm trên (ô, mask) của cả map thay vì đồ thị hành lang tuần tự.
+        """
+        if not self._use_parallel(level_scene):
+            return {}
+        return {"workers": PARALLEL_WORKERS, "contract_corridors": False}
+
+    def _run_solver(self, level_scene, solver_name: str, worker_options: Optional[Dict[str, object]] = None, **options):
+        """Lấy kết quả từ cache nếu level/tùy chọn không đổi, ngược lại xếp lượt giải cho worker.
+
+        worker_options ghi đè options khi giải (vd. số tiến trình của HDA*);
+        quá trình duyệt hiển thị trong game vẫn là của generator với options.
+        Game không tự chạy thuật toán: quá trình duyệt cũng do worker gửi về,
+        kể cả khi đã có kết quả trong cache.
+        """
         rows = self._build_rows_from_scene(level_scene)
-        res = bfs_collect_all_stars_with_trace(rows)
-        if not res.get("found"):
-            self.reset()
-            return
-        self.moves = res.get("moves", [])
-        self.move_index = 0
-        self.trace_positions = res.get("expanded_order", [])
-        self.trace_index = 0
+        self._reset_trace()
         self.showing_trace = True
-        self.solution_path = res.get("path", [])
-        self.nodes_expanded = res.get("nodes_expanded", 0)
+        trace_options = options
+        options = {**options, **(worker_options or {})}
+        cache = getattr(level_scene.game, "solver_cache", None)
+        key = make_key(rows, solver_name, options)
+        res = cache.get(key) if cache is not None else None
+        if res is not None:
+            self._apply_result(res)
+            if not self.has_result:
+                # Không có lời giải: AI đã tắt, không cần quá trình duyệt
+                return
+            key = None
+        # Worker chỉ được khởi động trong update() sau SOLVE_COALESCE_SEC
+        self.pending = (solver_name, rows, options, trace_options, key)
+        self.pending_since = time.monotonic()
 
-    def _compute_astar(self, level_scene):
-        rows = self._build_rows_from_scene(level_scene)
-        res = astar_collect_all_stars_with_trace(rows)
+    def _apply_result(self, res):
         if not res.get("found"):
             self.reset()
             return
         self.moves = res.get("moves", [])
         self.move_index = 0
-        self.trace_positions = res.get("expanded_order", [])
-        self.trace_index = 0
-        self.showing_trace = True
         self.solution_path = res.get("path", [])
         self.nodes_expanded = res.get("nodes_expanded", 0)
+        self.solution_bound = res.get("bound")
+        self.has_result = True
+
+    def is_solving(self) -> bool:
+        # Worker chỉ gửi quá trình duyệt (kết quả đã có từ cache) thì không tính là đang tìm
+        return not self.has_result and (self.pending is not None or self.worker.busy)
+
+    def solve_progress(self) -> int:
+        """Số nút worker đã mở rộng tới thời điểm hiện tại."""
+        return self.worker.nodes_expanded
+
+    def cancel_solve(self):
+        """Bỏ yêu cầu đang chờ và dừng worker (nếu đang tìm)."""
+        self.pending = None
+        self.worker.cancel()
+
+    def update(self, level_scene):
+        """Gọi mỗi frame: khởi động lượt giải đang chờ và nhận kết quả từ worker."""
+        if self.pending is not None and time.monotonic() - self.pending_since >= SOLVE_COALESCE_SEC:
+            solver_name, rows, options, trace_options, key = self.pending
+            self.pending = None
+            self.running_key = key
+            self.worker.start(solver_name, rows, options, trace_options, solve=key is not None)
+        while True:
+            msg = self.worker.poll()
+            if msg is None:
+                return
+            kind, payload = msg
+            if kind == "trace":
+                batch = array('i')
+                batch.frombytes(payload)
+                self.trace_batches.append(batch)
+            elif kind == "trace_end":
+                self.trace_finished = True
+            elif kind == "done":
+                self.trace_finished = True
+                if payload is None:
+                    # Lượt chỉ gửi quá trình duyệt: kết quả đã áp dụng từ cache
+                    return
+                cache = getattr(level_scene.game, "solver_cache", None)
+                if cache is not None:
+                    cache.put(self.running_key, payload)
+                self._apply_result(payload)
+                return
+            else:
+                # Lỗi trong worker: tắt AI để người chơi điều khiển
+                self.reset()
+                return
+
+    def _compute_bfs(self, level_scene):
+        # BFS theo lớp song song cho cùng lời giải với BFS tuần tự
+        workers = PARALLEL_WORKERS if self._use_parallel(level_scene) else 1
+        self._run_solver(level_scene, "BFS", worker_options={"workers": workers} if workers > 1 else None)
+
+    def _compute_astar(self, level_scene):
+        self._run_solver(
+            level_scene,
+            "AStar",
+            worker_options=self._parallel_options(level_scene),
+            contract_corridors=self._use_corridor_graph(level_scene),
+        )
 
     def _compute_greedy(self, level_scene):
-        rows = self._build_rows_from_scene(level_scene)
-        res = greedy_collect_all_stars_with_trace(rows)
-        if not res.get("found"):
-            self.reset()
-            return
-        self.moves = res.get("moves", [])
-        self.move_index = 0
-        self.trace_positions = res.get("expanded_order", [])
-        self.trace_index = 0
-        self.showing_trace = True
-        self.solution_path = res.get("path", [])
-        self.nodes_expanded = res.get("nodes_expanded", 0)
+        self._run_solver(level_scene, "Greedy")
 
     def _compute_dfs(self, level_scene):
-        rows = self._build_rows_from_scene(level_scene)
-        res = dfs_collect_all_stars_with_trace(rows)
-        if not res.get("found"):
-            self.reset()
-            return
-        self.moves = res.get("moves", [])
-        self.move_index = 0
-        self.trace_positions = res.get("expanded_order", [])
-        self.trace_index = 0
-        self.showing_trace = True
-        self.solution_path = res.get("path", [])
-        self.nodes_expanded = res.get("nodes_expanded", 0)
+        self._run_solver(level_scene, "DFS")
 
     def _compute_ucs(self, level_scene):
-        rows = self._build_rows_from_scene(level_scene)
-        res = ucs_collect_all_stars_with_trace(rows)
-        if not res.get("found"):
-            self.reset()
+        self._run_solver(
+            level_scene,
+            "UCS",
+            worker_options=self._parallel_options(level_scene),
+            contract_corridors=self._use_corridor_graph(level_scene),
+        )
+
+    def _compute_heldkarp(self, level_scene):
+        self._run_solver(level_scene, "HeldKarp")
+
+    def _compute_arastar(self, level_scene):
+        self._run_solver(level_scene, "ARAStar", time_budget=ARASTAR_TIME_BUDGET_SEC)
+
+    def _compute_idastar(self, level_scene):
+        self._run_solver(level_scene, "IDAStar")
+
+    def _compute_hpastar(self, level_scene):
+        self._run_solver(level_scene, "HPAStar")
+
+    def _compute_beam(self, level_scene):
+        self._run_solver(level_scene, "Beam", width=self.beam_width)
+
+    def _start_beam(self, level_scene):
+        level_scene.reset_game_state()  # Reset game về trạng thái ban đầu
+        self.active = "Beam"
+        self.display_active = f"Beam (W={self.beam_width})"
+        self._compute_beam(level_scene)
+
+    def toggle_preview(self, level_scene):
+        """Bật/tắt xem trước đường đi tối ưu từ vị trí hiện tại của người chơi."""
+        if self.preview_planner is not None:
+            self.preview_planner = None
+            self.preview_path = []
             return
-        self.moves = res.get("moves", [])
-        self.move_index = 0
-        self.trace_positions = res.get("expanded_order", [])
-        self.trace_index = 0
-        self.showing_trace = True
-        self.solution_path = res.get("path", [])
-        self.nodes_expanded = res.get("nodes_expanded", 0)
+        # Planner dựng trên level gốc; sao đã nhặt được truyền qua mask
+        rows = ["".join(row) for row in level_scene.grid.grid]
+        self.preview_planner = DStarLitePlanner(rows)
+        self.update_preview(level_scene)
+
+    def update_preview(self, level_scene):
+        """Gọi sau mỗi bước đi: chỉ sửa lại phần cây tìm kiếm bị ảnh hưởng."""
+        planner = self.preview_planner
+        if planner is None:
+            return
+        remaining = level_scene.star_collector.get_remaining_stars()
+        mask = 0
+        for i, star in enumerate(planner.level.stars):
+            if star not in remaining:
+                mask |= 1 << i
+        planner.move_start((level_scene.player.gx, level_scene.player.gy), mask)
+        res = planner.plan()
+        self.preview_path = res.get("path", []) if res.get("found") else []
 
     def handle_event(self, e, level_scene):
         if e.type != pygame.KEYDOWN:
             return
-        # Phím số 1: BFS; 2: DFS; 3: UCS; 4: Greedy; 5: A*
+        if e.key == pygame.K_p:
+            self.toggle_preview(level_scene)
+            return
+        # Phím số 1: BFS; 2: DFS; 3: UCS; 4: Greedy; 5: A*; 6: Held-Karp; 7: ARA*; 8: IDA*; 9: Beam; H: HPA*
         if e.key == pygame.K_1:
             level_scene.reset_game_state()  # Reset game về trạng thái ban đầu
             self.active = "BFS"
@@ -156,8 +310,38 @@ class AIController:
             self.active = "AStar"
             self.display_active = "AStar"
             self._compute_astar(level_scene)
-        elif e.key in (pygame.K_6, pygame.K_7, pygame.K_8, pygame.K_9, pygame.K_0):
-            # Chưa có, tắt AI để người chơi điều khiển
+        elif e.key == pygame.K_6:
+            level_scene.reset_game_state()  # Reset game về trạng thái ban đầu
+            self.active = "HeldKarp"
+            self.display_active = "HeldKarp"
+            self._compute_heldkarp(level_scene)
+        elif e.key == pygame.K_7:
+            level_scene.reset_game_state()  # Reset game về trạng thái ban đầu
+            self.active = "ARAStar"
+            self.display_active = "ARAStar"
+            self._compute_arastar(level_scene)
+        elif e.key == pygame.K_8:
+            level_scene.reset_game_state()  # Reset game về trạng thái ban đầu
+            self.active = "IDAStar"
+            self.display_active = "IDAStar"
+            self._compute_idastar(level_scene)
+        elif e.key == pygame.K_9:
+            self._start_beam(level_scene)
+        elif e.key == pygame.K_h:
+            level_scene.reset_game_state()  # Reset game về trạng thái ban đầu
+            self.active = "HPAStar"
+            self.display_active = "HPAStar"
+            self._compute_hpastar(level_scene)
+        elif e.key in (pygame.K_LEFTBRACKET, pygame.K_RIGHTBRACKET):
+            # [ ]: chia/nhân đôi độ rộng beam; đang dùng Beam thì giải lại với W mới
+            if e.key == pygame.K_LEFTBRACKET:
+                self.beam_width = max(BEAM_WIDTH_MIN, self.beam_width // 2)
+            else:
+                self.beam_width = min(BEAM_WIDTH_MAX, self.beam_width * 2)
+            if self.active == "Beam":
+                self._start_beam(level_scene)
+        elif e.key == pygame.K_0:
+            # Phím 0: tắt AI để người chơi điều khiển (đồng thời hủy lượt tìm đang chạy)
             level_scene.reset_game_state()  # Reset game về trạng thái ban đầu
             self.reset()
             self.display_active = None
@@ -166,7 +350,7 @@ class AIController:
         """Trả về (dx, dy) bước tiếp theo theo AI, hoặc None nếu không có/đã xong."""
         if self.active is None:
             return None
-        if self.showing_trace:
+        if self.showing_trace or self.is_solving():
             return None
         if self.move_index >= len(self.moves):
             self.reset()
@@ -184,23 +368,33 @@ class AIController:
         return None
 
     def tick_trace(self):
-        """Tiến một frame hiển thị duyệt. Khi xong sẽ chuyển sang phát các moves."""
+        """Hiển thị thêm một ô mở rộng từ các lô worker gửi về. Khi hết sẽ chuyển sang phát các moves."""
         if not self.showing_trace:
             return
-        self.trace_index += 1
-        if self.trace_index >= len(self.trace_positions):
-            self.showing_trace = False
+        batches = self.trace_batches
+        while batches and self.trace_offset >= len(batches[0]):
+            batches.popleft()
+            self.trace_offset = 0
+        if not batches:
+            # Chưa có lô mới (worker đang tìm) hoặc đã phát hết
+            if self.trace_finished:
+                self.trace_current = None
+                self.showing_trace = False
+            return
+        batch, i = batches[0], self.trace_offset
+        pos = (batch[i], batch[i + 1])
+        self.trace_offset = i + 2
+        self.trace_count += 1
+        self.trace_current = pos
+        if pos not in self.trace_seen:
+            self.trace_seen.add(pos)
+            self.trace_positions.append(pos)
 
     def get_trace_progress(self) -> Tuple[List[Tuple[int, int]], Optional[Tuple[int, int]]]:
         """Trả về danh sách ô đã duyệt và ô đang focus."""
         if not self.showing_trace:
             return [], None
-        idx = max(0, min(self.trace_index, len(self.trace_positions)))
-        visited_list = self.trace_positions[:idx]
-        cur = None
-        if idx < len(self.trace_positions):
-            cur = self.trace_positions[idx]
-        return visited_list, cur
+        return self.trace_positions, self.trace_current
 
     def get_solution_progress(self) -> Tuple[List[Tuple[int, int]], List[Tuple[int, int]]]:
         """Trả về (visited_nodes, remaining_nodes) theo tiến độ move_index."""
@@ -1,5 +1,6 @@
 # maze_explorer/game/grid.py
 from typing import List, Tuple, Set
+from algorithms.level_kernel import tile_cost
 
 class Grid:
     def __init__(self, rows: List[str]):
@@ -26,6 +27,10 @@ class Grid:
         """Kiểm tra xem vị trí (x,y) có bị chặn không"""
         return x < 0 or y < 0 or x >= self.W or y >= self.H or self.grid[y][x] == "1"
     
+    def move_cost(self, x: int, y: int) -> int:
+        """Chi phí đi vào ô (x,y): 1 cho ô thường, lớn hơn cho bùn/nước"""
+        return tile_cost(self.get_cell(x, y))
+
     def get_cell(self, x: int, y: int) -> str:
         """Lấy ký tự tại vị trí (x,y)"""
         if 0 <= x < self.W and 0 <= y < self.H:
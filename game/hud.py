@@ -22,7 +22,7 @@ class HUD:
         return f"{sec//60:02d}:{sec%60:02d}"
     
     def draw_game_hud(self, screen, level_name: str, time_elapsed: int, score: int, 
-                     stars_collected: int, stars_total: int, steps: int, nodes_expanded):
+                     stars_collected: int, stars_total: int, steps: int, nodes_expanded, cost=None):
         """Vẽ HUD trong game với layout mới"""
         sw, sh = screen.get_size()
         
@@ -58,10 +58,17 @@ class HUD:
         steps_text = self.small_font.render(f"Steps: {steps}", True, (220, 230, 240))
         steps_rect = steps_text.get_rect(topright=(sw - 20, 200))
         screen.blit(steps_text, steps_rect)
+        info_y = 220
+        # Tổng chi phí (chỉ với level có ô địa hình, khi đó khác số bước)
+        if cost is not None:
+            cost_text = self.small_font.render(f"Cost: {cost}", True, (220, 230, 240))
+            cost_rect = cost_text.get_rect(topright=(sw - 20, info_y))
+            screen.blit(cost_text, cost_rect)
+            info_y += 20
         # Nodes expanded (under steps) - chỉ hiển thị sau khi hoàn tất (khi không phải None)
         if nodes_expanded is not None:
             expanded_text = self.small_font.render(f"Expanded: {nodes_expanded}", True, (255, 200, 120))
-            expanded_rect = expanded_text.get_rect(topright=(sw - 20, 220))
+            expanded_rect = expanded_text.get_rect(topright=(sw - 20, info_y))
             screen.blit(expanded_text, expanded_rect)
         
         # Algorithm selection panel (left side)
@@ -86,7 +93,14 @@ class HUD:
             "2 - DFS", 
             "3 - UCS",
             "4 - Greedy",
-            "5 - A*"
+            "5 - A*",
+            "6 - Held-Karp",
+            "7 - ARA* (anytime)",
+            "8 - IDA* (ít bộ nhớ)",
+            "9 - Beam ([ ]: độ rộng W)",
+            "H - HPA* (map rất lớn)",
+            "0 - Tắt AI / hủy tìm kiếm",
+            "P - Xem trước đường đi"
         ]
         
         pad_x, pad_y = 12, 8
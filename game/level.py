@@ -4,7 +4,7 @@ import time
 from typing import List
 from core.engine import (
     COLOR_BG, COLOR_WALL, COLOR_PATH, COLOR_PLAYER, COLOR_GOAL_UNLOCK, 
-    COLOR_GOAL_LOCK, COLOR_STAR, GRID_OFFSET_X, GRID_OFFSET_Y, TILE,
+    COLOR_GOAL_LOCK, COLOR_STAR, COLOR_TERRAIN, GRID_OFFSET_X, GRID_OFFSET_Y, TILE,
     PlayRecord
 )
 from core.scene import Scene
@@ -33,6 +33,8 @@ class LevelScene(Scene):
         # Game state
         self.score = 0
         self.steps = 0
+        self.cost = 0  # Tổng chi phí đã đi (ô bùn/nước tốn hơn 1)
+        self.has_terrain = any(ch in COLOR_TERRAIN for row in self.grid.grid for ch in row)
         self.time_elapsed = 0
         self.cool = 0  # Cooldown cho movement
         self.result = None
@@ -140,6 +142,7 @@ class LevelScene(Scene):
     def handle_event(self, e):
         if e.type == pygame.KEYDOWN and e.key == pygame.K_ESCAPE:
             from game.scenes import LevelSelectScene
+            self.ai.cancel_solve()
             self.game.scenes.switch(LevelSelectScene(self.game))
         elif e.type == pygame.MOUSEBUTTONDOWN:
             if e.button == 1:  # Left click
@@ -148,6 +151,7 @@ class LevelScene(Scene):
                 back_rect = pygame.Rect(20, 20, 80, 40)
                 if back_rect.collidepoint(mouse_x, mouse_y):
                     from game.scenes import LevelSelectScene
+                    self.ai.cancel_solve()
                     self.game.scenes.switch(LevelSelectScene(self.game))
                     return
                 # Nếu đã thắng và không phải Level 8: kiểm tra nút Next Level
@@ -180,7 +184,12 @@ class LevelScene(Scene):
         if self.result:
             return
 
-        self.time_elapsed += dt
+        # Nhận kết quả từ worker; trong lúc tìm kiếm người chơi đứng yên tại điểm xuất phát
+        self.ai.update(self)
+        solving = self.ai.is_solving()
+
+        if not solving:
+            self.time_elapsed += dt
         keys = pygame.key.get_pressed()
         self.cool -= dt
         
@@ -195,7 +204,7 @@ class LevelScene(Scene):
                 step = self.ai.get_next_step()
             if step is not None:
                 dx, dy = step
-            else:
+            elif not solving:
                 # Người chơi điều khiển
                 if keys[pygame.K_LEFT]:
                     dx = -1
@@ -221,14 +230,19 @@ class LevelScene(Scene):
                 if not self.grid.is_blocked(nx, ny):
                     self.player.gx, self.player.gy = nx, ny
                     self.steps += 1
+                    self.cost += self.grid.move_cost(nx, ny)
                     self._on_step()
-                self.cool = 110
+                    # Đi vào bùn/nước chậm hơn theo chi phí của ô
+                    self.cool = 110 * self.grid.move_cost(nx, ny)
+                else:
+                    self.cool = 110
 
     def _on_step(self):
         """Xử lý khi player di chuyển"""
         # Thu thập ngôi sao
         if self.star_collector.collect_star_at(self.player.gx, self.player.gy):
             self.score += 10
+        self.ai.update_preview(self)
         
         # Kiểm tra điều kiện thắng
         player_pos = (self.player.gx, self.player.gy)
@@ -249,6 +263,7 @@ class LevelScene(Scene):
         # Reset game state
         self.score = 0
         self.steps = 0
+        self.cost = 0
         self.time_elapsed = 0
         self.cool = 0
         self.result = None
@@ -256,6 +271,7 @@ class LevelScene(Scene):
         
         # Reset AI controller
         self.ai.reset()
+        self.ai.update_preview(self)
         self.nodes_expanded_display = 0
 
     def _finish(self):
@@ -281,7 +297,8 @@ class LevelScene(Scene):
             stars_total=self.star_collector.stars_total,
             steps=self.steps,
             solver=(self.ai.active if self.ai.active else "HUMAN"),
-            nodes_expanded=self.ai.nodes_expanded
+            nodes_expanded=self.ai.nodes_expanded,
+            cost=self.cost
         )
         self.game.stats.add(rec)
         # Lưu để hiển thị trên HUD sau khi hoàn tất thực thi lời giải
@@ -317,11 +334,12 @@ class LevelScene(Scene):
         if getattr(self, 'img_bg', None):
             screen.blit(self.img_bg, (0, 80))
         
-        # Vẽ nền cho tất cả các ô (đường đi)
+        # Vẽ nền cho tất cả các ô (đường đi), ô địa hình theo màu riêng
         for y in range(self.grid.H):
             for x in range(self.grid.W):
-                if self.grid.get_cell(x, y) != "1":  # Chỉ vẽ nền cho ô không phải tường
-                    pygame.draw.rect(screen, COLOR_PATH, (
+                ch = self.grid.get_cell(x, y)
+                if ch != "1":  # Chỉ vẽ nền cho ô không phải tường
+                    pygame.draw.rect(screen, COLOR_TERRAIN.get(ch, COLOR_PATH), (
                         self.offset_x + x * self.tile,
                         self.offset_y + y * self.tile,
                         self.tile, self.tile
@@ -360,6 +378,19 @@ class LevelScene(Scene):
                     # Viền trắng 2px để cực kỳ nổi bật trên mọi nền
                     pygame.draw.rect(screen, (255, 255, 255), rect, 2)
 
+        # Vẽ xem trước đường đi (phím P) khi người chơi tự điều khiển
+        if self.ai.preview_path and not self.ai.active:
+            s_preview = pygame.Surface((self.tile, self.tile), pygame.SRCALPHA)
+            s_preview.fill((255, 220, 0, 90))
+            for (px, py) in self.ai.preview_path[1:]:
+                screen.blit(
+                    s_preview,
+                    (
+                        self.offset_x + px * self.tile,
+                        self.offset_y + py * self.tile,
+                    ),
+                )
+
         # Vẽ overlay quá trình thực thi lời giải (sau khi trace xong và đang phát moves)
         if self.ai.active and not getattr(self.ai, 'showing_trace', False):
             visited_nodes, remaining_nodes = self.ai.get_solution_progress()
@@ -443,7 +474,8 @@ class LevelScene(Scene):
         self.hud.draw_game_hud(
             screen, self.name, self.time_elapsed, self.score,
             self.star_collector.stars_collected, self.star_collector.stars_total,
-            self.steps, (self.nodes_expanded_display if self.result == "WIN" else None)
+            self.steps, (self.nodes_expanded_display if self.result == "WIN" else None),
+            cost=(self.cost if self.has_terrain else None)
         )
         
         # Vẽ kết quả
@@ -466,6 +498,13 @@ class LevelScene(Scene):
         # Luôn hiển thị tên thuật toán đã chọn gần đây (nếu có)
         if getattr(self.ai, 'display_active', None):
             label = f"AI: {self.ai.display_active}"
+            bound = self.ai.solution_bound
+            if bound is not None and bound > 1.0 and not self.ai.is_solving():
+                # ARA* hết thời gian trước khi chứng minh tối ưu: chi phí <= bound · tối ưu
+                label += f" (≤ {bound:.2f}× tối ưu)"
+            if self.ai.is_solving():
+                # Đang tìm trong worker: hiện số nút đã mở rộng, phím 0 để hủy
+                label += f" - đang tìm... {self.ai.solve_progress():,} nút (0: hủy)"
             surf = self.font_ai.render(label, True, (255, 255, 255))
             sw, sh = screen.get_size()
             rect = surf.get_rect()
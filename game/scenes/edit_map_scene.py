@@ -1,5 +1,10 @@
 import pygame
+from core.engine import COLOR_TERRAIN
 from core.scene import Scene
+from algorithms.DStarLite import DStarLitePlanner
+from algorithms.HPAStar import update_abstraction
+from algorithms.connectivity import find_unreachable
+from algorithms.level_kernel import TERRAIN_COSTS, tile_cost
 
 
 class EditMapScene(Scene):
@@ -29,6 +34,8 @@ class EditMapScene(Scene):
         self.color_start = (100, 255, 100)  # Start position (green)
         self.color_goal = (255, 100, 100)  # Goal position (red)
         self.color_star = (255, 255, 100)  # Star color (yellow)
+        self.color_mud = COLOR_TERRAIN["m"]  # Mud (chi phí TERRAIN_COSTS["m"])
+        self.color_water = COLOR_TERRAIN["~"]  # Water (chi phí TERRAIN_COSTS["~"])
         self.color_selected = (255, 200, 100)  # Selected cell (orange)
         
         # Grid settings - will be set dynamically based on loaded level or custom size
@@ -52,11 +59,12 @@ class EditMapScene(Scene):
         self.last_mouse_pos = (0, 0)
         
         # Editor state
-        self.selected_tool = 0  # 0=Wall, 1=Floor, 2=Start, 3=Goal, 4=Star
-        self.tools = ["Wall", "Floor", "Start", "Goal", "Star"]
-        self.tool_colors = [self.color_wall, self.color_floor, self.color_start, self.color_goal, self.color_star]
+        self.selected_tool = 0  # 0=Wall, 1=Floor, 2=Start, 3=Goal, 4=Star, 5=Mud, 6=Water
+        self.tools = ["Wall", "Floor", "Start", "Goal", "Star", "Mud", "Water"]
+        self.tool_colors = [self.color_wall, self.color_floor, self.color_start, self.color_goal, self.color_star,
+                            self.color_mud, self.color_water]
         
-        # Grid data (0=floor, 1=wall, S=start, G=goal, *=star)
+        # Grid data (0=floor, 1=wall, S=start, G=goal, *=star, m=mud, ~=water)
         self.grid = [['0' for _ in range(self.grid_width)] for _ in range(self.grid_height)]
         
         if self.existing_rows:
@@ -69,6 +77,19 @@ class EditMapScene(Scene):
         self.hovered_back = False
         self.hovered_cell = None
         self.dragging = False
+
+        # Đồ thị HPA* của level: lưới lúc bắt đầu sửa và các ô đổi chi phí từ đó,
+        # áp dụng một lần khi lưu thay vì mỗi lần tô
+        self._reset_terrain_edits()
+
+        # Xem trước đường đi khi chỉnh sửa (phím P), cập nhật tăng dần bằng D* Lite
+        self.preview_enabled = False
+        self.preview_planner = None
+        self.preview_path = []
+
+        # Lỗi khi lưu (level không có lời giải) và các POI không tới được từ S
+        self.save_error = None
+        self.unreachable_cells = []
     
     def _load_existing_level(self):
         """Load an existing level into the grid"""
@@ -142,7 +163,7 @@ class EditMapScene(Scene):
             if e.key == pygame.K_ESCAPE:
                 from .menu_scene import MenuScene
                 self.game.scenes.switch(MenuScene(self.game))
-            elif e.key in (pygame.K_1, pygame.K_2, pygame.K_3, pygame.K_4, pygame.K_5):
+            elif e.key in (pygame.K_1, pygame.K_2, pygame.K_3, pygame.K_4, pygame.K_5, pygame.K_6, pygame.K_7):
                 self.selected_tool = e.key - pygame.K_1
             elif e.key == pygame.K_s and pygame.key.get_pressed()[pygame.K_LCTRL]:
                 self._save_level()
@@ -154,6 +175,13 @@ class EditMapScene(Scene):
                 self._zoom_out()
             elif e.key == pygame.K_0:
                 self._reset_zoom()
+            elif e.key == pygame.K_p:
+                self.preview_enabled = not self.preview_enabled
+                if self.preview_enabled:
+                    self._rebuild_preview()
+                else:
+                    self.preview_planner = None
+                    self.preview_path = []
         elif e.type == pygame.MOUSEWHEEL:
             # Handle zoom with mouse wheel
             if e.y > 0:  # Scroll up - zoom in
@@ -263,6 +291,7 @@ class EditMapScene(Scene):
     def _place_tile(self, grid_x, grid_y):
         """Place a tile at the given grid position"""
         tool = self.selected_tool
+        old_char = self.grid[grid_y][grid_x]
         
         if tool == 0:  # Wall
             self.grid[grid_y][grid_x] = '1'
@@ -284,9 +313,89 @@ class EditMapScene(Scene):
             self.grid[grid_y][grid_x] = 'G'
         elif tool == 4:  # Star
             self.grid[grid_y][grid_x] = '*'
+        elif tool == 5:  # Mud
+            self.grid[grid_y][grid_x] = 'm'
+        elif tool == 6:  # Water
+            self.grid[grid_y][grid_x] = '~'
+
+        # Lưới đã đổi: bỏ thông báo lỗi lưu cũ
+        self.save_error = None
+        self.unreachable_cells = []
+
+        if self.preview_enabled:
+            self._update_preview(grid_x, grid_y, old_char)
+
+        # Địa hình đổi: chỉ ghi nhận ô, đồ thị HPA* được sửa cục bộ khi lưu
+        if tile_cost(self.grid[grid_y][grid_x]) != tile_cost(old_char):
+            self.terrain_edits.add((grid_x, grid_y))
+
+    def _reset_terrain_edits(self):
+        self.terrain_base_rows = ["".join(row) for row in self.grid]
+        self.terrain_edits = set()
+
+    def _apply_terrain_edits(self, rows):
+        """Sửa đồ thị HPA* đã lưu của level (nếu có) một lần cho mọi ô địa hình đổi từ lần lưu trước."""
+        if self.terrain_edits:
+            update_abstraction(self.terrain_base_rows, rows, self.terrain_edits)
+        self.terrain_base_rows = rows
+        self.terrain_edits = set()
+
+    def _rebuild_preview(self):
+        """Dựng lại planner từ lưới hiện tại (khi sao/G thay đổi hoặc vừa bật xem trước)."""
+        rows = ["".join(row) for row in self.grid]
+        try:
+            self.preview_planner = DStarLitePlanner(rows)
+        except ValueError:
+            # Thiếu S hoặc G: chưa có gì để xem trước
+            self.preview_planner = None
+            self.preview_path = []
+            return
+        self._refresh_preview_path()
+
+    def _update_preview(self, grid_x, grid_y, old_char):
+        """Cập nhật planner theo ô vừa sửa thay vì giải lại cả map."""
+        new_char = self.grid[grid_y][grid_x]
+        if new_char == old_char:
+            return
+        planner = self.preview_planner
+        if planner is None:
+            self._rebuild_preview()
+            return
+        tiles = '01' + ''.join(TERRAIN_COSTS)
+        if old_char in tiles and new_char in tiles:
+            # Tường/sàn/bùn/nước: chỉ đổi chi phí đi vào ô
+            planner.set_cell_cost(grid_x, grid_y, tile_cost(new_char))
+        elif new_char == 'S' and old_char in tiles:
+            # Ô S cũ trở thành sàn (vẫn đi được), chỉ cần dời điểm bắt đầu
+            planner.set_cell_cost(grid_x, grid_y, tile_cost('S'))
+            planner.move_start((grid_x, grid_y), 0)
+        else:
+            # Sao hoặc G thay đổi làm đổi không gian trạng thái (mask)
+            self._rebuild_preview()
+            return
+        self._refresh_preview_path()
+
+    def _refresh_preview_path(self):
+        res = self.preview_planner.plan()
+        self.preview_path = res.get("path", []) if res.get("found") else []
     
     def _save_level(self):
         """Save the current level"""
+        # Không lưu level không có lời giải: G/sao bị tường ngăn cách với S
+        rows = ["".join(row) for row in self.grid]
+        try:
+            self.unreachable_cells = find_unreachable(rows)
+        except ValueError as e:
+            # Thiếu S hoặc G
+            self.save_error = str(e)
+            print(f"Level not saved: {self.save_error}")
+            return
+        if self.unreachable_cells:
+            cells = ", ".join(f"({x},{y})" for x, y in self.unreachable_cells)
+            self.save_error = f"Không tới được từ S: {cells}"
+            print(f"Level not saved: {self.save_error}")
+            return
+        self.save_error = None
         try:
             # Create filename based on level name
             if self.level_name == "new_map":
@@ -306,6 +415,7 @@ class EditMapScene(Scene):
                 for row in self.grid:
                     f.write(''.join(row) + '\n')
             print(f"Level saved to {filename}")
+            self._apply_terrain_edits(rows)
         except Exception as e:
             print(f"Error saving level: {e}")
     
@@ -336,6 +446,9 @@ class EditMapScene(Scene):
                 
                 # Center the grid
                 self._center_grid()
+                self._reset_terrain_edits()
+                if self.preview_enabled:
+                    self._rebuild_preview()
                 
             print(f"Level loaded from {filename}")
         except Exception as e:
@@ -386,12 +499,12 @@ class EditMapScene(Scene):
         
         # Tool selection
         tool_y = 80
-        tool_width = 80
+        tool_width = 70
         tool_height = 30
-        tool_spacing = 10
+        tool_spacing = 8
         
         for i, tool in enumerate(self.tools):
-            tool_x = 200 + i * (tool_width + tool_spacing)
+            tool_x = 130 + i * (tool_width + tool_spacing)
             tool_rect = pygame.Rect(tool_x, tool_y, tool_width, tool_height)
             
             # Tool background
@@ -410,15 +523,21 @@ class EditMapScene(Scene):
         # Instructions
         instructions = [
             "Click to place tiles",
-            "1-5: Select tool",
+            "1-7: Select tool",
             "Ctrl+S: Save, Ctrl+L: Load",
             "Mouse wheel: Zoom",
-            "Drag: Scroll, 0: Reset zoom"
+            "Drag: Scroll, 0: Reset zoom",
+            "P: Path preview " + ("(on)" if self.preview_enabled else "(off)")
         ]
         
         for i, instruction in enumerate(instructions):
             inst_text = self.font_tiny.render(instruction, True, (200, 200, 200))
             screen.blit(inst_text, (sw - 200, 80 + i * 20))
+
+        # Lỗi lưu level (căn giữa dưới thanh công cụ)
+        if self.save_error:
+            error_text = self.font_tiny.render(self.save_error, True, (255, 110, 110))
+            screen.blit(error_text, error_text.get_rect(midtop=(sw // 2, 118)))
         
         # Draw grid
         self._draw_grid(screen)
@@ -464,9 +583,25 @@ class EditMapScene(Scene):
                     pygame.draw.rect(screen, self.color_goal, cell_rect)
                 elif char == '*':  # Star
                     pygame.draw.rect(screen, self.color_star, cell_rect)
+                elif char in COLOR_TERRAIN:  # Mud / Water
+                    pygame.draw.rect(screen, COLOR_TERRAIN[char], cell_rect)
                 else:  # Floor
                     pygame.draw.rect(screen, self.color_floor, cell_rect)
         
+        # Draw path preview
+        if self.preview_path:
+            preview_size = max(2, actual_cell_size // 3)
+            for (px, py) in self.preview_path[1:-1]:
+                center = (self.grid_x + px * actual_cell_size + actual_cell_size // 2,
+                          self.grid_y + py * actual_cell_size + actual_cell_size // 2)
+                pygame.draw.circle(screen, self.color_start, center, preview_size // 2 + 1)
+
+        # Viền đỏ quanh các sao/G không tới được từ S (sau khi lưu thất bại)
+        for (ux, uy) in self.unreachable_cells:
+            cell_rect = pygame.Rect(self.grid_x + ux * actual_cell_size, self.grid_y + uy * actual_cell_size,
+                                    actual_cell_size, actual_cell_size)
+            pygame.draw.rect(screen, (255, 70, 70), cell_rect, 3)
+
         # Draw hovered cell
         if self.hovered_cell:
             hover_x, hover_y = self.hovered_cell
@@ -377,6 +377,12 @@ class HistoryScene(Scene):
             nodes_surface = self.font_small.render(nodes_text, True, self.color_card_text)
             screen.blit(nodes_surface, (x + 500, y + 50))
 
+        # Chi phí đường đi (bản ghi cũ không có trường này)
+        if getattr(record, 'cost', 0) > 0:
+            cost_text = f"Cost: {record.cost}"
+            cost_surface = self.font_small.render(cost_text, True, self.color_card_text)
+            screen.blit(cost_surface, (x + 650, y + 50))
+
         # Solver (nếu có)
         if hasattr(record, 'solver'):
             solver_text = f"Solver: {record.solver}"
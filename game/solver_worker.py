@@ -0,0 +1,233 @@
+"""Chạy thuật toán trong tiến trình riêng để cửa sổ game không bị đứng.
+
+Tiến trình con gửi về qua Pipe các thông điệp:
+- ("trace", bytes) các ô được mở rộng theo lô (array('i') x, y liên tiếp),
+  nếu game cần hiển thị quá trình duyệt; ("trace_end", None) khi hết
+- ("progress", số nút đã mở rộng) định kỳ trong lúc tìm kiếm
+- ("done", kết quả) hoặc ("error", mô tả lỗi) khi kết thúc
+Game không tự chạy generator tìm kiếm nào: quá trình duyệt được đọc từ các
+lô "trace" (xem AIController.tick_trace). Chỉ TRACE_MAX_EVENTS sự kiện đầu
+được gửi (game hiển thị mỗi frame một ô nên không bao giờ phát hết hơn thế);
+sau đó worker giải tiếp mà không gửi sự kiện, bằng bản giải nhanh không yield
+từng ô (BATCH_SOLVERS) nếu có, vì bản đó cho kết quả giống hệt generator.
+Hủy tìm kiếm = kill tiến trình con, nên lượt tìm bị thay thế không
+tiếp tục chạy ngầm. Tiến trình con không phải daemon để có thể tự mở các
+tiến trình tìm kiếm song song (HDA*); khi thoát game các worker còn chạy bị
+kill (xem _cancel_all). Module này không import pygame để tiến trình con nhẹ.
+"""
+import multiprocessing as mp
+import signal
+import time
+import weakref
+from array import array
+from multiprocessing import util as mp_util
+from typing import Dict, List, Optional, Tuple
+
+from algorithms.BFS import bfs_collect_all_stars, bfs_search
+from algorithms.AStar import astar_search
+from algorithms.ARAStar import arastar_search
+from algorithms.IDAStar import idastar_search
+from algorithms.BeamSearch import beam_search
+from algorithms.Greedy import greedy_search
+from algorithms.DFS import dfs_search
+from algorithms.UCS import ucs_search
+from algorithms.HeldKarp import heldkarp_search
+from algorithms.HPAStar import hpa_search, persist_abstraction
+from algorithms.level_kernel import SearchEvents, collect_trace
+
+# Generator tìm kiếm theo tên thuật toán (xem SearchEvents trong level_kernel)
+SEARCHES = {
+    "BFS": bfs_search,
+    "DFS": dfs_search,
+    "UCS": ucs_search,
+    "Greedy": greedy_search,
+    "AStar": astar_search,
+    "HeldKarp": heldkarp_search,
+    "ARAStar": arastar_search,
+    "IDAStar": idastar_search,
+    "Beam": beam_search,
+    "HPAStar": hpa_search,
+}
+
+# Bản giải không ghi lại quá trình duyệt, cùng kết quả với generator tương ứng
+BATCH_SOLVERS = {
+    "BFS": bfs_collect_all_stars,
+}
+
+
+# Việc làm một lần sau mỗi lượt của worker (không làm trong generator vì generator có thể chạy hai lần)
+AFTER_SOLVE = {
+    "HPAStar": persist_abstraction,
+}
+
+# Quá trình duyệt: số ô mỗi lô, thời gian giữ lô chưa đầy (tìm kiếm chậm) và số ô tối đa gửi về game
+TRACE_BATCH = 4096
+TRACE_FLUSH_SEC = 0.05
+TRACE_MAX_EVENTS = 1 << 18
+
+
+def _stream_trace(conn, search: SearchEvents) -> Optional[Dict[str, object]]:
+    """Gửi các ô mở rộng của search về game theo lô.
+
+    Trả về kết quả nếu search xong trong TRACE_MAX_EVENTS sự kiện, ngược lại
+    dừng search và trả về None.
+    """
+    holder: Dict[str, Dict[str, object]] = {}
+
+    def run():
+        holder["result"] = yield from search
+
+    events = run()
+    batch = array('i')
+    count = 0
+    last_flush = time.monotonic()
+    for x, y in events:
+        batch.append(x)
+        batch.append(y)
+        count += 1
+        if count >= TRACE_MAX_EVENTS:
+            break
+        if len(batch) >= 2 * TRACE_BATCH or (not count % 64 and time.monotonic() - last_flush >= TRACE_FLUSH_SEC):
+            conn.send(("trace", batch.tobytes()))
+            conn.send(("progress", count))
+            batch = array('i')
+            last_flush = time.monotonic()
+    events.close()
+    if batch:
+        conn.send(("trace", batch.tobytes()))
+    conn.send(("trace_end", None))
+    result = holder.get("result")
+    if result is not None and result["nodes_expanded"] is None:
+        result["nodes_expanded"] = count
+    return result
+
+
+def _worker_main(
+    conn,
+    solver_name: str,
+    rows: List[str],
+    options: Dict[str, object],
+    trace_options: Optional[Dict[str, object]],
+    solve: bool,
+):
+    # Tiến trình fork từ game kế thừa handler SIGTERM của SDL (chỉ tạo sự kiện QUIT);
+    # khôi phục mặc định để terminate() khi thoát game thực sự dừng được worker
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+
+    def progress(nodes: int):
+        conn.send(("progress", nodes))
+
+    try:
+        res = None
+        if trace_options is not None:
+            res = _stream_trace(conn, SEARCHES[solver_name](rows, **trace_options))
+            # Quá trình duyệt dùng tùy chọn khác lượt giải (vd. HDA*): giải lại với options
+            if trace_options != options:
+                res = None
+        if solve and res is None:
+            solve_batch = BATCH_SOLVERS.get(solver_name)
+            if solve_batch is not None:
+                res = solve_batch(rows, progress=progress, **options)
+            else:
+                res = collect_trace(SEARCHES[solver_name](rows, **options), progress, keep_trace=False)
+        after = AFTER_SOLVE.get(solver_name)
+        if after is not None:
+            after(rows, **options)
+        conn.send(("done", res if solve else None))
+    except Exception as e:
+        conn.send(("error", repr(e)))
+    finally:
+        conn.close()
+
+
+# Mọi SolverWorker còn sống, để dừng tiến trình con khi thoát game
+_WORKERS: "weakref.WeakSet[SolverWorker]" = weakref.WeakSet()
+
+
+def _cancel_all():
+    for worker in list(_WORKERS):
+        worker.cancel()
+
+
+# Khi thoát, multiprocessing chạy các finalizer có exitpriority trước rồi mới
+# join tiến trình con không phải daemon: dừng worker trước để game không bị treo
+mp_util.Finalize(None, _cancel_all, exitpriority=100)
+
+
+class SolverWorker:
+    """Quản lý một tiến trình giải tại một thời điểm."""
+
+    def __init__(self):
+        self.process: Optional[mp.Process] = None
+        self.conn = None
+        self.solver_name: Optional[str] = None
+        self.nodes_expanded: int = 0  # Tiến độ mới nhất nhận được
+        _WORKERS.add(self)
+
+    @property
+    def busy(self) -> bool:
+        return self.process is not None
+
+    def start(
+        self,
+        solver_name: str,
+        rows: List[str],
+        options: Dict[str, object],
+        trace_options: Optional[Dict[str, object]] = None,
+        solve: bool = True,
+    ):
+        """Bắt đầu giải (hủy lượt đang chạy nếu có).
+
+        trace_options khác None: gửi kèm quá trình duyệt của generator với các
+        tùy chọn này. solve=False: chỉ gửi quá trình duyệt (đã có kết quả từ
+        cache), "done" khi đó mang None.
+        """
+        self.cancel()
+        parent_conn, child_conn = mp.Pipe(duplex=False)
+        process = mp.Process(
+            target=_worker_main,
+            args=(child_conn, solver_name, rows, options, trace_options, solve),
+        )
+        process.start()
+        child_conn.close()
+        self.process = process
+        self.conn = parent_conn
+        self.solver_name = solver_name
+        self.nodes_expanded = 0
+
+    def poll(self) -> Optional[Tuple[str, object]]:
+        """Đọc thông điệp kế tiếp: ("trace"/"trace_end", ...) trong lúc tìm, ("done"/"error", ...)
+        khi kết thúc; None nếu chưa có gì. Gọi lặp lại tới khi None để đọc hết.
+        """
+        if self.process is None:
+            return None
+        try:
+            while self.conn.poll():
+                kind, payload = self.conn.recv()
+                if kind == "progress":
+                    self.nodes_expanded = payload
+                    continue
+                if kind in ("done", "error"):
+                    self._cleanup()
+                return kind, payload
+        except (EOFError, OSError):
+            # Tiến trình con chết mà không gửi kết quả (vd. hết bộ nhớ)
+            self._cleanup()
+            return "error", "worker exited"
+        return None
+
+    def cancel(self):
+        """Dừng ngay lượt tìm kiếm đang chạy."""
+        if self.process is None:
+            return
+        if self.process.is_alive():
+            # kill() thay vì terminate(): không phụ thuộc handler tín hiệu trong tiến trình con
+            self.process.kill()
+        self._cleanup()
+
+    def _cleanup(self):
+        self.process.join(timeout=1)
+        self.conn.close()
+        self.process = None
+        self.conn = None
+        self.solver_name = None
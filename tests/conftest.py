@@ -0,0 +1,100 @@
+"""Cấu hình chung cho pytest: chạy từ thư mục gốc của repo, không cần cài đặt."""
+import os
+import random
+import sys
+from typing import List
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+LEVELS_DIR = os.path.join(ROOT, "data", "levels")
+
+
+def load_level(name: str) -> List[str]:
+    """Đọc một level có sẵn trong data/levels (bỏ dòng trống)."""
+    with open(os.path.join(LEVELS_DIR, name), encoding="utf-8") as f:
+        return [line.rstrip("\n") for line in f if line.strip()]
+
+
+def random_level(rng: random.Random, width: int, height: int, stars: int, walls: float, terrain: str = "") -> List[str]:
+    """Level ngẫu nhiên: tường với xác suất walls, ô trống có thể là địa hình trong terrain."""
+    floor = "0000" + terrain
+    grid = [["1" if rng.random() < walls else rng.choice(floor) for _ in range(width)] for _ in range(height)]
+    cells = rng.sample([(x, y) for y in range(height) for x in range(width)], stars + 2)
+    for (x, y), ch in zip(cells, "SG" + "*" * stars):
+        grid[y][x] = ch
+    return ["".join(row) for row in grid]
+
+
+def random_levels(
+    seed: int, terrain: str = "", count: int = 60, max_size: int = 10, walls: float = 0.2
+) -> List[List[str]]:
+    """count level ngẫu nhiên 4..max_size ô mỗi chiều, số sao lần lượt 0..4 (có level không sao)."""
+    rng = random.Random(seed)
+    return [
+        random_level(rng, rng.randint(4, max_size), rng.randint(4, max_size), i % 5, walls, terrain)
+        for i in range(count)
+    ]
+
+
+LEVEL_NAMES = sorted(name for name in os.listdir(LEVELS_DIR) if name.endswith(".txt"))
+
+STEPS = {"U": (0, -1), "D": (0, 1), "L": (-1, 0), "R": (1, 0)}
+
+
+def check_solution(rows: List[str], res: dict) -> None:
+    """Đi lại theo res["moves"]: hợp lệ, gom hết sao, kết thúc ở G, và "cost"/"steps"/"path" khớp."""
+    from algorithms.level_kernel import tile_cost
+
+    assert res["found"]
+    cells = {(x, y): ch for y, row in enumerate(rows) for x, ch in enumerate(row)}
+    x, y = next(p for p, ch in cells.items() if ch == "S")
+    stars = {p for p, ch in cells.items() if ch == "*"}
+    path, cost = [(x, y)], 0
+    for move in res["moves"]:
+        dx, dy = STEPS[move]
+        x, y = x + dx, y + dy
+        assert cells.get((x, y), "1") != "1", f"đi vào tường tại {(x, y)}"
+        cost += tile_cost(cells[(x, y)])
+        stars.discard((x, y))
+        path.append((x, y))
+    assert not stars, f"còn sao chưa gom: {stars}"
+    assert cells[(x, y)] == "G"
+    assert res["steps"] == len(res["moves"])
+    assert res["cost"] == cost
+    assert list(res["path"]) == path
+
+
+def unreachable_star_level() -> List[str]:
+    """Level có một sao bị tường bao quanh: không có lời giải."""
+    return [
+        "1111111",
+        "1S00001",
+        "1011101",
+        "101*101",
+        "1011101",
+        "10000G1",
+        "1111111",
+    ]
+
+
+@pytest.fixture
+def over_field_budget(monkeypatch, tmp_path):
+    """Giả lập map quá lớn cho trường của từng POI: dùng mốc ALT / JPS như map lớn.
+
+    Bảng mốc được ghi vào tmp_path thay vì data/levels/.landmarks.
+    """
+    import algorithms.AStar as AStar
+    import algorithms.poi_heuristics as poi_heuristics
+    from algorithms.landmarks import landmark_table
+
+    def temp_landmark_table(level):
+        return landmark_table(level, cache_dir=str(tmp_path))
+
+    monkeypatch.setattr(poi_heuristics, "POI_FIELD_BUDGET_CELLS", 0)
+    monkeypatch.setattr(poi_heuristics, "landmark_table", temp_landmark_table)
+    monkeypatch.setattr(AStar, "landmark_table", temp_landmark_table)
+    return tmp_path
@@ -0,0 +1,31 @@
+from algorithms.ARAStar import arastar_collect_all_stars_with_trace
+from algorithms.UCS import ucs_collect_all_stars_with_trace
+from conftest import check_solution, random_levels, unreachable_star_level
+
+
+def test_reported_bound_holds_without_time():
+    # Ngân sách 0: chỉ lời giải đầu tiên (weight lớn), cận báo về vẫn phải đúng
+    for terrain in ("", "m~"):
+        for rows in random_levels(3, terrain, max_size=12):
+            optimal = ucs_collect_all_stars_with_trace(rows)
+            res = arastar_collect_all_stars_with_trace(rows, time_budget=0.0)
+            assert res["found"] == optimal["found"]
+            if not res["found"]:
+                continue
+            check_solution(rows, res)
+            assert 1.0 <= res["bound"] <= res["weight"]
+            assert res["cost"] <= res["bound"] * optimal["cost"] + 1e-9
+            for cost, bound in res["solutions"]:
+                assert cost <= bound * optimal["cost"] + 1e-9
+
+
+def test_full_run_proves_optimality():
+    for rows in random_levels(3, "m~", count=20):
+        res = arastar_collect_all_stars_with_trace(rows)
+        if res["found"]:
+            assert res["bound"] == 1.0
+
+
+def test_unreachable_star_has_no_bound():
+    res = arastar_collect_all_stars_with_trace(unreachable_star_level())
+    assert res["bound"] == float("inf")
@@ -0,0 +1,53 @@
+import pytest
+
+from algorithms.BFS import bfs_collect_all_stars_with_trace
+from algorithms.BeamSearch import DEFAULT_BEAM_WIDTH, beam_collect_all_stars_with_trace
+from algorithms.UCS import ucs_collect_all_stars_with_trace
+from conftest import LEVEL_NAMES, check_solution, load_level, random_levels, unreachable_star_level
+
+# Độ rộng lớn hơn mọi lớp: beam không bỏ trạng thái nào (BFS theo độ sâu)
+UNBOUNDED = 10 ** 9
+
+
+@pytest.mark.parametrize("name", LEVEL_NAMES)
+def test_reported_cost_on_shipped_levels(name):
+    rows = load_level(name)
+    optimal = ucs_collect_all_stars_with_trace(rows)["cost"]
+    for heuristic in ("mst", "greedy"):
+        res = beam_collect_all_stars_with_trace(rows, DEFAULT_BEAM_WIDTH, heuristic)
+        check_solution(rows, res)
+        assert res["cost"] >= optimal
+
+
+@pytest.mark.parametrize("terrain", ["", "m~"])
+def test_reported_cost_on_random_grids(terrain):
+    for rows in random_levels(5, terrain, max_size=12):
+        optimal = ucs_collect_all_stars_with_trace(rows)
+        for width in (1, 4, DEFAULT_BEAM_WIDTH):
+            res = beam_collect_all_stars_with_trace(rows, width)
+            # Beam có thể cạn trước khi tới G, nhưng không bao giờ báo lời giải khi không có
+            if res["found"]:
+                check_solution(rows, res)
+                assert res["cost"] >= optimal["cost"]
+            else:
+                assert res["moves"] == []
+        # Không giới hạn độ rộng thì luôn tìm thấy lời giải nếu có
+        res = beam_collect_all_stars_with_trace(rows, UNBOUNDED)
+        assert res["found"] == optimal["found"]
+        if res["found"]:
+            check_solution(rows, res)
+            assert res["cost"] >= optimal["cost"]
+
+
+def test_unbounded_width_is_bfs_without_terrain():
+    for rows in random_levels(6, max_size=12):
+        expected = bfs_collect_all_stars_with_trace(rows)
+        res = beam_collect_all_stars_with_trace(rows, UNBOUNDED)
+        assert res["found"] == expected["found"]
+        if res["found"]:
+            assert res["cost"] == expected["cost"]
+
+
+def test_unreachable_star():
+    res = beam_collect_all_stars_with_trace(unreachable_star_level())
+    assert not res["found"]
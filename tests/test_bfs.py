@@ -0,0 +1,48 @@
+import random
+
+import pytest
+
+import algorithms.BFS as BFS
+import algorithms.layer_pool as layer_pool
+from algorithms.BFS import bfs_collect_all_stars, bfs_collect_all_stars_with_trace
+from algorithms.hash_distributed import parallel_available
+from conftest import LEVEL_NAMES, load_level, random_level
+
+
+def _same_as_queue_bfs(rows, **kwargs):
+    expected = bfs_collect_all_stars_with_trace(rows)
+    res = bfs_collect_all_stars(rows, **kwargs)
+    for key in ("found", "moves", "path", "cost", "nodes_expanded"):
+        assert res[key] == expected[key], key
+
+
+@pytest.fixture
+def small_vector_frontier(monkeypatch):
+    # Level thử nhỏ: hạ ngưỡng để các lớp chạy qua nhánh NumPy
+    monkeypatch.setattr(BFS, "VECTOR_MIN_FRONTIER", 4)
+
+
+@pytest.mark.parametrize("name", LEVEL_NAMES)
+def test_layered_matches_queue_on_shipped_levels(name, small_vector_frontier):
+    _same_as_queue_bfs(load_level(name))
+
+
+def test_layered_matches_queue_on_random_grids(small_vector_frontier):
+    rng = random.Random(14)
+    for i in range(40):
+        # Ít tường: nhiều cha cùng chạm một trạng thái, phải giữ đúng cha đầu tiên
+        rows = random_level(rng, rng.randint(5, 14), rng.randint(5, 14), 1 + i % 4, 0.1)
+        _same_as_queue_bfs(rows)
+
+
+@pytest.mark.skipif(not parallel_available(), reason="cần start method fork")
+@pytest.mark.parametrize("workers", [2, 3, 8])
+def test_parallel_layers_match_queue(workers, small_vector_frontier, monkeypatch):
+    # Mọi lớp vector đều chia cho các tiến trình; 8 tiến trình với lớp nhỏ có đoạn rỗng
+    monkeypatch.setattr(layer_pool, "PARALLEL_MIN_FRONTIER", 1)
+    rng = random.Random(25)
+    for name in LEVEL_NAMES:
+        _same_as_queue_bfs(load_level(name), workers=workers)
+    for i in range(10):
+        rows = random_level(rng, rng.randint(5, 14), rng.randint(5, 14), 1 + i % 4, 0.1)
+        _same_as_queue_bfs(rows, workers=workers)
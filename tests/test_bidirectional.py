@@ -0,0 +1,73 @@
+import random
+
+import pytest
+
+from algorithms.AStar import astar_collect_all_stars_with_trace
+from algorithms.BFS import bfs_collect_all_stars, bfs_collect_all_stars_with_trace
+from algorithms.UCS import ucs_collect_all_stars_with_trace
+from algorithms.bidirectional import bidirectional_search
+from algorithms.distance_field import UNREACHABLE, bfs_distance_field, distance_field
+from algorithms.landmarks import select_landmarks
+from algorithms.level_kernel import collect_trace, compile_level
+from conftest import check_solution, random_level
+
+
+def no_star_levels(seed, terrain):
+    rng = random.Random(seed)
+    return [
+        random_level(rng, rng.randint(2, 16), rng.randint(2, 16), 0, rng.choice([0.1, 0.3, 0.45]), terrain)
+        for _ in range(80)
+    ]
+
+
+def check_leg(rows, res, expected):
+    """expected: số bước/chi phí ngắn nhất từ S tới G (UNREACHABLE nếu không tới được)."""
+    assert res["found"] == (expected != UNREACHABLE)
+    if res["found"]:
+        check_solution(rows, res)
+
+
+@pytest.mark.parametrize("terrain", ["", "m~"])
+def test_two_sided_searches_find_shortest_legs(terrain):
+    for rows in no_star_levels(21, terrain):
+        level = compile_level(rows)
+        steps = bfs_distance_field(level, [level.goal_cell])[level.start_cell]
+        cost = distance_field(level, [level.goal_cell])[level.start_cell]
+        res = collect_trace(bidirectional_search(level, by_cost=False))
+        check_leg(rows, res, steps)
+        if res["found"]:
+            assert res["steps"] == steps
+        for landmarks in (None, select_landmarks(level, count=2)):
+            res = collect_trace(bidirectional_search(level, by_cost=True, landmarks=landmarks))
+            check_leg(rows, res, cost)
+            if res["found"]:
+                assert res["cost"] == cost
+
+
+@pytest.mark.parametrize("terrain", ["", "m~"])
+def test_solvers_on_levels_without_stars(terrain, over_field_budget):
+    # Ngân sách trường = 0: A* cũng đi đường hai chiều (ALT) hoặc JPS
+    for rows in no_star_levels(22, terrain):
+        level = compile_level(rows)
+        steps = bfs_distance_field(level, [level.goal_cell])[level.start_cell]
+        cost = distance_field(level, [level.goal_cell])[level.start_cell]
+        for res in (bfs_collect_all_stars_with_trace(rows), bfs_collect_all_stars(rows)):
+            check_leg(rows, res, steps)
+            assert not res["found"] or res["steps"] == steps
+        for res in (ucs_collect_all_stars_with_trace(rows), astar_collect_all_stars_with_trace(rows)):
+            check_leg(rows, res, cost)
+            assert not res["found"] or res["cost"] == cost
+
+
+@pytest.mark.parametrize("terrain", ["", "m~"])
+def test_expands_fewer_cells_than_one_sided_search(terrain):
+    rng = random.Random(23)
+    rows = random_level(rng, 60, 60, 0, 0.1, terrain)
+    level = compile_level(rows)
+    to_goal = distance_field(level, [level.goal_cell])[level.start_cell]
+    assert to_goal != UNREACHABLE
+    # Tìm một chiều mở rộng ít nhất mọi ô gần S hơn G (S, G chi phí 1: đi hai chiều như nhau)
+    one_sided = sum(1 for d in distance_field(level, [level.start_cell]) if d < to_goal)
+    res = collect_trace(bidirectional_search(level, by_cost=True))
+    assert res["cost"] == to_goal
+    assert res["nodes_expanded"] < one_sided
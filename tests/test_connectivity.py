@@ -0,0 +1,65 @@
+import pytest
+
+from algorithms.BFS import bfs_collect_all_stars
+from algorithms.UCS import ucs_collect_all_stars_with_trace
+from algorithms.connectivity import NO_COMPONENT, find_unreachable, label_components
+from algorithms.level_kernel import collect_trace, compile_level
+from conftest import random_levels, unreachable_star_level
+from game.solver_worker import SEARCHES
+
+WALLED_GOAL = [
+    "S0*01",
+    "00001",
+    "11111",
+    "0000G",
+]
+
+
+def test_label_components():
+    level = compile_level(WALLED_GOAL)
+    labels = label_components(level.width, level.height, level.passable)
+    top = {labels[level.cell_id(x, y)] for y in (0, 1) for x in range(4)}
+    bottom = {labels[level.cell_id(x, 3)] for x in range(5)}
+    assert len(top) == len(bottom) == 1 and top != bottom
+    assert all(labels[level.cell_id(x, 2)] == NO_COMPONENT for x in range(5))
+
+
+def test_reports_unreachable_pois():
+    assert find_unreachable(WALLED_GOAL) == [(4, 3)]
+    assert find_unreachable(unreachable_star_level()) == [(3, 3)]
+    with pytest.raises(ValueError):
+        find_unreachable(["S0*"])
+
+
+@pytest.mark.parametrize("solver", sorted(SEARCHES))
+@pytest.mark.parametrize("rows", [WALLED_GOAL, unreachable_star_level()])
+def test_solvers_reject_without_searching(solver, rows):
+    res = collect_trace(SEARCHES[solver](rows))
+    assert not res["found"]
+    assert res["nodes_expanded"] == 0 and res["expanded_order"] == []
+    assert res["unreachable"] == find_unreachable(rows)
+
+
+def test_batch_bfs_rejects_without_searching():
+    res = bfs_collect_all_stars(unreachable_star_level())
+    assert not res["found"] and res["nodes_expanded"] == 0
+
+
+@pytest.mark.parametrize("terrain", ["", "m~"])
+def test_rejects_exactly_the_unsolvable_levels(terrain):
+    # Nhiều tường: khoảng một nửa số level có sao/G bị ngăn cách
+    for rows in random_levels(19, terrain, count=80, walls=0.4):
+        solvable = not find_unreachable(rows)
+        assert solvable == ucs_collect_all_stars_with_trace(rows)["found"]
+
+
+def test_loader_warns_but_keeps_unsolvable_levels(tmp_path, capsys):
+    from core.assets import scan_levels
+
+    (tmp_path / "level01.txt").write_text("\n".join(unreachable_star_level()) + "\n")
+    (tmp_path / "level02.txt").write_text("S0*0G\n")
+    levels = scan_levels(str(tmp_path))
+    assert [name for name, _ in levels] == ["level01.txt", "level02.txt"]
+    out = capsys.readouterr().out
+    assert "level01.txt" in out and "(3,3)" in out
+    assert "level02.txt" not in out
@@ -0,0 +1,76 @@
+import random
+
+import pytest
+
+from algorithms.DStarLite import DStarLitePlanner
+from algorithms.UCS import ucs_collect_all_stars_with_trace
+from algorithms.level_kernel import TERRAIN_COSTS, compile_level
+from conftest import LEVEL_NAMES, check_solution, load_level, random_levels
+
+# Chi phí ô -> ký tự trong rows (0 = tường)
+TILE_FOR_COST = {0: "1", 1: "0", **{cost: ch for ch, cost in TERRAIN_COSTS.items()}}
+
+
+def assert_same_as_fresh_solve(rows, res):
+    expected = ucs_collect_all_stars_with_trace(rows)
+    assert res["found"] == expected["found"]
+    if res["found"]:
+        check_solution(rows, res)
+        assert res["cost"] == expected["cost"]
+
+
+@pytest.mark.parametrize("name", LEVEL_NAMES)
+def test_first_plan_is_optimal(name):
+    rows = load_level(name)
+    assert_same_as_fresh_solve(rows, DStarLitePlanner(rows).plan())
+
+
+@pytest.mark.parametrize("terrain", ["", "m~"])
+def test_repaired_plan_matches_fresh_plan_after_edits(terrain):
+    rng = random.Random(8)
+    for rows in random_levels(8, terrain, count=30):
+        planner = DStarLitePlanner(rows)
+        planner.plan()
+        grid = [list(row) for row in rows]
+        free = [(x, y) for y, row in enumerate(rows) for x, ch in enumerate(row) if ch in "01m~"]
+        for x, y in rng.sample(free, min(len(free), 6)):
+            cost = rng.choice(sorted(TILE_FOR_COST) if terrain else [0, 1])
+            planner.set_cell_cost(x, y, cost)
+            grid[y][x] = TILE_FOR_COST[cost]
+            edited = ["".join(row) for row in grid]
+            res = planner.plan()
+            assert_same_as_fresh_solve(edited, res)
+            assert DStarLitePlanner(edited).plan()["cost"] == res["cost"]
+
+
+@pytest.mark.parametrize("name", LEVEL_NAMES)
+def test_following_the_plan_needs_no_replanning(name):
+    rows = load_level(name)
+    level = compile_level(rows)
+    planner = DStarLitePlanner(rows)
+    res = planner.plan()
+    remaining = res["cost"]
+    mask = 0
+    for (x, y), _ in zip(res["path"][1:], res["moves"]):
+        cell = level.cell_id(x, y)
+        mask |= level.star_bit[cell]
+        remaining -= level.cost[cell]
+        planner.move_start((x, y), mask)
+        step = planner.plan()
+        assert step["cost"] == remaining
+        assert step["nodes_expanded"] <= 4
+
+
+def test_wall_edit_repairs_locally():
+    # Phòng trống: chặn một ô trên đường đi chỉ sửa lại vùng quanh ô đó
+    grid = [["0"] * 40 for _ in range(40)]
+    grid[0][0], grid[39][39], grid[20][5] = "S", "G", "*"
+    rows = ["".join(row) for row in grid]
+    planner = DStarLitePlanner(rows)
+    first = planner.plan()
+    x, y = first["path"][len(first["path"]) // 2]
+    planner.set_blocked(x, y, True)
+    repaired = planner.plan()
+    grid[y][x] = "1"
+    assert_same_as_fresh_solve(["".join(row) for row in grid], repaired)
+    assert repaired["nodes_expanded"] < first["nodes_expanded"] // 10
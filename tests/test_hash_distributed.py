@@ -0,0 +1,54 @@
+import pytest
+
+import algorithms.AStar as AStar
+import algorithms.UCS as UCS
+import algorithms.hash_distributed as hash_distributed
+from algorithms.AStar import astar_collect_all_stars_with_trace
+from algorithms.UCS import ucs_collect_all_stars_with_trace
+from algorithms.hash_distributed import parallel_available
+from conftest import LEVEL_NAMES, check_solution, load_level, random_levels
+
+pytestmark = pytest.mark.skipif(not parallel_available(), reason="HDA* cần start method fork")
+
+SOLVERS = {"astar": astar_collect_all_stars_with_trace, "ucs": ucs_collect_all_stars_with_trace}
+
+
+@pytest.fixture
+def hda_calls(monkeypatch):
+    """Đếm số lần tìm song song thực sự chạy (không bị tree_search/hai chiều thay thế)."""
+    calls = []
+
+    def counted(*args):
+        calls.append(args[0])
+        return (yield from hash_distributed.hash_distributed_search(*args))
+
+    monkeypatch.setattr(AStar, "hash_distributed_search", counted)
+    monkeypatch.setattr(UCS, "hash_distributed_search", counted)
+    return calls
+
+
+def assert_parallel_matches_sequential(solver, rows, workers):
+    expected = ucs_collect_all_stars_with_trace(rows)
+    res = SOLVERS[solver](rows, workers=workers)
+    assert res["found"] == expected["found"]
+    if res["found"]:
+        check_solution(rows, res)
+        assert res["cost"] == expected["cost"]
+
+
+@pytest.mark.parametrize("solver", sorted(SOLVERS))
+@pytest.mark.parametrize("name", LEVEL_NAMES)
+def test_shipped_levels(solver, name, hda_calls):
+    assert_parallel_matches_sequential(solver, load_level(name), workers=3)
+    assert hda_calls
+
+
+@pytest.mark.parametrize("solver", sorted(SOLVERS))
+@pytest.mark.parametrize("workers", [2, 4])
+@pytest.mark.parametrize("terrain", ["", "m~"])
+def test_random_grids(solver, workers, terrain, hda_calls):
+    levels = random_levels(24 + workers, terrain, count=25)
+    for rows in levels:
+        assert_parallel_matches_sequential(solver, rows, workers)
+    # Level không sao đi đường hai chiều, level bị loại trước không tìm gì
+    assert len(hda_calls) >= len(levels) // 2
@@ -0,0 +1,17 @@
+from algorithms.IDAStar import idastar_collect_all_stars_with_trace
+from algorithms.UCS import ucs_collect_all_stars_with_trace
+from algorithms.level_kernel import build_state_space, compile_level
+from conftest import load_level
+
+
+def test_small_table_stays_optimal_and_bounded():
+    rows = load_level("level04.txt")
+    reachable = build_state_space(compile_level(rows)).size
+    expected = ucs_collect_all_stars_with_trace(rows)["cost"]
+    for max_states in (0, 100, 200, 300):
+        assert max_states < reachable // 10
+        res = idastar_collect_all_stars_with_trace(rows, max_states=max_states)
+        assert res["found"]
+        assert res["cost"] == expected
+        # Không có kiểm tra vòng/thay thế thì mở rộng lại theo hàm mũ
+        assert res["nodes_expanded"] < 20 * reachable
@@ -0,0 +1,78 @@
+import random
+
+import pytest
+
+from algorithms.HeldKarp import heldkarp_collect_all_stars_with_trace
+from algorithms.UCS import ucs_collect_all_stars_with_trace
+from algorithms.distance_field import UNREACHABLE, bfs_distance_field
+from algorithms.jump_point import jps_path, jump_point_search, poi_distances
+from algorithms.level_kernel import compile_level
+from algorithms.poi_heuristics import poi_distance_matrix
+from conftest import LEVEL_NAMES, check_solution, load_level, random_level, random_levels
+
+
+def test_paths_are_shortest_on_random_grids():
+    rng = random.Random(22)
+    for _ in range(60):
+        level = compile_level(random_level(rng, rng.randint(2, 18), rng.randint(2, 18), 0, rng.choice([0.0, 0.2, 0.4])))
+        cells = [c for c in range(level.size) if level.passable[c]]
+        for source, target in [rng.sample(cells, 2) if len(cells) > 1 else (cells[0], cells[0]) for _ in range(5)]:
+            expected = bfs_distance_field(level, [target])[source]
+            path = jps_path(level, source, target)
+            if expected == UNREACHABLE:
+                assert path is None
+                continue
+            assert path[0] == source and path[-1] == target
+            assert len(path) - 1 == expected
+            for a, b in zip(path, path[1:]):
+                assert any(n == b for n, _ in level.neighbors[a])
+
+
+@pytest.mark.parametrize("name", LEVEL_NAMES)
+def test_poi_distances_match_distance_fields(name):
+    level = compile_level(load_level(name))
+    assert poi_distances(level) == poi_distance_matrix(level)
+
+
+def test_rejects_weighted_levels():
+    level = compile_level(["Sm0G"])
+    with pytest.raises(ValueError):
+        jps_path(level, level.start_cell, level.goal_cell)
+
+
+def test_expands_jump_points_not_cells():
+    # Phòng trống 80x80 (6400 ô) có một bức tường: chỉ các góc tường là điểm nhảy
+    grid = [["0"] * 80 for _ in range(80)]
+    grid[2][3], grid[75][70] = "S", "G"
+    for y in range(10, 60):
+        grid[y][40] = "1"
+    level = compile_level(["".join(row) for row in grid])
+    search = jump_point_search(level, level.start_cell, level.goal_cell)
+    expanded = 0
+    while True:
+        try:
+            next(search)
+        except StopIteration as stop:
+            cells = stop.value
+            break
+        expanded += 1
+    assert len(cells) - 1 == bfs_distance_field(level, [level.goal_cell])[level.start_cell]
+    assert expanded < 20
+
+
+@pytest.mark.parametrize("name", LEVEL_NAMES)
+def test_heldkarp_legs_from_jps_stay_optimal(name, over_field_budget):
+    rows = load_level(name)
+    res = heldkarp_collect_all_stars_with_trace(rows)
+    check_solution(rows, res)
+    assert res["cost"] == ucs_collect_all_stars_with_trace(rows)["cost"]
+
+
+def test_heldkarp_with_jps_on_random_grids(over_field_budget):
+    for rows in random_levels(24):
+        expected = ucs_collect_all_stars_with_trace(rows)
+        res = heldkarp_collect_all_stars_with_trace(rows)
+        assert res["found"] == expected["found"]
+        if res["found"]:
+            check_solution(rows, res)
+            assert res["cost"] == expected["cost"]
@@ -0,0 +1,74 @@
+import os
+
+import pytest
+
+from algorithms.AStar import astar_collect_all_stars_with_trace
+from algorithms.Greedy import greedy_collect_all_stars_with_trace
+from algorithms.UCS import ucs_collect_all_stars_with_trace
+from algorithms.distance_field import UNREACHABLE, distance_field
+from algorithms.landmarks import landmark_table, select_landmarks
+from algorithms.level_kernel import compile_level
+from conftest import LEVEL_NAMES, check_solution, load_level, random_levels
+
+
+@pytest.mark.parametrize("terrain", ["", "m~"])
+def test_bounds_never_exceed_true_cost(terrain):
+    for rows in random_levels(20, terrain, count=20):
+        level = compile_level(rows)
+        table = select_landmarks(level, count=3)
+        cells = [c for c in range(level.size) if level.passable[c]]
+        for target in [level.goal_cell] + level.star_cells:
+            to_target = distance_field(level, [target])
+            bounds_to = table.bounds_to([target])
+            bounds_from = table.bounds_from([target])
+            for cell in cells:
+                x, y = level.position(cell)
+                tx, ty = level.position(target)
+                if to_target[cell] != UNREACHABLE:
+                    assert abs(x - tx) + abs(y - ty) <= bounds_to(cell)[0] <= to_target[cell]
+                from_target = distance_field(level, [cell])[target]
+                if from_target != UNREACHABLE:
+                    assert bounds_from(cell)[0] <= from_target
+
+
+@pytest.mark.parametrize("name", LEVEL_NAMES)
+def test_astar_stays_optimal_with_alt(name, over_field_budget):
+    rows = load_level(name)
+    res = astar_collect_all_stars_with_trace(rows)
+    check_solution(rows, res)
+    assert res["cost"] == ucs_collect_all_stars_with_trace(rows)["cost"]
+    # Heuristic đã lấy cận dưới từ bảng mốc (được ghi vào thư mục tạm)
+    assert os.listdir(over_field_budget)
+
+
+@pytest.mark.parametrize("terrain", ["", "m~"])
+def test_alt_heuristics_on_random_grids(terrain, over_field_budget):
+    for rows in random_levels(21, terrain, count=40):
+        expected = ucs_collect_all_stars_with_trace(rows)
+        res = astar_collect_all_stars_with_trace(rows)
+        assert res["found"] == expected["found"]
+        if res["found"]:
+            check_solution(rows, res)
+            assert res["cost"] == expected["cost"]
+            check_solution(rows, greedy_collect_all_stars_with_trace(rows))
+
+
+def test_table_is_persisted_by_terrain(tmp_path):
+    rows = load_level("level04.txt")
+    level = compile_level(rows)
+    table = landmark_table(level, cache_dir=str(tmp_path))
+    files = os.listdir(tmp_path)
+    assert len(files) == 1
+    landmark_table.cache_clear()
+    loaded = landmark_table(level, cache_dir=str(tmp_path))
+    assert loaded.cells == table.cells
+    assert [list(f) for f in loaded.fields] == [list(f) for f in table.fields]
+    # Đổi chỗ S và G: cùng địa hình, dùng lại file
+    swapped = [row.replace("S", "#").replace("G", "S").replace("#", "G") for row in rows]
+    landmark_table(compile_level(swapped), cache_dir=str(tmp_path))
+    assert os.listdir(tmp_path) == files
+    # Thêm tường: địa hình khác, bảng mới
+    x = rows[1].index("0")
+    walled = rows[:1] + [rows[1][:x] + "1" + rows[1][x + 1:]] + rows[2:]
+    landmark_table(compile_level(walled), cache_dir=str(tmp_path))
+    assert len(os.listdir(tmp_path)) == 2
@@ -0,0 +1,136 @@
+from collections import deque
+
+import pytest
+
+from algorithms.BFS import bfs_collect_all_stars_with_trace
+from algorithms.DFS import dfs_collect_all_stars_with_trace
+from algorithms.connectivity import find_unreachable
+from algorithms.level_kernel import MOVE_CODES, PICKED_STAR, START_MOVE, TERRAIN_COSTS, build_state_space, compile_level
+from conftest import LEVEL_NAMES, STEPS, load_level, random_levels
+
+DIRECTIONS = [(dx, dy, move) for move, (dx, dy) in STEPS.items()]
+
+
+def reference_search(rows, lifo):
+    """BFS/DFS trên trạng thái (x, y, mask) đọc thẳng từ rows, như bản trước khi có level_kernel."""
+    height, width = len(rows), len(rows[0])
+    cells = {(x, y): ch for y, row in enumerate(rows) for x, ch in enumerate(row)}
+    start = next(p for p, ch in cells.items() if ch == "S")
+    goal = next(p for p, ch in cells.items() if ch == "G")
+    # Sao đánh số theo thứ tự đọc (hàng rồi cột), như _parse_level cũ
+    star_index = {p: i for i, p in enumerate(p for p, ch in cells.items() if ch == "*")}
+    all_mask = (1 << len(star_index)) - 1
+
+    first = (start[0], start[1], 0)
+    frontier = deque([first])
+    parents = {first: (None, "")}
+    expanded = []
+    while frontier:
+        x, y, mask = frontier.pop() if lifo else frontier.popleft()
+        expanded.append((x, y))
+        if (x, y) == goal and mask == all_mask:
+            moves, state = [], (x, y, mask)
+            while parents[state][0] is not None:
+                state, move = parents[state]
+                moves.append(move)
+            return moves[::-1], expanded
+        for dx, dy, move in DIRECTIONS:
+            nx, ny = x + dx, y + dy
+            if not (0 <= nx < width and 0 <= ny < height) or cells[(nx, ny)] == "1":
+                continue
+            nxt = (nx, ny, mask | (1 << star_index[(nx, ny)]) if (nx, ny) in star_index else mask)
+            if nxt not in parents:
+                parents[nxt] = ((x, y, mask), move)
+                frontier.append(nxt)
+    return [], expanded
+
+
+def comparable_levels():
+    # Level không sao (tìm hai chiều) và level bị loại trước đi đường riêng, không so được
+    levels = [load_level(name) for name in LEVEL_NAMES]
+    levels += random_levels(1, max_size=9) + random_levels(1, "m~", max_size=9)
+    return [rows for rows in levels if "*" in "".join(rows) and not find_unreachable(rows)]
+
+
+@pytest.mark.parametrize("solve, lifo", [(bfs_collect_all_stars_with_trace, False), (dfs_collect_all_stars_with_trace, True)])
+def test_same_moves_and_trace_as_row_scanning_search(solve, lifo):
+    for rows in comparable_levels():
+        moves, expanded = reference_search(rows, lifo)
+        res = solve(rows)
+        assert res["moves"] == moves
+        assert res["expanded_order"] == expanded
+
+
+@pytest.mark.parametrize("name", LEVEL_NAMES)
+def test_compiled_level_matches_rows(name):
+    rows = load_level(name)
+    level = compile_level(rows)
+    assert (level.width, level.height) == (len(rows[0]), len(rows))
+    for y, row in enumerate(rows):
+        for x, ch in enumerate(row):
+            cell = level.cell_id(x, y)
+            assert level.position(cell) == (x, y)
+            assert level.is_blocked(x, y) == (ch == "1")
+            if ch != "1":
+                assert level.cost[cell] == TERRAIN_COSTS.get(ch, 1)
+            assert bool(level.star_bit[cell]) == (ch == "*")
+            expected = [
+                (level.cell_id(x + dx, y + dy), move)
+                for dx, dy, move in DIRECTIONS
+                if ch != "1" and not level.is_blocked(x + dx, y + dy)
+            ]
+            assert list(level.neighbors[cell]) == expected
+    assert level.is_blocked(-1, 0) and level.is_blocked(0, level.height)
+
+
+def test_compiled_once_per_content():
+    rows = load_level(LEVEL_NAMES[0])
+    assert compile_level(rows) is compile_level(list(rows))
+
+
+def test_missing_start_or_goal_is_rejected():
+    with pytest.raises(ValueError):
+        compile_level(["0*0", "00G"])
+
+
+@pytest.mark.parametrize("name", LEVEL_NAMES)
+def test_state_numbering_keeps_cell_mask_order(name):
+    level = compile_level(load_level(name))
+    space = build_state_space(level)
+    assert space.size == sum(level.passable) * (1 << len(level.stars))
+    assert len(space.new_moves()) == space.size
+    pairs = [(cell, mask) for cell in space.cells for mask in range(space.num_masks)]
+    states = [space.state(cell, mask) for cell, mask in pairs]
+    # Liên tục từ 0 và cùng thứ tự với bộ (cell, mask): tie-break trong heap không đổi
+    assert states == list(range(space.size))
+    for state, (cell, mask) in zip(states, pairs):
+        assert (space.cells[state >> space.bits], state & space.mask_all) == (cell, mask)
+
+
+@pytest.mark.parametrize("name", LEVEL_NAMES)
+def test_move_bytes_rebuild_the_path(name):
+    rows = load_level(name)
+    level = compile_level(rows)
+    space = build_state_space(level)
+    res = bfs_collect_all_stars_with_trace(rows)
+    # Chỉ ghi byte nước đi dọc lời giải: đủ để lần ngược mà không cần cha
+    moves = space.new_moves()
+    cell, mask = level.start_cell, 0
+    moves[space.state(cell, mask)] = START_MOVE
+    for move in res["moves"]:
+        dx, dy = STEPS[move]
+        cell += dx * level.height + dy
+        bit = level.star_bit[cell]
+        code = MOVE_CODES[move] | (PICKED_STAR if bit and not mask & bit else 0)
+        mask |= bit
+        moves[space.state(cell, mask)] = code
+    assert space.reconstruct(moves, space.state(cell, mask)) == (res["path"], res["moves"])
+
+
+def test_many_stars_fit_in_one_byte_per_state():
+    # 16 sao: 2^16 mask cho mỗi ô, tập đã thăm kiểu set sẽ tốn hàng trăm MB
+    rows = ["S" + "*" * 16 + "0G", "0" * 19]
+    space = build_state_space(compile_level(rows))
+    assert len(space.new_moves()) == 38 << 16
+    res = bfs_collect_all_stars_with_trace(rows)
+    assert res["found"] and res["steps"] == 18
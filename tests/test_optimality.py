@@ -0,0 +1,50 @@
+"""Các thuật toán tối ưu phải cho cùng chi phí với UCS (Dijkstra trên (ô, mask))."""
+from functools import partial
+
+import pytest
+
+from algorithms.ARAStar import arastar_collect_all_stars_with_trace
+from algorithms.HeldKarp import heldkarp_collect_all_stars_with_trace
+from algorithms.IDAStar import idastar_collect_all_stars_with_trace
+from algorithms.UCS import ucs_collect_all_stars_with_trace
+from conftest import LEVEL_NAMES, check_solution, load_level, random_levels, unreachable_star_level
+
+OPTIMAL_SOLVERS = {
+    "heldkarp": heldkarp_collect_all_stars_with_trace,
+    # Không có ngân sách thời gian: ARA* chạy tới weight = 1
+    "arastar": arastar_collect_all_stars_with_trace,
+    "idastar": idastar_collect_all_stars_with_trace,
+    "idastar-no-table": partial(idastar_collect_all_stars_with_trace, max_states=0),
+    "idastar-small-table": partial(idastar_collect_all_stars_with_trace, max_states=16),
+}
+
+
+def assert_matches_ucs(solve, rows):
+    expected = ucs_collect_all_stars_with_trace(rows)
+    res = solve(rows)
+    assert res["found"] == expected["found"]
+    if res["found"]:
+        check_solution(rows, res)
+        assert res["cost"] == expected["cost"]
+    else:
+        assert res["moves"] == []
+
+
+@pytest.mark.parametrize("solver", sorted(OPTIMAL_SOLVERS))
+@pytest.mark.parametrize("name", LEVEL_NAMES)
+def test_shipped_levels(solver, name):
+    assert_matches_ucs(OPTIMAL_SOLVERS[solver], load_level(name))
+
+
+@pytest.mark.parametrize("solver", sorted(OPTIMAL_SOLVERS))
+@pytest.mark.parametrize("terrain", ["", "m~"])
+def test_random_grids(solver, terrain):
+    for rows in random_levels(2, terrain):
+        assert_matches_ucs(OPTIMAL_SOLVERS[solver], rows)
+
+
+@pytest.mark.parametrize("solver", sorted(OPTIMAL_SOLVERS))
+def test_unreachable_star(solver):
+    res = OPTIMAL_SOLVERS[solver](unreachable_star_level())
+    assert not res["found"]
+    assert res["moves"] == []
@@ -0,0 +1,113 @@
+import multiprocessing as mp
+from array import array
+
+import pytest
+
+import algorithms.level_kernel as level_kernel
+import game.solver_worker as solver_worker
+from algorithms.level_kernel import collect_trace
+from conftest import LEVEL_NAMES, load_level, random_levels
+from game.solver_worker import SEARCHES, _stream_trace, _worker_main
+
+RESULT_KEYS = ("found", "path", "moves", "steps", "cost", "nodes_expanded")
+LEVELS = [load_level(name) for name in LEVEL_NAMES] + random_levels(11, "m~", count=10)
+
+
+def drain(search):
+    """Tiêu thụ generator bằng tay: (các ô đã yield, giá trị return)."""
+    events = []
+    while True:
+        try:
+            events.append(next(search))
+        except StopIteration as stop:
+            return events, stop.value
+
+
+def same_result(res, expected):
+    for key in RESULT_KEYS:
+        assert res[key] == expected[key], key
+
+
+@pytest.mark.parametrize("solver", sorted(SEARCHES))
+def test_collect_trace_is_the_generator_drained(solver):
+    for rows in LEVELS:
+        events, res = drain(SEARCHES[solver](rows))
+        if res["nodes_expanded"] is None:
+            res["nodes_expanded"] = len(events)
+        collected = collect_trace(SEARCHES[solver](rows))
+        same_result(collected, res)
+        assert collected["expanded_order"] == events
+        # Không giữ quá trình duyệt: cùng lời giải, danh sách rỗng
+        lean = collect_trace(SEARCHES[solver](rows), keep_trace=False)
+        same_result(lean, res)
+        assert lean["expanded_order"] == []
+
+
+def test_progress_reports_every_interval(monkeypatch):
+    monkeypatch.setattr(level_kernel, "PROGRESS_INTERVAL", 100)
+    rows = load_level("level04.txt")
+    reports = []
+    res = collect_trace(SEARCHES["BFS"](rows), reports.append)
+    assert reports == list(range(100, len(res["expanded_order"]) + 1, 100))
+
+
+def receive_all(conn):
+    messages = []
+    while conn.poll(5):
+        try:
+            messages.append(conn.recv())
+        except EOFError:
+            break
+    return messages
+
+
+def streamed_cells(messages):
+    flat = array('i')
+    for kind, payload in messages:
+        if kind == "trace":
+            flat.frombytes(payload)
+    return list(zip(flat[::2], flat[1::2]))
+
+
+@pytest.mark.parametrize("name", LEVEL_NAMES)
+def test_stream_trace_sends_every_expansion_in_order(name):
+    rows = load_level(name)
+    expected = collect_trace(SEARCHES["AStar"](rows))
+    parent, child = mp.Pipe()
+    res = _stream_trace(child, SEARCHES["AStar"](rows))
+    child.close()
+    messages = receive_all(parent)
+    assert messages[-1] == ("trace_end", None)
+    assert streamed_cells(messages) == expected["expanded_order"]
+    same_result(res, expected)
+
+
+def test_stream_trace_stops_at_event_cap(monkeypatch):
+    monkeypatch.setattr(solver_worker, "TRACE_MAX_EVENTS", 100)
+    rows = load_level("level04.txt")
+    expected = collect_trace(SEARCHES["UCS"](rows))["expanded_order"]
+    parent, child = mp.Pipe()
+    assert _stream_trace(child, SEARCHES["UCS"](rows)) is None
+    child.close()
+    messages = receive_all(parent)
+    assert messages[-1] == ("trace_end", None)
+    assert streamed_cells(messages) == expected[:100]
+
+
+@pytest.mark.parametrize("solver", ["BFS", "UCS", "IDAStar"])
+def test_worker_streams_trace_then_solves(solver):
+    rows = load_level("level04.txt")
+    expected = collect_trace(SEARCHES[solver](rows))
+    parent, child = mp.Pipe()
+    _worker_main(child, solver, rows, {}, {}, True)
+    messages = receive_all(parent)
+    kind, res = messages[-1]
+    assert kind == "done"
+    same_result(res, expected)
+    assert streamed_cells(messages) == expected["expanded_order"]
+    # Chỉ xem quá trình duyệt (kết quả đã có trong cache): không gửi lời giải
+    parent, child = mp.Pipe()
+    _worker_main(child, solver, rows, {}, {}, False)
+    messages = receive_all(parent)
+    assert messages[-1] == ("done", None)
+    assert streamed_cells(messages) == expected["expanded_order"]
@@ -0,0 +1,70 @@
+import os
+
+from algorithms.BFS import bfs_collect_all_stars_with_trace
+from conftest import load_level
+from core.solver_cache import SolverCache, make_key
+
+ROWS = load_level("level01.txt")
+
+
+def edited(rows, x, y, ch):
+    row = rows[y]
+    return rows[:y] + [row[:x] + ch + row[x + 1:]] + rows[y + 1:]
+
+
+def test_key_follows_content_solver_and_options():
+    key = make_key(ROWS, "BFS")
+    assert make_key(tuple(ROWS), "BFS", {}) == key
+    assert make_key(ROWS, "AStar") != key
+    assert make_key(ROWS, "Beam", {"width": 4, "heuristic": "mst"}) == make_key(ROWS, "Beam", {"heuristic": "mst", "width": 4})
+    assert make_key(ROWS, "Beam", {"width": 4}) != make_key(ROWS, "Beam", {"width": 8})
+    # Sửa một ô (trong file hay trong editor) là khóa đổi: kết quả cũ không bao giờ được dùng lại
+    x = ROWS[1].index("0")
+    changed = edited(ROWS, x, 1, "1")
+    assert make_key(changed, "BFS") != key
+    assert make_key(edited(changed, x, 1, "0"), "BFS") == key
+
+
+def test_disk_round_trip_after_restart(tmp_path):
+    result = bfs_collect_all_stars_with_trace(ROWS)
+    key = make_key(ROWS, "BFS")
+    SolverCache(1 << 20, str(tmp_path)).put(key, result)
+    # Lần mở game sau: bộ nhớ rỗng, đọc lại từ thư mục cache
+    loaded = SolverCache(1 << 20, str(tmp_path)).get(key)
+    assert loaded == result
+    assert SolverCache(1 << 20, str(tmp_path)).get(make_key(ROWS, "DFS")) is None
+
+
+def test_memory_lru_respects_byte_budget():
+    small = {"path": [(0, 0)], "moves": [], "found": True}
+    cache = SolverCache(0)
+    cache.put("a", small)
+    assert cache.get("a") is None  # lớn hơn ngân sách, không có đĩa
+    probe = SolverCache(1 << 20)
+    probe.put("a", small)
+    budget = probe.total_bytes * 2
+    cache = SolverCache(budget)
+    cache.put("a", small)
+    cache.put("b", small)
+    assert cache.get("a") is small  # dùng lại: "b" thành cũ nhất
+    cache.put("c", small)
+    assert cache.get("b") is None
+    assert cache.get("a") is small and cache.get("c") is small
+    assert cache.total_bytes <= budget
+
+
+def test_disk_budget_drops_least_recently_used(tmp_path):
+    result = bfs_collect_all_stars_with_trace(ROWS)
+    cache = SolverCache(0, str(tmp_path))
+    cache.put("old", result)
+    one_file = os.path.getsize(tmp_path / "old.json")
+    cache = SolverCache(0, str(tmp_path), max_disk_bytes=2 * one_file)
+    os.utime(tmp_path / "old.json", (0, 0))
+    cache.put("mid", result)
+    cache.put("new", result)
+    assert sorted(os.listdir(tmp_path)) == ["mid.json", "new.json"]
+
+
+def test_unreadable_entry_is_a_miss(tmp_path):
+    (tmp_path / "broken.json").write_text("{not json")
+    assert SolverCache(1 << 20, str(tmp_path)).get("broken") is None